@@ -0,0 +1,568 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmarks de rendimiento para LinkedIn Networking Suite
+Mide el impacto de los cambios de almacenamiento e importación
+
+Uso:
+    python benchmarks.py enums --rows 1000000
+    python benchmarks.py header_mapping --rows 100000
+    python benchmarks.py parallel_import --rows 1000000
+    python benchmarks.py pandas_engine --rows 200000
+    python benchmarks.py watch_poll --rows 5000
+    python benchmarks.py message_render --rows 100000
+    python benchmarks.py mail_merge --rows 100000
+    python benchmarks.py fuzzy_search --rows 1000000
+"""
+
+import io
+import os
+import csv
+import sys
+import mmap
+import contextlib
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List
+
+from database import ContactDatabase, ENUM_COLUMNS, text_trigrams
+from folder_watcher import FolderWatcher
+from message_generator import MessageGenerator, compile_template
+from mail_merge import MailMerge
+from csv_importer import (FIELD_CANDIDATES, IMPORT_ENGINES, LinkedInCSVImporter,
+                          get_header_resolver, parse_range, split_ranges)
+
+
+def _best_time(func: Callable, repeat: int = 3) -> float:
+    """Ejecuta una función varias veces y devuelve el mejor tiempo en segundos"""
+    best = float('inf')
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def _page_bytes(conn: sqlite3.Connection) -> int:
+    """Tamaño actual de la base en bytes (page_count * page_size)"""
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    return page_count * page_size
+
+
+def _print_table(title: str, headers: List[str], rows: List[List]) -> None:
+    """Imprime una tabla de resultados alineada"""
+    widths = [max(len(str(value)) for value in column) for column in zip(headers, *rows)]
+
+    print(f"\n📊 {title}")
+    print("   " + "  ".join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    print("   " + "  ".join("-" * w for w in widths))
+    for row in rows:
+        print("   " + "  ".join(str(v).ljust(w) for v, w in zip(row, widths)))
+
+
+def benchmark_enums(rows: int) -> None:
+    """
+    Compara interacciones con tipo/resultado como TEXT (esquema anterior)
+    contra códigos enteros con tablas de lookup (esquema actual)
+
+    Mide tamaño de tabla, tamaño del índice sobre el tipo y el GROUP BY
+    de tipo y resultado que usan las estadísticas.
+    """
+    types = list(ENUM_COLUMNS['interaction_type'][2])
+    outcomes = list(ENUM_COLUMNS['outcome'][2]) + [None]
+    rng = random.Random(42)
+    samples = [(rng.randrange(1, rows // 10 + 2), rng.choice(types), rng.choice(outcomes))
+               for _ in range(rows)]
+    now = '2026-01-01T10:00:00.000000'
+
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Esquema anterior: valores de texto repetidos en cada fila
+        text_conn = sqlite3.connect(os.path.join(tmp, 'text.db'))
+        text_conn.execute("""
+            CREATE TABLE interactions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                contact_id INTEGER NOT NULL,
+                interaction_type TEXT NOT NULL,
+                message TEXT,
+                outcome TEXT,
+                next_follow_up_date TEXT,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        text_conn.commit()
+        before = _page_bytes(text_conn)
+        text_conn.executemany("""
+            INSERT INTO interactions (contact_id, interaction_type, outcome, created_at)
+            VALUES (?, ?, ?, ?)
+        """, ((c, t, o, now) for c, t, o in samples))
+        text_conn.commit()
+        text_table = _page_bytes(text_conn) - before
+        text_conn.execute("CREATE INDEX idx_type ON interactions(interaction_type, outcome)")
+        text_conn.commit()
+        text_index = _page_bytes(text_conn) - before - text_table
+
+        def text_group_by(hint: str = ''):
+            return text_conn.execute(f"""
+                SELECT interaction_type, outcome, COUNT(*)
+                FROM interactions {hint}
+                GROUP BY interaction_type, outcome
+            """).fetchall()
+
+        text_time = _best_time(text_group_by)
+        text_scan_time = _best_time(lambda: text_group_by('NOT INDEXED'))
+        text_conn.close()
+
+        # Esquema actual: códigos enteros (tablas creadas por ContactDatabase)
+        db = ContactDatabase(os.path.join(tmp, 'codes.db'))
+        type_codes = {name: code for code, name in enumerate(ENUM_COLUMNS['interaction_type'][2], 1)}
+        outcome_codes = {name: code for code, name in enumerate(ENUM_COLUMNS['outcome'][2], 1)}
+
+        code_conn = db._get_connection()
+        before = _page_bytes(code_conn)
+        code_conn.executemany("""
+            INSERT INTO interactions (contact_id, interaction_type_id, outcome_id, created_at)
+            VALUES (?, ?, ?, ?)
+        """, ((c, type_codes[t], outcome_codes.get(o), now) for c, t, o in samples))
+        code_conn.commit()
+        code_table = _page_bytes(code_conn) - before
+        code_conn.execute("CREATE INDEX idx_type ON interactions(interaction_type_id, outcome_id)")
+        code_conn.commit()
+        code_index = _page_bytes(code_conn) - before - code_table
+
+        def code_group_by(hint: str = ''):
+            grouped = code_conn.execute(f"""
+                SELECT interaction_type_id, outcome_id, COUNT(*)
+                FROM interactions {hint}
+                GROUP BY interaction_type_id, outcome_id
+            """).fetchall()
+            # Incluye la traducción a nombres que hacen los accesores
+            return [(db.enum_name('interaction_type', t), db.enum_name('outcome', o), n)
+                    for t, o, n in grouped]
+
+        code_time = _best_time(code_group_by)
+        code_scan_time = _best_time(lambda: code_group_by('NOT INDEXED'))
+        code_conn.close()
+
+    def mb(value: int) -> str:
+        return f"{value / 1024 / 1024:.1f} MB"
+
+    results.append(['Tabla interactions', mb(text_table), mb(code_table),
+                    f"{1 - code_table / text_table:.0%}"])
+    results.append(['Índice (tipo, resultado)', mb(text_index), mb(code_index),
+                    f"{1 - code_index / text_index:.0%}"])
+    results.append(['GROUP BY (con índice)', f"{text_time * 1000:.0f} ms",
+                    f"{code_time * 1000:.0f} ms", f"{1 - code_time / text_time:.0%}"])
+    results.append(['GROUP BY (sin índice)', f"{text_scan_time * 1000:.0f} ms",
+                    f"{code_scan_time * 1000:.0f} ms", f"{1 - code_scan_time / text_scan_time:.0%}"])
+
+    _print_table(f"TEXT vs códigos enteros ({rows:,} interacciones)",
+                 ['Métrica', 'TEXT', 'Códigos', 'Reducción'], results)
+
+
+# Encabezado del Connections.csv del exportador de LinkedIn
+CONNECTIONS_HEADER = ('First Name', 'Last Name', 'URL', 'Email Address',
+                      'Company', 'Position', 'Connected On')
+
+
+def _write_connections_csv(path: str, rows: int) -> None:
+    """Genera un Connections.csv sintético con el formato del exportador de LinkedIn"""
+    rng = random.Random(42)
+
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write("Notes:\n\"When exporting your connection data, you may notice that "
+                "some of the email addresses are missing.\"\n\n")
+        writer = csv.writer(f)
+        writer.writerow(CONNECTIONS_HEADER)
+        for i in range(rows):
+            writer.writerow([
+                f"Nombre{i}", f"Apellido{i}", f"https://www.linkedin.com/in/contacto-{i}",
+                f"contacto{i}@example.com" if i % 3 else '',
+                f"Empresa {rng.randrange(5000)}", rng.choice(['Developer', 'CTO', 'Recruiter', '']),
+                '01 Jan 2026'
+            ])
+
+
+def _legacy_map_row(row: Dict, fieldnames: List[str]) -> Dict:
+    """
+    Mapeo por fila anterior: busca cada campo recorriendo candidatos y
+    columnas con comparaciones .lower() en cada fila
+    """
+    def find_field(key: str):
+        for possible_name in FIELD_CANDIDATES[key]:
+            if possible_name in fieldnames:
+                value = row.get(possible_name, '').strip()
+                if value:
+                    return value
+            for fieldname in fieldnames:
+                if possible_name.lower() in fieldname.lower():
+                    value = row.get(fieldname, '').strip()
+                    if value:
+                        return value
+        return None
+
+    return {field: find_field(field) for field in FIELD_CANDIDATES}
+
+
+def benchmark_header_mapping(rows: int) -> None:
+    """
+    Compara el mapeo de columnas por fila (DictReader + búsqueda de nombres)
+    contra el mapeo compilado una vez por encabezado (csv.reader + posiciones)
+
+    Ambos recorren el mismo archivo completo; no se escribe en la base.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'Connections.csv')
+        _write_connections_csv(path, rows)
+        header = CONNECTIONS_HEADER
+
+        def legacy():
+            with open(path, encoding='utf-8-sig', newline='') as f:
+                for _ in range(3):
+                    next(f)
+                reader = csv.DictReader(f)
+                fieldnames = reader.fieldnames
+                for row in reader:
+                    _legacy_map_row(row, fieldnames)
+
+        def compiled():
+            with open(path, encoding='utf-8-sig', newline='') as f:
+                for _ in range(3):
+                    next(f)
+                reader = csv.reader(f)
+                resolver = get_header_resolver(header)
+                next(reader)
+                for row in reader:
+                    resolver.map_row(row)
+
+        legacy_time = _best_time(legacy)
+        compiled_time = _best_time(compiled)
+
+        def compile_header():
+            get_header_resolver.cache_clear()
+            get_header_resolver(header)
+
+        compile_time = _best_time(compile_header)
+
+    _print_table(f"Mapeo de columnas ({rows:,} filas)",
+                 ['Variante', 'Tiempo', 'Filas/s'], [
+                     ['Búsqueda por fila', f"{legacy_time:.2f} s", f"{rows / legacy_time:,.0f}"],
+                     ['Mapeo compilado', f"{compiled_time:.2f} s", f"{rows / compiled_time:,.0f}"],
+                     ['Compilar encabezado', f"{compile_time * 1e6:.0f} µs", '-'],
+                 ])
+    print(f"   Aceleración: {legacy_time / compiled_time:.1f}x")
+
+
+def benchmark_parallel_import(rows: int) -> None:
+    """
+    Mide cómo escala el parseo por rangos de bytes con la cantidad de
+    procesos, y la importación completa con 1 proceso contra todos los núcleos
+
+    El parseo se mide solo (sin escribir); en la importación completa la
+    escritura en SQLite sigue siendo de un único proceso.
+    """
+    cores = os.cpu_count() or 1
+    counts = sorted({1, 2, 4, cores} & set(range(1, cores + 1)))
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'Connections.csv')
+        _write_connections_csv(path, rows)
+        size = os.path.getsize(path)
+
+        with open(path, 'rb') as raw:
+            with mmap.mmap(raw.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                start = mm.find(b'\n', mm.find(b'First Name')) + 1
+                ranges = split_ranges(mm, start, len(mm))
+
+        def parse(workers: int):
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(parse_range, path, begin, end, ',', CONNECTIONS_HEADER)
+                           for begin, end in ranges]
+                return sum(future.result()[1] for future in futures)
+
+        base_time = None
+        for workers in counts:
+            elapsed = _best_time(lambda: parse(workers), repeat=1)
+            base_time = base_time or elapsed
+            results.append([f"Parseo, {workers} proceso(s)", f"{elapsed:.2f} s",
+                            f"{rows / elapsed:,.0f}", f"{base_time / elapsed:.1f}x"])
+
+        for workers in sorted({1, cores}):
+            db = ContactDatabase(os.path.join(tmp, f'import_{workers}.db'))
+            importer = LinkedInCSVImporter(db)
+            with contextlib.redirect_stdout(io.StringIO()):
+                start_time = time.perf_counter()
+                importer.import_from_csv(path, collect_contacts=False, workers=workers,
+                                         quiet=True)
+                elapsed = time.perf_counter() - start_time
+            results.append([f"Importación, {workers} proceso(s)", f"{elapsed:.2f} s",
+                            f"{rows / elapsed:,.0f}", '-'])
+
+    _print_table(f"Importación en paralelo ({rows:,} filas, {size / 1024 / 1024:.0f} MB, "
+                 f"{len(ranges)} rangos, {cores} núcleos)",
+                 ['Variante', 'Tiempo', 'Filas/s', 'Aceleración'], results)
+
+
+def benchmark_pandas_engine(rows: int) -> None:
+    """
+    Compara el motor de importación por filas (csv) con el de pandas
+
+    Se mide la simulación (dry run: la importación completa dentro de una
+    transacción que se deshace) y la importación real en una base nueva
+    con cada motor.
+    """
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'Connections.csv')
+        _write_connections_csv(path, rows)
+        importer = LinkedInCSVImporter(ContactDatabase(os.path.join(tmp, 'dry_run.db')))
+
+        dry_run_times = {}
+        for engine in IMPORT_ENGINES:
+            with contextlib.redirect_stdout(io.StringIO()):
+                dry_run_times[engine] = _best_time(lambda: importer.import_from_csv(
+                    path, dry_run=True, collect_contacts=False, quiet=True, engine=engine))
+
+        for engine in IMPORT_ENGINES:
+            importer = LinkedInCSVImporter(ContactDatabase(os.path.join(tmp, f'{engine}.db')))
+            with contextlib.redirect_stdout(io.StringIO()):
+                start_time = time.perf_counter()
+                importer.import_from_csv(path, collect_contacts=False, quiet=True, engine=engine)
+                import_time = time.perf_counter() - start_time
+
+            results.append([engine, f"{dry_run_times[engine]:.2f} s",
+                            f"{rows / dry_run_times[engine]:,.0f}",
+                            f"{import_time:.2f} s", f"{rows / import_time:,.0f}"])
+
+    _print_table(f"Motores de importación ({rows:,} filas)",
+                 ['Motor', 'Simulación', 'Filas/s', 'Importación', 'Filas/s'], results)
+
+
+def benchmark_watch_poll(rows: int) -> None:
+    """
+    Mide lo que cuesta una revisión de la carpeta vigilada con muchos
+    archivos ya vistos: sin cambios (solo el stat de la carpeta), el listado
+    completo periódico y el listado después de agregar un archivo
+    """
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(rows):
+            with open(os.path.join(tmp, f'export_{i}.csv'), 'w') as f:
+                f.write('First Name,Last Name,URL\n')
+
+        watcher = FolderWatcher(LinkedInCSVImporter(ContactDatabase(os.path.join(tmp, 'watch.db'))), tmp)
+        watcher.scan()
+        watcher.index, watcher.pending = watcher.pending, {}
+
+        def full_scan():
+            watcher.folder_mtime = None
+            watcher.scan()
+
+        def after_new_file():
+            path = os.path.join(tmp, 'nuevo.csv')
+            with open(path, 'w'):
+                pass
+            watcher.scan()
+            os.remove(path)
+            watcher.scan()
+
+        for label, func in (("Sin cambios", watcher.scan),
+                            ("Listado completo", full_scan),
+                            ("Archivo nuevo (alta y baja)", after_new_file)):
+            elapsed = _best_time(func, repeat=5)
+            results.append([label, f"{elapsed * 1000:.3f} ms"])
+
+    _print_table(f"Revisión de la carpeta vigilada ({rows:,} archivos)",
+                 ['Revisión', 'Tiempo'], results)
+
+
+def _legacy_replace_variables(message: str, variables: Dict) -> str:
+    """Reemplazo anterior: un str.replace sobre el mensaje completo por variable"""
+    for var, value in variables.items():
+        message = message.replace(f"{{{var}}}", str(value))
+
+    return message
+
+
+def benchmark_message_render(rows: int) -> None:
+    """
+    Compara el armado de mensajes de conexión reemplazando variable por
+    variable contra el template compilado (una pasada con format_map)
+
+    Ambas variantes reciben las mismas variables ya armadas por contacto y
+    recorren los templates de conexión en orden.
+    """
+    rng = random.Random(42)
+    templates = [template['template'] for template in MessageGenerator.CONNECTION_TEMPLATES]
+    contacts = [{
+        'name': f"Nombre{i}", 'company': f"Empresa {rng.randrange(5000)}",
+        'industry': rng.choice(['Tecnología', 'Finanzas', 'Salud']), 'job_title': 'Recruiter',
+        'role_focus': 'Backend Developer', 'skills_highlight': 'Python y SQL',
+        'referrer': 'un colega',
+    } for i in range(rows)]
+
+    def legacy():
+        for i, variables in enumerate(contacts):
+            _legacy_replace_variables(templates[i % len(templates)], variables).strip()
+
+    def compiled():
+        for i, variables in enumerate(contacts):
+            compile_template(templates[i % len(templates)]).render(variables).strip()
+
+    assert all(_legacy_replace_variables(text, contacts[0]) == compile_template(text).render(contacts[0])
+               for text in templates)
+
+    legacy_time = _best_time(legacy)
+    compiled_time = _best_time(compiled)
+
+    def compile_all():
+        compile_template.cache_clear()
+        for text in templates:
+            compile_template(text)
+
+    compile_time = _best_time(compile_all) / len(templates)
+
+    _print_table(f"Armado de mensajes ({rows:,} contactos)",
+                 ['Variante', 'Tiempo', 'Mensajes/s'], [
+                     ['Reemplazo por variable', f"{legacy_time:.2f} s", f"{rows / legacy_time:,.0f}"],
+                     ['Template compilado', f"{compiled_time:.2f} s", f"{rows / compiled_time:,.0f}"],
+                     ['Compilar template', f"{compile_time * 1e6:.0f} µs", '-'],
+                 ])
+    print(f"   Aceleración: {legacy_time / compiled_time:.1f}x")
+
+
+def benchmark_mail_merge(rows: int) -> None:
+    """
+    Mide la generación en lote de mensajes de conexión para todos los
+    contactos pendientes, en un proceso y en varios, hacia cada destino
+    """
+    results = []
+    workers = os.cpu_count() or 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = ContactDatabase(os.path.join(tmp, 'merge.db'))
+        rng = random.Random(42)
+
+        for start in range(0, rows, 5000):
+            db.add_contacts_batch([{
+                'linkedin_url': f"https://www.linkedin.com/in/contacto-{i}", 'name': f"Nombre{i} Apellido",
+                'company': f"Empresa {rng.randrange(5000)}", 'industry': 'Tecnología',
+                'status': 'pending',
+            } for i in range(start, min(start + 5000, rows))])
+
+        merge = MailMerge(db)
+
+        for output in ('csv', 'jsonl', 'reminders'):
+            for procs in sorted({1, workers}):
+                path = os.path.join(tmp, f'mensajes.{output}')
+                stats = merge.run(output=output, path=path, workers=procs)
+                results.append([output, procs, f"{stats['elapsed']:.2f} s",
+                                f"{stats['written'] / stats['elapsed']:,.0f}"])
+
+    _print_table(f"Mensajes en lote ({rows:,} contactos)",
+                 ['Destino', 'Procesos', 'Tiempo', 'Mensajes/s'], results)
+
+
+FIRST_NAMES = ('Juan', 'María', 'José', 'Ana', 'Luis', 'Carmen', 'Carlos', 'Laura', 'Jorge',
+               'Lucía', 'Pedro', 'Sofía', 'Miguel', 'Elena', 'Javier', 'Paula', 'Diego',
+               'Marta', 'Pablo', 'Julia')
+LAST_NAMES = ('González', 'Rodríguez', 'Gómez', 'Fernández', 'López', 'Martínez', 'Díaz',
+              'Pérez', 'Sánchez', 'Romero', 'Álvarez', 'Torres', 'Ruiz', 'Ramírez', 'Flores',
+              'Acosta', 'Benítez', 'Medina', 'Herrera', 'Suárez', 'Aguirre', 'Giménez',
+              'Gutiérrez', 'Pereyra', 'Rojas', 'Molina', 'Castro', 'Ortiz', 'Silva', 'Núñez')
+
+
+def _legacy_fuzzy_candidates(conn: sqlite3.Connection, query: str) -> int:
+    """Candidatos como antes: GROUP BY sobre todas las entradas de cada trigrama"""
+    trigrams = list(text_trigrams(query))
+    placeholders = ', '.join('?' * len(trigrams))
+    rows = conn.execute(f"""
+        SELECT contact_id, COUNT(*) AS hits
+        FROM contact_trigrams
+        WHERE trigram IN ({placeholders})
+        GROUP BY contact_id
+        HAVING COUNT(*) >= ?
+        ORDER BY hits DESC
+        LIMIT 500
+    """, (*trigrams, max(1, round(0.45 * len(trigrams))))).fetchall()
+    return len(rows)
+
+
+def benchmark_fuzzy_search(rows: int) -> None:
+    """
+    Mide la búsqueda difusa sobre una red con nombres repetidos (trigramas
+    muy comunes): candidatos con todos los trigramas de la consulta contra
+    los trigramas raros que usa search_contacts(fuzzy=True)
+    """
+    results = []
+    queries = ('Juan González', 'Mria Gonzlez', 'Lucia Benitez Empresa 123', 'Empresa 4711')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = ContactDatabase(os.path.join(tmp, 'fuzzy.db'))
+        rng = random.Random(42)
+
+        for start in range(0, rows, 5000):
+            db.add_contacts_batch([{
+                'linkedin_url': f"https://www.linkedin.com/in/contacto-{i}",
+                'name': f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}",
+                'company': f"Empresa {rng.randrange(20000)}",
+            } for i in range(start, min(start + 5000, rows))])
+
+        start_time = time.perf_counter()
+        db.refresh_trigram_index()
+        print(f"   Índice de trigramas: {time.perf_counter() - start_time:.1f} s")
+
+        conn = sqlite3.connect(db.db_path)
+
+        for query in queries:
+            legacy_time = _best_time(lambda: _legacy_fuzzy_candidates(conn, query))
+            found = []
+            search_time = _best_time(lambda: found.append(db.search_contacts(query, fuzzy=True, limit=10)))
+            top = found[-1][0]['name'] if found[-1] else '-'
+            results.append([query, f"{legacy_time * 1000:.1f} ms", f"{search_time * 1000:.1f} ms", top])
+
+        conn.close()
+
+    _print_table(f"Búsqueda difusa ({rows:,} contactos)",
+                 ['Búsqueda', 'Todos los trigramas', 'search_contacts', 'Primer resultado'], results)
+
+
+BENCHMARKS: Dict[str, Callable[[int], None]] = {
+    'enums': benchmark_enums,
+    'header_mapping': benchmark_header_mapping,
+    'parallel_import': benchmark_parallel_import,
+    'pandas_engine': benchmark_pandas_engine,
+    'watch_poll': benchmark_watch_poll,
+    'message_render': benchmark_message_render,
+    'mail_merge': benchmark_mail_merge,
+    'fuzzy_search': benchmark_fuzzy_search,
+}
+
+
+def main() -> None:
+    """Punto de entrada"""
+    parser = argparse.ArgumentParser(description="Benchmarks de LinkedIn Networking Suite")
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS) + ['all'])
+    parser.add_argument('--rows', type=int, default=1_000_000,
+                        help="Cantidad de filas a generar (default: 1.000.000)")
+    args = parser.parse_args()
+
+    names = sorted(BENCHMARKS) if args.benchmark == 'all' else [args.benchmark]
+
+    for name in names:
+        BENCHMARKS[name](args.rows)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
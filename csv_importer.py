@@ -5,340 +5,2235 @@ Importador de CSV de LinkedIn para Networking Suite
 Importa contactos desde el exportador oficial de LinkedIn
 """
 
+import io
 import os
+import sys
+import time
+import contextlib
 import csv
 import re
-from typing import List, Dict, Optional
+import mmap
+import hashlib
+import zipfile
+import itertools
+import functools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import (Any, BinaryIO, Callable, Iterable, Iterator, List, Dict,
+                    Optional, Sequence, TextIO, Tuple)
 import logging
 
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
 from database import ContactDatabase
 
-logger = logging.getLogger(__name__)
+logger = logging.getLogger(__name__)
+
+# Contactos escritos por transacción durante la importación
+IMPORT_BATCH_SIZE = 500
+
+# Columnas de la cuarentena de una importación desde un adaptador de fuente
+# (los campos normalizados; el importador de LinkedIn la reconoce al reimportarla)
+SOURCE_QUARANTINE_FIELDS = ('linkedin_url', 'name', 'company', 'job_title', 'location',
+                            'email', 'notes')
+
+# Líneas iniciales en las que se busca el encabezado real del CSV
+HEADER_SCAN_LINES = 50
+
+# Motores de importación: fila por fila con csv (por defecto) o por bloques con pandas
+IMPORT_ENGINES = ('rows', 'pandas')
+
+# Filas que lee pandas por bloque (cada bloque se escribe en una transacción)
+PANDAS_CHUNK_ROWS = 5000
+
+# Cuarentena de filas rechazadas: archivo junto al importado, columna con el
+# motivo y tamaño del buffer de escritura
+QUARANTINE_SUFFIX = '.cuarentena.csv'
+QUARANTINE_REASON_COLUMN = 'motivo_rechazo'
+QUARANTINE_BUFFER_BYTES = 1024 * 1024
+REASON_NO_URL = 'URL de LinkedIn no encontrada'
+
+# Segundos mínimos entre dos avisos de progreso de la importación
+PROGRESS_INTERVAL = 0.25
+
+# Filas que la vista previa lee como máximo buscando contactos para mostrar
+PREVIEW_MAX_ROWS = 1000
+
+# Bytes del inicio y del final del CSV que entran en su huella (para reanudar)
+FINGERPRINT_BYTES = 64 * 1024
+
+# Planillas de Excel que se importan con openpyxl (en modo solo lectura)
+XLSX_EXTENSIONS = ('.xlsx', '.xlsm')
+
+# Nombres del archivo de conexiones dentro del ZIP de LinkedIn, por preferencia
+CONNECTIONS_MEMBER_NAMES = ('connections.csv', 'conexiones.csv')
+
+# Columnas que siempre trae el archivo de conexiones de LinkedIn
+CONNECTIONS_COLUMNS = ('First Name', 'Last Name', 'URL', 'Company', 'Position')
+
+# Hilos para procesar en paralelo otros archivos del ZIP
+ARCHIVE_WORKERS = 4
+
+# Columnas de messages.csv e Invitations.csv de la exportación de LinkedIn
+# (en minúsculas; campo -> nombre de columna)
+MESSAGE_COLUMNS = {
+    'conversation_id': 'conversation id',
+    'sender_url': 'sender profile url',
+    'recipient_urls': 'recipient profile urls',
+    'date': 'date',
+    'subject': 'subject',
+    'content': 'content',
+}
+INVITATION_COLUMNS = {
+    'sent_at': 'sent at',
+    'message': 'message',
+    'direction': 'direction',
+    'inviter_url': 'inviterprofileurl',
+    'invitee_url': 'inviteeprofileurl',
+}
+
+# Formatos de fecha de esos archivos (las fechas con ' UTC' se pasan a hora local)
+ACTIVITY_DATE_FORMATS = ('%Y-%m-%d %H:%M:%S UTC', '%Y-%m-%d %H:%M:%S',
+                         '%m/%d/%y, %I:%M %p', '%m/%d/%Y, %I:%M %p')
+
+# Importación en paralelo: tamaño de cada rango de bytes que parsea un proceso
+# y tamaño mínimo del CSV para que compense arrancar los procesos
+PARALLEL_CHUNK_BYTES = 4 * 1024 * 1024
+PARALLEL_MIN_BYTES = 16 * 1024 * 1024
+
+# Campos de un contacto mapeado, en el orden de las tuplas que devuelven los procesos
+COMPACT_FIELDS = ('linkedin_url', 'name', 'company', 'job_title', 'location',
+                  'email', 'status', 'connection_message_sent')
+
+# Nombres de columna posibles para cada campo, en orden de preferencia
+# (se buscan exactos y luego como subcadena sin distinguir mayúsculas)
+FIELD_CANDIDATES = {
+    # URL de LinkedIn (varios formatos posibles)
+    'linkedin_url': [
+        'URL',
+        'LinkedIn URL',
+        'LinkedIn',
+        'Url',
+        'Profile URL',
+        'Profile Url',
+        'Enlace',
+        'Link',
+        'url'
+    ],
+    # Nombre
+    'name': [
+        'First Name',
+        'FirstName',
+        'Nombre',
+        'GivenName',
+        'First'
+    ],
+    # Apellido
+    'last_name': [
+        'Last Name',
+        'LastName',
+        'Apellido',
+        'FamilyName',
+        'Surname',
+        'Last'
+    ],
+    # Email
+    'email': [
+        'Email Address',
+        'Email',
+        'E-mail',
+        'Correo',
+        'Mail'
+    ],
+    # Empresa
+    'company': [
+        'Company',
+        'Empresa',
+        'Position Company',
+        'Organization'
+    ],
+    # Cargo
+    'job_title': [
+        'Position',
+        'Job Title',
+        'Title',
+        'Cargo',
+        'Role',
+        'Puesto'
+    ],
+    # Ubicación
+    'location': [
+        'Location',
+        'Ubicación',
+        'City',
+        'Ciudad'
+    ]
+}
+
+# Encabezados distintos cuyo mapeo compilado se conserva entre importaciones
+RESOLVER_CACHE_SIZE = 32
+
+
+class HeaderResolver:
+    """
+    Mapeo compilado de un encabezado de CSV a los campos del contacto
+
+    La búsqueda de columnas por nombre se hace una sola vez por encabezado;
+    cada fila se resuelve después por posición.
+    """
+
+    def __init__(self, fieldnames: Tuple[str, ...]):
+        """
+        Compila el mapeo para un encabezado
+
+        Args:
+            fieldnames: Nombres de columnas del CSV
+        """
+        self.fieldnames = fieldnames
+        lowered = [fieldname.lower() for fieldname in fieldnames]
+
+        # Posiciones candidatas de cada campo, en el orden en que se prueban
+        self.columns = {}
+        for field, candidates in FIELD_CANDIDATES.items():
+            positions = []
+            for candidate in candidates:
+                positions.extend(i for i, name in enumerate(fieldnames) if name == candidate)
+                positions.extend(i for i, name in enumerate(lowered) if candidate.lower() in name)
+            self.columns[field] = tuple(dict.fromkeys(positions))
+
+        # Columnas que pueden traer el nombre completo
+        self.full_name_columns = tuple(i for i, name in enumerate(lowered) if 'name' in name)
+
+    def _find_field(self, row: Sequence[str], field: str) -> Optional[str]:
+        """Primer valor no vacío entre las columnas candidatas de un campo"""
+        for i in self.columns[field]:
+            if i < len(row):
+                value = row[i].strip()
+                if value:
+                    return value
+
+        return None
+
+    def map_row(self, row: Sequence[str]) -> Optional[Dict]:
+        """
+        Mapea una fila del CSV de LinkedIn a nuestro formato
+
+        Args:
+            row: Valores de la fila, en el orden del encabezado
+
+        Returns:
+            Diccionario con el contacto mapeado o None
+        """
+        contact = {}
+
+        # Extraer URL de LinkedIn
+        linkedin_url = self._find_field(row, 'linkedin_url')
+
+        if not linkedin_url:
+            # Intentar extraer URL de otros campos
+            for value in row:
+                value = value.strip()
+                if 'linkedin.com/in/' in value.lower():
+                    linkedin_url = value
+                    break
+
+        if not linkedin_url:
+            return None
+
+        contact['linkedin_url'] = linkedin_url
+
+        # Extraer nombre y apellido
+        first_name = self._find_field(row, 'name') or ''
+        last_name = self._find_field(row, 'last_name') or ''
+
+        if first_name and last_name:
+            contact['name'] = f"{first_name} {last_name}"
+        elif first_name:
+            contact['name'] = first_name
+        else:
+            # Intentar extraer de un campo de nombre completo
+            for i in self.full_name_columns:
+                value = row[i].strip() if i < len(row) else ''
+                if value and len(value.split()) >= 2:
+                    contact['name'] = value
+                    break
+
+            if 'name' not in contact:
+                # Usar parte del URL como nombre
+                match = re.search(r'/in/([^/]+)', linkedin_url)
+                if match:
+                    contact['name'] = match.group(1).replace('-', ' ').title()
+                else:
+                    contact['name'] = 'Contacto sin nombre'
+
+        # Extraer otros campos
+        contact['company'] = self._find_field(row, 'company')
+        contact['job_title'] = self._find_field(row, 'job_title')
+        contact['location'] = self._find_field(row, 'location')
+
+        contact['email'] = self._find_field(row, 'email')
+
+        # Marcar como connected por defecto (ya son conexiones)
+        contact['status'] = 'connected'
+        contact['connection_message_sent'] = 1
+
+        return contact
+
+    def _first_filled(self, columns: Callable[[int], np.ndarray], rows: int,
+                      positions: Sequence[int]) -> np.ndarray:
+        """Versión vectorizada de _find_field: primer valor no vacío entre las columnas"""
+        result = np.full(rows, '', dtype=object)
+
+        for i in reversed(positions):
+            if i < len(self.fieldnames):
+                column = columns(i)
+                result = np.where(column != '', column, result)
+
+        return result
+
+    def map_frame(self, frame: pd.DataFrame) -> List[Dict]:
+        """
+        Mapea un bloque de filas leído con pandas, con operaciones por columna
+
+        Produce los mismos contactos que map_row sobre cada fila. Solo se
+        limpian las columnas que usa el mapeo, y los respaldos (URL en otra
+        columna, nombre completo o tomado del URL) se calculan únicamente
+        sobre las filas que los necesitan.
+
+        Args:
+            frame: Filas del CSV como texto, columnas en el orden del encabezado
+
+        Returns:
+            Un contacto mapeado por fila (None si la fila no tiene URL de LinkedIn)
+        """
+        rows = len(frame)
+        if not rows:
+            return []
+
+        stripped = {}
+
+        def columns(i: int) -> np.ndarray:
+            if i not in stripped:
+                values = frame[frame.columns[i]].tolist()
+                stripped[i] = np.array([value.strip() for value in values], dtype=object)
+            return stripped[i]
+
+        def first_filled(field: str) -> np.ndarray:
+            return self._first_filled(columns, rows, self.columns[field])
+
+        # URL: columnas candidatas y, si no, cualquier valor con un perfil
+        linkedin_url = first_filled('linkedin_url')
+        missing_url = linkedin_url == ''
+        if missing_url.any():
+            fallback = np.full(missing_url.sum(), '', dtype=object)
+            for i in reversed(range(len(self.fieldnames))):
+                column = pd.Series(columns(i)[missing_url])
+                has_profile = column.str.lower().str.contains('linkedin.com/in/', regex=False)
+                fallback = np.where(has_profile.to_numpy(), column.to_numpy(), fallback)
+            linkedin_url[missing_url] = fallback
+
+        # Nombre: nombre y apellido, nombre completo, o el slug del URL
+        first_name = first_filled('name')
+        last_name = first_filled('last_name')
+        name = np.where(last_name == '', first_name, first_name + ' ' + last_name)
+
+        no_first_name = first_name == ''
+        if no_first_name.any():
+            slug = pd.Series(linkedin_url[no_first_name]).str.extract(r'/in/([^/]+)', expand=False)
+            fallback = slug.str.replace('-', ' ', regex=False).str.title()
+            fallback = fallback.fillna('Contacto sin nombre').to_numpy(dtype=object)
+            for i in reversed(self.full_name_columns):
+                column = pd.Series(columns(i)[no_first_name])
+                full_name = (column.str.split().str.len() >= 2).to_numpy()
+                fallback = np.where(full_name, column.to_numpy(), fallback)
+            name[no_first_name] = fallback
+
+        def values(field: str) -> List[Optional[str]]:
+            column = first_filled(field)
+            return np.where(column != '', column, None).tolist()
+
+        mapped = zip(linkedin_url.tolist(), name.tolist(), values('company'),
+                     values('job_title'), values('location'), values('email'))
+
+        contacts = []
+        for url, contact_name, company, job_title, location, email in mapped:
+            if not url:
+                contacts.append(None)
+                continue
+
+            contact = {
+                'linkedin_url': url,
+                'name': contact_name,
+                'company': company,
+                'job_title': job_title,
+                'location': location,
+                'email': email,
+                'status': 'connected',
+                'connection_message_sent': 1
+            }
+            contacts.append(contact)
+
+        return contacts
+
+
+@functools.lru_cache(maxsize=RESOLVER_CACHE_SIZE)
+def get_header_resolver(fieldnames: Tuple[str, ...]) -> HeaderResolver:
+    """
+    Devuelve el mapeo compilado de un encabezado (cacheado por encabezado)
+
+    Args:
+        fieldnames: Nombres de columnas del CSV
+
+    Returns:
+        HeaderResolver para ese encabezado
+    """
+    return HeaderResolver(fieldnames)
+
+
+def parse_linkedin_date(value: str) -> Optional[str]:
+    """
+    Convierte una fecha de la exportación de LinkedIn al formato de la base
+
+    Args:
+        value: Fecha tal como viene en el CSV (ver ACTIVITY_DATE_FORMATS)
+
+    Returns:
+        Fecha ISO en hora local o None si no se reconoce
+    """
+    value = (value or '').strip()
+
+    # Formato de messages.csv: ISO en UTC (fromisoformat es mucho más rápido que strptime)
+    if value.endswith(' UTC'):
+        try:
+            parsed = datetime.fromisoformat(value[:-4])
+            return parsed.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None).isoformat()
+        except ValueError:
+            pass
+
+    for date_format in ACTIVITY_DATE_FORMATS:
+        try:
+            parsed = datetime.strptime(value, date_format)
+        except ValueError:
+            continue
+
+        if date_format.endswith('UTC'):
+            parsed = parsed.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+        return parsed.isoformat()
+
+    try:
+        return datetime.fromisoformat(value).isoformat()
+    except ValueError:
+        return None
+
+
+@functools.lru_cache(maxsize=16384)
+def profile_url_variants(url: str) -> Tuple[str, ...]:
+    """
+    Formas en que puede estar guardada la URL de un perfil
+
+    Los archivos de actividad no siempre escriben la URL igual que
+    Connections.csv (www, barra final, parámetros).
+
+    Args:
+        url: URL del perfil
+
+    Returns:
+        Variantes de la URL (vacía si no es una URL); cacheado, porque
+        los mismos perfiles se repiten en miles de mensajes
+    """
+    url = (url or '').strip()
+    path = re.sub(r'^https?://(www\.)?', '', url.split('?')[0]).rstrip('/')
+
+    if not path:
+        return ()
+
+    variants = [url]
+    for prefix in ('https://www.', 'https://', 'http://www.', 'http://'):
+        variants.extend((prefix + path, prefix + path + '/'))
+
+    return tuple(dict.fromkeys(variants))
+
+
+def activity_ref(kind: str, *parts: str) -> str:
+    """Identificador estable de una interacción importada (para no duplicarla)"""
+    return f"{kind}:" + hashlib.sha1('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+
+def cell_text(value: Any) -> str:
+    """
+    Convierte el valor de una celda de Excel al texto que tendría en un CSV
+
+    Args:
+        value: Valor de la celda (texto, número, fecha o None)
+
+    Returns:
+        Texto de la celda ('' si está vacía)
+    """
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, datetime):
+        return value.date().isoformat() if value.time() == datetime.min.time() else value.isoformat()
+
+    return str(value)
+
+
+def split_ranges(mm: mmap.mmap, start: int, end: int,
+                 chunk_bytes: int = PARALLEL_CHUNK_BYTES) -> List[Tuple[int, int]]:
+    """
+    Divide un CSV mapeado en memoria en rangos que terminan en un fin de registro
+
+    Un salto de línea solo cierra un registro si la cantidad de comillas
+    desde el inicio del rango es par (si no, está dentro de un campo entre
+    comillas); las comillas escapadas ("") no alteran la paridad.
+
+    Args:
+        mm: Archivo mapeado en memoria
+        start: Offset del primer registro de datos
+        end: Offset final (tamaño del archivo)
+        chunk_bytes: Tamaño aproximado de cada rango
+
+    Returns:
+        Lista de rangos (inicio, fin) contiguos que cubren [start, end)
+    """
+    ranges = []
+    position = start
+
+    while position < end:
+        boundary = min(position + chunk_bytes, end)
+        quotes = mm[position:boundary].count(b'"')
+
+        while boundary < end:
+            newline = mm.find(b'\n', boundary, end)
+            if newline == -1:
+                boundary = end
+                break
+
+            quotes += mm[boundary:newline].count(b'"')
+            boundary = newline + 1
+
+            if quotes % 2 == 0:
+                break
+
+        ranges.append((position, boundary))
+        position = boundary
+
+    return ranges
+
+
+def parse_range(path: str, start: int, end: int, delimiter: str,
+                fieldnames: Tuple[str, ...]) -> Tuple[List[Tuple], int, int, int,
+                                                   List[Tuple[List[str], str]]]:
+    """
+    Parsea y mapea los registros de un rango de bytes del CSV
+
+    Se ejecuta en los procesos de la importación en paralelo; devuelve los
+    contactos como tuplas (ver COMPACT_FIELDS) para abaratar el envío.
+
+    Args:
+        path: Ruta al CSV
+        start: Offset inicial (inicio de un registro)
+        end: Offset final (fin de un registro)
+        delimiter: Delimitador del CSV
+        fieldnames: Encabezado del CSV
+
+    Returns:
+        Tupla (contactos, filas leídas, filas sin URL, filas con error,
+        filas rechazadas como (fila, motivo))
+    """
+    resolver = get_header_resolver(fieldnames)
+
+    with open(path, 'rb') as raw:
+        with mmap.mmap(raw.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            text = mm[start:end].decode('utf-8')
+
+    contacts = []
+    rejected = []
+    rows = no_url = errors = 0
+
+    for row in csv.reader(io.StringIO(text, newline=''), delimiter=delimiter):
+        if not row:
+            continue
+
+        rows += 1
+
+        try:
+            contact = resolver.map_row(row)
+        except Exception as e:
+            errors += 1
+            rejected.append((row, f"Error: {e}"))
+            continue
+
+        if not contact or not contact.get('linkedin_url'):
+            no_url += 1
+            rejected.append((row, REASON_NO_URL))
+            continue
+
+        contacts.append(tuple(contact.get(field) for field in COMPACT_FIELDS))
+
+    return contacts, rows, no_url, errors, rejected
+
+
+class ByteOffsetLines:
+    """
+    Líneas de un archivo binario decodificadas como UTF-8
+
+    Lleva en offset la posición (en bytes) hasta donde se leyó, que es el
+    final del último registro entregado al csv.reader que las consume.
+    """
+
+    def __init__(self, raw: BinaryIO, offset: int = 0):
+        """
+        Args:
+            raw: Archivo binario posicionado en offset
+            offset: Posición inicial en bytes
+        """
+        self.raw = raw
+        self.offset = offset
+
+    def __iter__(self) -> 'ByteOffsetLines':
+        return self
+
+    def __next__(self) -> str:
+        line = self.raw.readline()
+
+        if not line:
+            raise StopIteration
+
+        self.offset += len(line)
+        return line.decode('utf-8')
+
+    def seek(self, offset: int) -> None:
+        """Mueve la lectura a otra posición del archivo"""
+        self.raw.seek(offset)
+        self.offset = offset
+
+
+class ImportProgress:
+    """
+    Progreso de una importación, avisado como mucho cada PROGRESS_INTERVAL
+
+    El avance se mide en bytes leídos del CSV (en filas para una hoja de
+    Excel); filas/s y ETA se calculan sobre lo procesado desde que empezó
+    (o se reanudó) esta importación.
+    """
+
+    def __init__(self, callback: Callable[[Dict], None], total: int):
+        """
+        Args:
+            callback: Función que recibe el diccionario de progreso
+            total: Tamaño del CSV sin comprimir (o filas de la hoja)
+        """
+        self.callback = callback
+        self.total = total
+        self.started = time.monotonic()
+        self.last_report = 0.0
+        self.start_rows = None
+        self.start_offset = None
+
+    def update(self, stats: Dict, offset: int, force: bool = False) -> None:
+        """
+        Avisa el progreso si pasó PROGRESS_INTERVAL desde el último aviso
+
+        Args:
+            stats: Estadísticas de importación
+            offset: Bytes del CSV (o filas de la hoja) ya procesados
+            force: Avisar aunque no haya pasado el intervalo (p. ej. al terminar)
+        """
+        now = time.monotonic()
+
+        if self.start_rows is None:
+            self.start_rows, self.start_offset = stats['total'], offset
+
+        if not force and now - self.last_report < PROGRESS_INTERVAL:
+            return
+
+        self.last_report = now
+        elapsed = now - self.started
+        rows_per_sec = (stats['total'] - self.start_rows) / elapsed if elapsed else 0.0
+        bytes_per_sec = (offset - self.start_offset) / elapsed if elapsed else 0.0
+        remaining = max(0, self.total - offset)
+
+        progress = {key: stats[key] for key in
+                    ('total', 'imported', 'skipped', 'errors', 'changed', 'unchanged')
+                    if key in stats}
+        progress.update({
+            'fraction': min(1.0, offset / self.total) if self.total else 1.0,
+            'elapsed': elapsed,
+            'rows_per_sec': rows_per_sec,
+            'eta': remaining / bytes_per_sec if bytes_per_sec else None,
+            'done': force and remaining == 0
+        })
+        self.callback(progress)
+
+
+class QuarantineWriter:
+    """
+    Guarda en un CSV las filas rechazadas de una importación, con su motivo
+
+    Las filas se escriben a medida que se rechazan, con un buffer grande
+    para no tocar el disco por fila. El archivo se crea recién con la
+    primera fila, así una importación sin rechazos no deja archivos.
+    """
+
+    def __init__(self, path: str, fieldnames: Sequence[str], offset: Optional[int] = 0):
+        """
+        Args:
+            path: Ruta del CSV de cuarentena
+            fieldnames: Encabezado del archivo importado
+            offset: Al reanudar, tamaño del archivo en el último checkpoint: se
+                    descartan las filas escritas después y se agrega a
+                    continuación. 0 empieza un archivo nuevo; None agrega al
+                    final (checkpoint anterior al guardado de ese tamaño)
+        """
+        self.path = path
+        # Al reimportar una cuarentena su columna de motivo no se duplica
+        self.fieldnames = [name for name in fieldnames if name != QUARANTINE_REASON_COLUMN]
+        self.append = offset != 0 and os.path.exists(path)
+        if self.append and offset is not None:
+            # Las filas de los lotes que no llegaron a confirmarse se vuelven a leer
+            os.truncate(path, offset)
+        self.count = 0
+        self._file = None
+        self._writer = None
+
+    def write(self, row: Sequence[str], reason: str) -> None:
+        """Agrega una fila rechazada con su motivo"""
+        if self._writer is None:
+            self._file = open(self.path, 'a' if self.append else 'w', encoding='utf-8',
+                              newline='', buffering=QUARANTINE_BUFFER_BYTES)
+            self._writer = csv.writer(self._file)
+            if not self.append:
+                self._writer.writerow(self.fieldnames + [QUARANTINE_REASON_COLUMN])
+
+        values = list(row[:len(self.fieldnames)])
+        values.extend([''] * (len(self.fieldnames) - len(values)))
+        self._writer.writerow(values + [reason])
+        self.count += 1
+
+    def checkpoint(self) -> int:
+        """Vacía el buffer y devuelve el tamaño del archivo (se guarda con el checkpoint)"""
+        if self._file:
+            self._file.flush()
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def close(self) -> None:
+        """Vacía el buffer y cierra el archivo (si se llegó a crear)"""
+        if self._file:
+            self._file.close()
+            self._file = None
+            self._writer = None
+
+
+def render_progress(progress: Dict) -> None:
+    """Muestra el progreso de la importación en una sola línea que se va actualizando"""
+    eta = progress['eta']
+    eta_text = f"{int(eta // 60)}:{int(eta % 60):02d}" if eta is not None else '--:--'
+
+    line = (f"\r⏳ {progress['fraction']:6.1%} | {progress['total']:,} filas | "
+            f"{progress['rows_per_sec']:,.0f} filas/s | ETA {eta_text} | "
+            f"nuevos {progress['imported']:,} · omitidos {progress['skipped']:,} · "
+            f"errores {progress['errors']:,}")
+    if 'changed' in progress:
+        line += f" · actualizados {progress['changed']:,}"
+
+    sys.stdout.write(line)
+    if progress['done']:
+        sys.stdout.write('\n')
+    sys.stdout.flush()
+
+
+class LinkedInCSVImporter:
+    """Importa contactos desde el exportador oficial de LinkedIn"""
+
+    def __init__(self, db: ContactDatabase):
+        """
+        Inicializa el importador
+
+        Args:
+            db: Instancia de ContactDatabase
+        """
+        self.db = db
+
+    def import_from_csv(self, csv_file_path: str,
+                       dry_run: bool = False,
+                       collect_contacts: bool = True,
+                       batch_size: int = IMPORT_BATCH_SIZE,
+                       resume: bool = False,
+                       workers: int = 1,
+                       upsert: bool = False,
+                       layout: Optional[Dict] = None,
+                       progress: Optional[Callable[[Dict], None]] = None,
+                       quiet: bool = False,
+                       engine: str = 'rows',
+                       quarantine_path: Optional[str] = None,
+                       sheet: Optional[str] = None) -> Dict[str, int]:
+        """
+        Importa contactos desde un archivo CSV exportado de LinkedIn
+
+        El archivo se procesa en streaming: las filas se leen directamente del
+        archivo y se escriben en lotes, por lo que la memoria no depende del
+        tamaño del CSV. También acepta el ZIP completo de la exportación: el
+        archivo de conexiones se lee desde el ZIP sin extraerlo a disco.
+
+        Cada lote escrito deja un checkpoint en import_runs (offset en bytes y
+        contadores); con resume=True una importación interrumpida del mismo
+        archivo continúa desde el último lote guardado.
+
+        Con workers > 1 un CSV grande (no ZIP) se mapea en memoria, se divide
+        en rangos que terminan en un fin de registro y los rangos se parsean
+        en procesos; este proceso escribe los lotes en orden.
+
+        Con upsert=True (reimportación de una exportación nueva) los contactos
+        existentes cuyos datos de LinkedIn cambiaron se actualizan en lugar de
+        omitirse, y se informan nuevos, cambiados, sin cambios y faltantes.
+
+        Con el layout que devuelve preview_import (encabezado y delimitador ya
+        detectados) la lectura empieza directo en la primera fila de datos.
+
+        No se imprime nada por fila: el avance se informa a progress (o en
+        una línea que se actualiza, ver render_progress) unas pocas veces por
+        segundo, y al final se imprime el resumen. Con quiet=True solo el resumen.
+
+        Con engine='pandas' las filas se leen con pd.read_csv en bloques de
+        PANDAS_CHUNK_ROWS y se mapean por columnas (HeaderResolver.map_frame);
+        cada bloque se escribe en una transacción. Ese motor no guarda
+        checkpoints intermedios (solo el final). Las filas con más campos que
+        el encabezado se leen igual que en el motor 'rows' (sus primeras
+        columnas), así los dos motores dan los mismos totales.
+
+        Una planilla de Excel (XLSX_EXTENSIONS) se lee en streaming con
+        openpyxl en modo solo lectura y pasa por el mismo mapeo y escritura
+        por lotes que un CSV; se reanuda por cantidad de filas procesadas.
+
+        Las filas rechazadas (sin URL o con error al mapearlas) se guardan a
+        medida que aparecen en un CSV de cuarentena con su motivo; una vez
+        corregidas se reprocesan con reimport_quarantine.
+
+        Con dry_run=True la importación es la real (mismo camino, lotes y
+        velocidad) pero dentro de ContactDatabase.rollback_scope, que la
+        deshace al terminar: los contadores de nuevos, omitidos, cambiados y
+        errores son exactos. No deja cuarentena ni checkpoints y no reanuda.
+
+        Args:
+            csv_file_path: Ruta al archivo CSV o al ZIP de la exportación
+            dry_run: Si es True, importa y deshace todo (solo informa qué haría)
+            collect_contacts: Si es False, no acumula los contactos en stats['contacts']
+            batch_size: Cantidad de contactos por transacción de escritura
+            resume: Si es True, reanuda la última importación sin terminar del archivo
+            workers: Procesos para parsear en paralelo (1 = en este proceso)
+            upsert: Si es True, actualiza los contactos existentes que cambiaron
+            layout: Formato detectado por preview_import (se ignora si el
+                    archivo cambió desde la vista previa)
+            progress: Función que recibe el progreso (filas, contadores,
+                      fraction, rows_per_sec, eta); por defecto render_progress
+            quiet: Si es True, no informa el progreso (solo el resumen final)
+            engine: Motor de lectura, 'rows' o 'pandas' (ver IMPORT_ENGINES)
+            quarantine_path: CSV de filas rechazadas (por defecto, junto al
+                             archivo con sufijo QUARANTINE_SUFFIX)
+            sheet: Hoja a importar de una planilla de Excel (por defecto, la activa)
+
+        Returns:
+            Diccionario con estadísticas de importación
+        """
+        if engine not in IMPORT_ENGINES:
+            raise ValueError(f"Motor de importación desconocido: {engine}")
+
+        if not os.path.exists(csv_file_path):
+            logger.error(f"Archivo no encontrado: {csv_file_path}")
+            return {
+                'success': False,
+                'error': 'Archivo no encontrado',
+                'total': 0,
+                'imported': 0,
+                'skipped': 0,
+                'no_url': 0,
+                'errors': 0
+            }
+
+        stats = {
+            'success': True,
+            'total': 0,
+            'imported': 0,
+            'skipped': 0,
+            'no_url': 0,
+            'errors': 0,
+            'contacts': []
+        }
+
+        if upsert:
+            stats.update({'changed': 0, 'unchanged': 0, 'missing': 0})
+
+        options = {
+            'collect_contacts': collect_contacts,
+            'batch_size': batch_size,
+            'resume': resume and not dry_run,
+            'workers': workers,
+            'upsert': upsert,
+            'layout': None,
+            'progress': None,
+            'engine': engine,
+            'quarantine_path': None if dry_run else (
+                quarantine_path or os.path.splitext(csv_file_path)[0] + QUARANTINE_SUFFIX
+            ),
+            'quarantine': None,
+            'sheet': sheet
+        }
+
+        try:
+            source = self._describe_source(csv_file_path)
+
+            if layout and layout['fingerprint'] == source['fingerprint']:
+                options['layout'] = layout
+            elif layout:
+                logger.warning("El archivo cambió desde la vista previa; se detecta el formato de nuevo")
+
+            if not quiet:
+                options['progress'] = ImportProgress(progress or render_progress, source['size'])
+
+            with self.db.rollback_scope() if dry_run else contextlib.nullcontext():
+                if source['member']:
+                    logger.info(f"Leyendo {source['member']} desde {csv_file_path}")
+                    with zipfile.ZipFile(csv_file_path) as archive:
+                        with archive.open(source['member']) as raw:
+                            self._import_stream(raw, source, stats, options)
+                elif csv_file_path.lower().endswith(XLSX_EXTENSIONS):
+                    self._import_workbook(source, stats, options)
+                else:
+                    with open(csv_file_path, 'rb') as raw:
+                        self._import_stream(raw, source, stats, options)
+
+            if dry_run:
+                # La importación registrada también se deshizo
+                stats.pop('run_id', None)
+            else:
+                # Indexar para la búsqueda difusa lo que encoló la importación
+                self.db.refresh_trigram_index()
+
+            self._print_summary(stats, options['upsert'], dry_run)
+            return stats
+
+        except Exception as e:
+            logger.error(f"Error leyendo archivo CSV: {e}")
+            stats['success'] = False
+            stats['error'] = str(e)
+            return stats
+
+    def import_from_source(self, source: Any,
+                           dry_run: bool = False,
+                           collect_contacts: bool = True,
+                           batch_size: int = IMPORT_BATCH_SIZE,
+                           resume: bool = False,
+                           upsert: bool = False,
+                           progress: Optional[Callable[[Dict], None]] = None,
+                           quiet: bool = False,
+                           quarantine_path: Optional[str] = None) -> Dict[str, int]:
+        """
+        Importa los contactos de un adaptador de fuente (vCard, CSV de un CRM)
+
+        El adaptador (ver source_adapters.ContactSource) entrega contactos ya
+        normalizados a medida que lee su archivo; acá se agrupan en lotes y
+        pasan por la misma escritura que import_from_csv: deduplicado por URL
+        de LinkedIn, upsert, checkpoints para reanudar (por cantidad de
+        registros) y cuarentena de los contactos sin URL, con sus campos
+        normalizados, que se puede reimportar con import_from_csv. dry_run
+        se simula como en import_from_csv (importación real que se deshace).
+
+        Args:
+            source: Adaptador de la fuente (iterable de contactos normalizados)
+            dry_run: Si es True, importa y deshace todo (solo informa qué haría)
+            collect_contacts: Si es False, no acumula los contactos en stats['contacts']
+            batch_size: Cantidad de contactos por transacción de escritura
+            resume: Si es True, reanuda la última importación sin terminar de la fuente
+            upsert: Si es True, actualiza los contactos existentes que cambiaron
+            progress: Función que recibe el progreso (ver import_from_csv)
+            quiet: Si es True, no informa el progreso (solo el resumen final)
+            quarantine_path: CSV de contactos rechazados (por defecto, junto al
+                             archivo con sufijo QUARANTINE_SUFFIX)
+
+        Returns:
+            Diccionario con estadísticas de importación (ver import_from_csv)
+        """
+        stats = {
+            'success': True,
+            'total': 0,
+            'imported': 0,
+            'skipped': 0,
+            'no_url': 0,
+            'errors': 0,
+            'contacts': []
+        }
+
+        if upsert:
+            stats.update({'changed': 0, 'unchanged': 0, 'missing': 0})
+
+        options = {
+            'collect_contacts': collect_contacts,
+            'resume': resume and not dry_run,
+            'upsert': upsert
+        }
+
+        tracker = ImportProgress(progress or render_progress, source.size) if not quiet else None
+        quarantine = None
+        run_id, batches = None, 0
+
+        try:
+            described = self._describe_adapter(source)
+
+            with self.db.rollback_scope() if dry_run else contextlib.nullcontext():
+                run_id, batches, quarantine_bytes = self._start_run(described, stats, None,
+                                                                    options)
+                stats['run_id'] = run_id
+
+                if not dry_run:
+                    quarantine = QuarantineWriter(
+                        quarantine_path or os.path.splitext(source.path)[0] + QUARANTINE_SUFFIX,
+                        SOURCE_QUARANTINE_FIELDS, offset=quarantine_bytes
+                    )
+
+                # Al reanudar, saltear los registros ya procesados
+                contacts = itertools.islice(source, stats['total'], None)
+
+                for batch in self._iter_source_batches(contacts, stats, batch_size, quarantine):
+                    self._write_batch(batch, stats, options, run_id)
+                    batches += 1
+
+                    if run_id:
+                        self._save_checkpoint(run_id, stats, source.offset, batches, quarantine)
+
+                    if tracker:
+                        tracker.update(stats, source.offset)
+
+                if tracker:
+                    tracker.update(stats, source.size, force=True)
+
+                if options['upsert'] and run_id:
+                    stats['missing'] = self.db.count_missing_from_import(run_id)
+
+                if run_id:
+                    self._save_checkpoint(run_id, stats, source.offset, batches, quarantine,
+                                          status='completed',
+                                          finished_at=datetime.now().isoformat())
+
+            if dry_run:
+                # La importación registrada también se deshizo
+                stats.pop('run_id', None)
+                run_id = None
+            else:
+                # Indexar para la búsqueda difusa lo que encoló la importación
+                self.db.refresh_trigram_index()
+
+            self._print_summary(stats, options['upsert'], dry_run)
+            return stats
+
+        except KeyboardInterrupt:
+            if run_id and not dry_run:
+                self.db.update_import_run(run_id, status='interrupted')
+            raise
+        except Exception as e:
+            if run_id and not dry_run:
+                self.db.update_import_run(run_id, status='failed')
+            logger.error(f"Error leyendo {source.path}: {e}")
+            stats['success'] = False
+            stats['error'] = str(e)
+            return stats
+        finally:
+            if quarantine:
+                quarantine.close()
+                stats['quarantined'] = quarantine.count
+                if quarantine.count:
+                    stats['quarantine_path'] = quarantine.path
+
+    def _print_summary(self, stats: Dict, upsert: bool, dry_run: bool = False) -> None:
+        """Imprime el resumen final de una importación"""
+        print(f"\n📊 RESUMEN{' (simulación: no se guardó ningún cambio)' if dry_run else ''}:")
+        print(f"   Total de filas: {stats['total']}")
+        if upsert:
+            print(f"   Nuevos: {stats['imported']}")
+            print(f"   Actualizados: {stats['changed']}")
+            print(f"   Sin cambios: {stats['unchanged']}")
+            print(f"   Faltantes (ya no están en la exportación): {stats['missing']}")
+            print(f"   Omitidos: {stats['skipped']}")
+        else:
+            print(f"   Importados: {stats['imported']}")
+            print(f"   Omitidos (ya existían): {stats['skipped']}")
+        if stats.get('no_url'):
+            print(f"   Sin URL de LinkedIn (a la cuarentena): {stats['no_url']}")
+        print(f"   Errores: {stats['errors']}")
+        if stats.get('quarantined'):
+            print(f"   En cuarentena: {stats['quarantined']} filas → {stats['quarantine_path']}")
+
+    def reimport_quarantine(self, quarantine_path: str, upsert: bool = False) -> Dict[str, int]:
+        """
+        Reprocesa solo las filas de una cuarentena, una vez corregidas
+
+        Las filas que se vuelven a rechazar quedan en la misma cuarentena
+        (con su motivo actualizado); si no queda ninguna, el archivo se borra.
+
+        Args:
+            quarantine_path: CSV de cuarentena de una importación anterior
+            upsert: Si es True, actualiza los contactos existentes que cambiaron
+
+        Returns:
+            Diccionario con estadísticas de importación (ver import_from_csv)
+        """
+        pending_path = os.path.splitext(quarantine_path)[0] + '.pendiente.csv'
+        stats = self.import_from_csv(quarantine_path, collect_contacts=False, upsert=upsert,
+                                     quarantine_path=pending_path)
+
+        if not stats.get('success'):
+            return stats
+
+        if os.path.exists(pending_path):
+            os.replace(pending_path, quarantine_path)
+            stats['quarantine_path'] = quarantine_path
+        else:
+            os.remove(quarantine_path)
+
+        return stats
+
+    def find_resumable_run(self, csv_file_path: str, source: Any = None) -> Optional[Dict]:
+        """
+        Busca una importación sin terminar de este archivo
+
+        Args:
+            csv_file_path: Ruta al archivo CSV o ZIP
+            source: Adaptador con que se importa el archivo (ver import_from_source)
+
+        Returns:
+            Checkpoint de la importación (ver ContactDatabase.get_import_run) o None
+        """
+        try:
+            if source is not None:
+                source = self._describe_adapter(source)
+            else:
+                source = self._describe_source(csv_file_path)
+        except Exception as e:
+            logger.error(f"Error leyendo {csv_file_path}: {e}")
+            return None
+
+        return self.db.get_resumable_import_run(source['fingerprint'])
+
+    def find_last_run(self, csv_file_path: str, source: Any = None) -> Optional[Dict]:
+        """
+        Busca la última importación de este contenido, terminada o no
+
+        Args:
+            csv_file_path: Ruta al archivo CSV o ZIP
+            source: Adaptador con que se importa el archivo (ver import_from_source)
+
+        Returns:
+            Importación (ver ContactDatabase.get_import_run) o None si nunca se importó
+        """
+        try:
+            if source is not None:
+                described = self._describe_adapter(source)
+            else:
+                described = self._describe_source(csv_file_path)
+        except Exception as e:
+            logger.error(f"Error leyendo {csv_file_path}: {e}")
+            return None
+
+        return self.db.get_last_import_run(described['fingerprint'])
+
+    def _describe_source(self, csv_file_path: str) -> Dict:
+        """
+        Identifica el CSV a importar y calcula su huella
+
+        Para un CSV la huella usa el tamaño y los primeros y últimos
+        FINGERPRINT_BYTES; dentro de un ZIP, el nombre, CRC y tamaño del miembro.
+
+        Returns:
+            Diccionario con path, member (None si no es ZIP), size y fingerprint
+        """
+        digest = hashlib.sha256()
+
+        # Un .xlsx también es un ZIP, pero se trata como un único archivo
+        if zipfile.is_zipfile(csv_file_path) and not csv_file_path.lower().endswith(XLSX_EXTENSIONS):
+            with zipfile.ZipFile(csv_file_path) as archive:
+                member = self.find_connections_member(archive)
+                if not member:
+                    raise ValueError("El ZIP no contiene un archivo de conexiones (Connections.csv)")
+                info = archive.getinfo(member)
+
+            digest.update(f"{member}|{info.CRC}|{info.file_size}".encode('utf-8'))
+            return {
+                'path': csv_file_path,
+                'member': member,
+                'size': info.file_size,
+                'fingerprint': digest.hexdigest()
+            }
+
+        size = os.path.getsize(csv_file_path)
+        with open(csv_file_path, 'rb') as raw:
+            digest.update(str(size).encode('utf-8'))
+            digest.update(raw.read(FINGERPRINT_BYTES))
+            raw.seek(max(0, size - FINGERPRINT_BYTES))
+            digest.update(raw.read(FINGERPRINT_BYTES))
+
+        return {
+            'path': csv_file_path,
+            'member': None,
+            'size': size,
+            'fingerprint': digest.hexdigest()
+        }
+
+    def _describe_adapter(self, source: Any) -> Dict:
+        """
+        Descripción de la fuente de un adaptador (ver _describe_source)
+
+        La huella combina la del archivo con la configuración del adaptador,
+        así el mismo CSV importado con otro mapeo no reanuda la importación
+        anterior.
+        """
+        described = self._describe_source(source.path)
+        digest = hashlib.sha256(f"{described['fingerprint']}|{source.describe()}".encode('utf-8'))
+        described['fingerprint'] = digest.hexdigest()
+        described['member'] = None
+        return described
+
+    def _import_stream(self, raw: BinaryIO, source: Dict, stats: Dict, options: Dict) -> None:
+        """
+        Importa las filas de un CSV abierto en modo binario
+
+        Args:
+            raw: Archivo abierto (en disco o dentro de un ZIP)
+            source: Descripción del archivo (ver _describe_source)
+            stats: Estadísticas de importación
+            options: Opciones de import_from_csv (collect_contacts, batch_size,
+                     resume, workers, upsert, layout, progress, engine,
+                     quarantine_path)
+        """
+        tracker = options['progress']
+        lines, reader = self._open_reader(raw, options['layout'])
+
+        # Detectar columnas y compilar el mapeo una sola vez
+        if options['layout']:
+            fieldnames = list(options['layout']['fieldnames'])
+        else:
+            fieldnames = next((row for row in reader if row), [])
+        logger.info(f"Columnas detectadas: {fieldnames}")
+        resolver = get_header_resolver(tuple(fieldnames))
 
+        run_id, batches, quarantine_bytes = self._start_run(source, stats, lines, options)
+        stats['run_id'] = run_id
 
-class LinkedInCSVImporter:
-    """Importa contactos desde el exportador oficial de LinkedIn"""
+        # Filas rechazadas a la cuarentena (al reanudar se agregan a la existente)
+        if options['quarantine_path']:
+            options['quarantine'] = QuarantineWriter(options['quarantine_path'], fieldnames,
+                                                     offset=quarantine_bytes)
 
-    def __init__(self, db: ContactDatabase):
+        if tracker:
+            tracker.update(stats, lines.offset)
+
+        parallel = (options['workers'] > 1 and not source['member']
+                    and source['size'] >= PARALLEL_MIN_BYTES and options['engine'] == 'rows')
+
+        try:
+            if options['engine'] == 'pandas':
+                batches = self._import_pandas(raw, resolver, reader.dialect.delimiter,
+                                              stats, options, run_id, batches)
+                lines.seek(source['size'])
+            elif parallel:
+                batches = self._import_parallel(raw, source, stats, lines.offset,
+                                                reader.dialect.delimiter, tuple(fieldnames),
+                                                options, run_id, batches)
+                lines.seek(source['size'])
+            else:
+                for batch in self._iter_batches(reader, resolver, stats, options['batch_size'],
+                                                options['quarantine']):
+                    self._write_batch(batch, stats, options, run_id)
+                    batches += 1
+
+                    if run_id:
+                        self._save_checkpoint(run_id, stats, lines.offset, batches,
+                                              options['quarantine'])
+
+                    if tracker:
+                        tracker.update(stats, lines.offset)
+
+            if tracker:
+                tracker.update(stats, source['size'], force=True)
+
+            if options['upsert'] and run_id:
+                stats['missing'] = self.db.count_missing_from_import(run_id)
+
+            if run_id:
+                self._save_checkpoint(run_id, stats, lines.offset, batches, options['quarantine'],
+                                      status='completed',
+                                      finished_at=datetime.now().isoformat())
+
+        except KeyboardInterrupt:
+            if run_id:
+                self.db.update_import_run(run_id, status='interrupted')
+            raise
+        except Exception:
+            if run_id:
+                self.db.update_import_run(run_id, status='failed')
+            raise
+        finally:
+            if options['quarantine']:
+                options['quarantine'].close()
+                stats['quarantined'] = options['quarantine'].count
+                if options['quarantine'].count:
+                    stats['quarantine_path'] = options['quarantine'].path
+
+    def _open_workbook_rows(self, path: str,
+                            sheet: Optional[str] = None) -> Tuple[Any, List[str], Iterator[List[str]], int]:
         """
-        Inicializa el importador
+        Abre una planilla en modo solo lectura y ubica su encabezado
+
+        El encabezado se busca como en un CSV (primera fila con "First Name"
+        o "Last Name" entre las primeras HEADER_SCAN_LINES, o la primera con
+        datos); las filas vacías se descartan.
 
         Args:
-            db: Instancia de ContactDatabase
+            path: Ruta al .xlsx
+            sheet: Nombre de la hoja (por defecto, la activa)
+
+        Returns:
+            Tupla (workbook, que hay que cerrar; encabezado; filas de datos
+            como texto; filas de la hoja según su dimensión, 0 si no la declara)
         """
-        self.db = db
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        worksheet = workbook[sheet] if sheet else workbook.active
 
-    def import_from_csv(self, csv_file_path: str,
-                       dry_run: bool = False) -> Dict[str, int]:
+        rows = ([cell_text(value) for value in row]
+                for row in worksheet.iter_rows(values_only=True))
+        rows = (row for row in rows if any(value.strip() for value in row))
+
+        prefix = list(itertools.islice(rows, HEADER_SCAN_LINES))
+        header_index = next((i for i, row in enumerate(prefix)
+                             if any(name in value for value in row
+                                    for name in ('First Name', 'LastName', 'Last Name'))), 0)
+        fieldnames = prefix[header_index] if prefix else []
+
+        # Quitar columnas vacías al final del encabezado
+        while fieldnames and not fieldnames[-1].strip():
+            fieldnames = fieldnames[:-1]
+
+        data = itertools.chain(prefix[header_index + 1:], rows)
+        return workbook, fieldnames, data, worksheet.max_row or 0
+
+    def _import_workbook(self, source: Dict, stats: Dict, options: Dict) -> None:
         """
-        Importa contactos desde un archivo CSV exportado de LinkedIn
+        Importa una planilla de Excel fila por fila sin cargarla en memoria
+
+        Usa el mismo mapeo compilado, cuarentena, checkpoints y escritura por
+        lotes que un CSV (ver _import_stream).
 
         Args:
-            csv_file_path: Ruta al archivo CSV
-            dry_run: Si es True, solo muestra qué haría sin importar
+            source: Descripción del archivo (ver _describe_source)
+            stats: Estadísticas de importación
+            options: Opciones de import_from_csv
+        """
+        tracker = options['progress']
+        workbook, fieldnames, data, sheet_rows = self._open_workbook_rows(source['path'],
+                                                                          options['sheet'])
+
+        run_id, batches = None, 0
+
+        try:
+            logger.info(f"Columnas detectadas: {fieldnames}")
+            resolver = get_header_resolver(tuple(fieldnames))
+
+            run_id, batches, quarantine_bytes = self._start_run(source, stats, None, options)
+            stats['run_id'] = run_id
+            if options['quarantine_path']:
+                options['quarantine'] = QuarantineWriter(options['quarantine_path'], fieldnames,
+                                                         offset=quarantine_bytes)
+
+            # Al reanudar, saltear las filas ya procesadas
+            data = itertools.islice(data, stats['total'], None)
+
+            if tracker:
+                tracker.total = sheet_rows
+                tracker.update(stats, stats['total'])
+
+            for batch in self._iter_batches(data, resolver, stats, options['batch_size'],
+                                            options['quarantine']):
+                self._write_batch(batch, stats, options, run_id)
+                batches += 1
+
+                if run_id:
+                    self._save_checkpoint(run_id, stats, 0, batches, options['quarantine'])
+
+                if tracker:
+                    tracker.update(stats, stats['total'])
+
+            if tracker:
+                tracker.total = stats['total']
+                tracker.update(stats, stats['total'], force=True)
+
+            if options['upsert'] and run_id:
+                stats['missing'] = self.db.count_missing_from_import(run_id)
+
+            if run_id:
+                self._save_checkpoint(run_id, stats, 0, batches, options['quarantine'],
+                                      status='completed',
+                                      finished_at=datetime.now().isoformat())
+
+        except KeyboardInterrupt:
+            if run_id:
+                self.db.update_import_run(run_id, status='interrupted')
+            raise
+        except Exception:
+            if run_id:
+                self.db.update_import_run(run_id, status='failed')
+            raise
+        finally:
+            workbook.close()
+            if options['quarantine']:
+                options['quarantine'].close()
+                stats['quarantined'] = options['quarantine'].count
+                if options['quarantine'].count:
+                    stats['quarantine_path'] = options['quarantine'].path
+
+    def _import_parallel(self, raw: BinaryIO, source: Dict, stats: Dict, start: int,
+                         delimiter: str, fieldnames: Tuple[str, ...], options: Dict,
+                         run_id: Optional[int], batches: int) -> int:
+        """
+        Parsea rangos del CSV en procesos y escribe sus contactos en orden
+
+        Solo hay workers * 2 rangos en vuelo, así la memoria no depende del
+        tamaño del archivo. El checkpoint se guarda al terminar cada rango.
+
+        Args:
+            raw: CSV abierto en modo binario
+            start: Offset del primer registro a importar
+            (resto: ver _import_stream)
+
+        Returns:
+            Lotes confirmados en total
+        """
+        workers = options['workers']
+        batch_size = options['batch_size']
+
+        with mmap.mmap(raw.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            ranges = split_ranges(mm, start, len(mm))
+
+        logger.info(f"Importación en paralelo: {len(ranges)} rangos, {workers} procesos")
+        pending_ranges = iter(ranges)
+        in_flight = deque()
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            def submit_next() -> None:
+                byte_range = next(pending_ranges, None)
+                if byte_range:
+                    in_flight.append((byte_range, executor.submit(
+                        parse_range, source['path'], *byte_range, delimiter, fieldnames
+                    )))
+
+            for _ in range(workers * 2):
+                submit_next()
+
+            while in_flight:
+                (_, range_end), future = in_flight.popleft()
+                submit_next()
+
+                contacts, rows, no_url, errors, rejected = future.result()
+                stats['total'] += rows
+                stats['no_url'] += no_url
+                stats['errors'] += errors
+
+                if options['quarantine']:
+                    for row, reason in rejected:
+                        options['quarantine'].write(row, reason)
+
+                for i in range(0, len(contacts), batch_size):
+                    batch = [dict(zip(COMPACT_FIELDS, values))
+                             for values in contacts[i:i + batch_size]]
+                    self._write_batch(batch, stats, options, run_id)
+                    batches += 1
+
+                if run_id:
+                    self._save_checkpoint(run_id, stats, range_end, batches, options['quarantine'])
+
+                if options['progress']:
+                    options['progress'].update(stats, range_end)
+
+        return batches
+
+    def _import_pandas(self, raw: BinaryIO, resolver: HeaderResolver, delimiter: str,
+                       stats: Dict, options: Dict, run_id: Optional[int], batches: int) -> int:
+        """
+        Lee el CSV con pandas en bloques y escribe cada bloque mapeado por columnas
+
+        Args:
+            raw: CSV abierto en modo binario, posicionado en la primera fila de datos
+            resolver: Mapeo compilado del encabezado
+            delimiter: Delimitador del CSV
+            (resto: ver _import_stream)
+
+        Returns:
+            Lotes confirmados en total
+        """
+        columns = list(range(len(resolver.fieldnames)))
+
+        try:
+            # Con usecols una fila con más campos que el encabezado no se
+            # descarta: se leen sus primeras columnas, como en el motor 'rows'
+            chunks = pd.read_csv(
+                raw, sep=delimiter, header=None, names=columns, usecols=columns,
+                dtype=str, keep_default_na=False, na_filter=False,
+                encoding='utf-8', chunksize=PANDAS_CHUNK_ROWS
+            )
+        except pd.errors.EmptyDataError:
+            return batches
+
+        with chunks:
+            for frame in chunks:
+                stats['total'] += len(frame)
+                mapped = resolver.map_frame(frame)
+                contacts = [contact for contact in mapped if contact]
+                stats['no_url'] += len(frame) - len(contacts)
+
+                if options['quarantine'] and len(contacts) < len(frame):
+                    for row, contact in zip(frame.itertuples(index=False), mapped):
+                        if not contact:
+                            options['quarantine'].write(row, REASON_NO_URL)
+
+                if contacts:
+                    self._write_batch(contacts, stats, options, run_id)
+                    batches += 1
+
+                if options['progress']:
+                    options['progress'].update(stats, raw.tell())
+
+        return batches
+
+    def _start_run(self, source: Dict, stats: Dict, lines: Optional[ByteOffsetLines],
+                   options: Dict) -> Tuple[Optional[int], int, Optional[int]]:
+        """
+        Registra la importación o, si se reanuda, restaura su checkpoint
+
+        Sin lines (planilla de Excel) el punto de reanudación es la cantidad
+        de filas procesadas, stats['total'], y quien llama saltea esas filas.
+        Al reanudar, el modo guardado (upsert y motor) reemplaza al de
+        options: la importación sigue como empezó.
+
+        Returns:
+            Tupla (ID de la importación o None si no se pudo registrar,
+            lotes ya confirmados, tamaño de la cuarentena en el checkpoint;
+            ver QuarantineWriter)
+        """
+        run = self.db.get_resumable_import_run(source['fingerprint']) if options['resume'] else None
+
+        if run and (run['byte_offset'] > lines.offset if lines else run['rows_processed'] > 0):
+            if lines:
+                lines.seek(run['byte_offset'])
+            options['upsert'] = bool(run['upsert'])
+            if run['engine'] and 'engine' in options:
+                options['engine'] = run['engine']
+            if options['upsert']:
+                for key in ('changed', 'unchanged', 'missing'):
+                    stats.setdefault(key, 0)
+            else:
+                for key in ('changed', 'unchanged', 'missing'):
+                    stats.pop(key, None)
+            stats['total'] = run['rows_processed']
+            stats['imported'] = run['imported']
+            stats['skipped'] = run['skipped']
+            stats['no_url'] = run['no_url']
+            stats['errors'] = run['errors']
+            for key in ('changed', 'unchanged'):
+                if key in stats:
+                    stats[key] = run[key]
+            self.db.update_import_run(run['id'], status='running')
+            print(f"⏩ Reanudando importación #{run['id']} desde la fila {run['rows_processed'] + 1}")
+            return run['id'], run['batches_committed'], run['quarantine_bytes']
+
+        source_name = source['path'] + (f"!{source['member']}" if source['member'] else '')
+        return self.db.start_import_run(source_name, source['fingerprint'], source['size'],
+                                        options['upsert'], options.get('engine')), 0, 0
+
+    def _save_checkpoint(self, run_id: int, stats: Dict, byte_offset: int, batches: int,
+                         quarantine: Optional[QuarantineWriter] = None, **kwargs) -> None:
+        """Guarda offset, contadores y tamaño de la cuarentena después de un lote confirmado"""
+        self.db.update_import_run(
+            run_id,
+            byte_offset=byte_offset,
+            batches_committed=batches,
+            rows_processed=stats['total'],
+            imported=stats['imported'],
+            skipped=stats['skipped'],
+            no_url=stats['no_url'],
+            errors=stats['errors'],
+            changed=stats.get('changed', 0),
+            unchanged=stats.get('unchanged', 0),
+            quarantine_bytes=quarantine.checkpoint() if quarantine else 0,
+            **kwargs
+        )
+
+    def find_connections_member(self, archive: zipfile.ZipFile) -> Optional[str]:
+        """
+        Busca el archivo de conexiones dentro del ZIP de LinkedIn
+
+        Args:
+            archive: ZIP abierto
+
+        Returns:
+            Nombre del miembro o None si no está
+        """
+        members = self._archive_members(archive)
+
+        for candidate in CONNECTIONS_MEMBER_NAMES:
+            if candidate in members:
+                return members[candidate]
+
+        return None
+
+    def is_connections_export(self, path: str) -> bool:
+        """
+        Indica si un archivo es la exportación de conexiones de LinkedIn
+
+        Solo se lee el encabezado, que tiene que traer todas las columnas de
+        CONNECTIONS_COLUMNS. Un CSV de otro CRM necesita su mapeo de columnas
+        (ver source_adapters.MappedCSVSource).
+
+        Args:
+            path: CSV, ZIP de LinkedIn o planilla de Excel
+
+        Returns:
+            True si el encabezado es el de las conexiones de LinkedIn
+        """
+        try:
+            if path.lower().endswith(XLSX_EXTENSIONS):
+                workbook, fieldnames, _, _ = self._open_workbook_rows(path)
+                workbook.close()
+            else:
+                source = self._describe_source(path)
+
+                with contextlib.ExitStack() as stack:
+                    if source['member']:
+                        archive = stack.enter_context(zipfile.ZipFile(path))
+                        raw = stack.enter_context(archive.open(source['member']))
+                    else:
+                        raw = stack.enter_context(open(path, 'rb'))
+
+                    _, reader = self._open_reader(raw)
+                    fieldnames = next((row for row in reader if row), [])
+
+        except Exception as e:
+            logger.error(f"Error leyendo el encabezado de {path}: {e}")
+            return False
+
+        fieldnames = {name.strip() for name in fieldnames}
+        return all(column in fieldnames for column in CONNECTIONS_COLUMNS)
+
+    def _archive_members(self, archive: zipfile.ZipFile) -> Dict[str, str]:
+        """Nombre de archivo en minúsculas -> ruta del miembro dentro del ZIP"""
+        return {
+            os.path.basename(name).lower(): name
+            for name in archive.namelist()
+            if not name.endswith('/')
+        }
+
+    def _open_member(self, archive: zipfile.ZipFile, member: str) -> TextIO:
+        """Abre un miembro del ZIP como texto, descomprimiendo en streaming"""
+        return io.TextIOWrapper(archive.open(member), encoding='utf-8-sig', newline='')
+
+    def process_archive_members(self, zip_path: str,
+                                handlers: Dict[str, Callable[[TextIO], Any]],
+                                max_workers: int = ARCHIVE_WORKERS) -> Dict[str, Any]:
+        """
+        Procesa en paralelo varios archivos del ZIP de LinkedIn sin extraerlos
+
+        Cada handler recibe el miembro abierto como texto; cada hilo abre su
+        propio ZipFile, así las lecturas no comparten el puntero del archivo.
+
+        Args:
+            zip_path: Ruta al ZIP de la exportación
+            handlers: Nombre de archivo (ej. 'messages.csv') -> función a aplicar
+            max_workers: Máximo de hilos
+
+        Returns:
+            Diccionario nombre de archivo -> resultado del handler
+            (None si el archivo no está en el ZIP o falló)
+        """
+        with zipfile.ZipFile(zip_path) as archive:
+            members = self._archive_members(archive)
+
+        def run(member: str, handler: Callable[[TextIO], Any]) -> Any:
+            with zipfile.ZipFile(zip_path) as archive:
+                with self._open_member(archive, member) as f:
+                    return handler(f)
+
+        results = {name: None for name in handlers}
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {}
+            for name, handler in handlers.items():
+                member = members.get(name.lower())
+                if member:
+                    futures[name] = executor.submit(run, member, handler)
+                else:
+                    logger.warning(f"{name} no está en {zip_path}")
+
+            for name, future in futures.items():
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    logger.error(f"Error procesando {name} del ZIP: {e}")
+
+        return results
+
+    def _open_reader(self, raw: BinaryIO,
+                     layout: Optional[Dict] = None) -> Tuple[ByteOffsetLines, Iterator[List[str]]]:
+        """
+        Detecta encabezado y delimitador leyendo solo el inicio del archivo
+
+        Los exportes de LinkedIn traen unas líneas de notas antes del
+        encabezado real; se buscan en las primeras HEADER_SCAN_LINES líneas
+        y el resto del archivo se sigue leyendo en streaming.
+
+        Args:
+            raw: Archivo abierto en modo binario, al inicio
+            layout: Formato ya detectado por preview_import; si se pasa no se
+                    analiza el inicio y el reader empieza en la primera fila de datos
+
+        Returns:
+            Tupla (líneas con su offset, reader de csv posicionado en la
+            línea de encabezado, o en la primera fila de datos si hay layout)
+        """
+        lines = ByteOffsetLines(raw)
+
+        if layout:
+            lines.seek(layout['data_offset'])
+            return lines, csv.reader(lines, delimiter=layout['delimiter'])
+
+        prefix = []
+        for line in itertools.islice(lines, HEADER_SCAN_LINES):
+            prefix.append((lines.offset - len(line.encode('utf-8')), line))
+
+        # Quitar el BOM de UTF-8 si lo hay
+        if prefix and prefix[0][1].startswith('\ufeff'):
+            prefix[0] = (len('\ufeff'.encode('utf-8')), prefix[0][1][1:])
+
+        # Encontrar dónde empiezan los datos reales (línea que contiene "First Name")
+        data_start_line = 0
+        for i, (_, line) in enumerate(prefix):
+            if 'First Name' in line or 'LastName' in line or 'Last Name' in line:
+                data_start_line = i
+                break
+
+        logger.info(f"Datos reales encontrados en línea {data_start_line + 1}")
+
+        # Intentar diferentes dialectos sobre el encabezado y algunas filas
+        sample_lines = [line for _, line in prefix[data_start_line:data_start_line + 5]]
+        dialect = ','
+        for delimiter in [',', ';', '\t']:
+            try:
+                reader = csv.DictReader(sample_lines, delimiter=delimiter)
+                if len(reader.fieldnames or []) > 1:
+                    dialect = delimiter
+                    break
+            except csv.Error:
+                continue
+
+        # Volver al encabezado y leer desde ahí en streaming
+        lines.seek(prefix[data_start_line][0] if prefix else 0)
+        return lines, csv.reader(lines, delimiter=dialect)
+
+    def _iter_batches(self, reader: Iterable[List[str]], resolver: 'HeaderResolver',
+                      stats: Dict, batch_size: int,
+                      quarantine: Optional[QuarantineWriter] = None) -> Iterator[List[Dict]]:
+        """
+        Mapea las filas del reader y las agrupa en lotes
+
+        Args:
+            reader: Filas del CSV (listas de valores)
+            resolver: Mapeo compilado del encabezado
+            stats: Estadísticas de importación (se actualizan total/omitidos/errores)
+            batch_size: Tamaño de cada lote
+            quarantine: Destino de las filas rechazadas (sin URL o con error)
+
+        Yields:
+            Listas de contactos mapeados
+        """
+        batch = []
+
+        for row in reader:
+            if not row:
+                continue
+
+            stats['total'] += 1
+
+            try:
+                # Mapear campos del CSV a nuestros campos
+                contact = resolver.map_row(row)
+            except Exception as e:
+                stats['errors'] += 1
+                logger.error(f"Error procesando fila {stats['total']}: {e}")
+                if quarantine:
+                    quarantine.write(row, f"Error: {e}")
+                continue
+
+            if not contact or not contact.get('linkedin_url'):
+                stats['no_url'] += 1
+                if quarantine:
+                    quarantine.write(row, REASON_NO_URL)
+                else:
+                    logger.warning(f"Fila {stats['total']}: URL de LinkedIn no encontrada")
+                continue
+
+            batch.append(contact)
+
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+
+    def _iter_source_batches(self, contacts: Iterable[Dict], stats: Dict, batch_size: int,
+                             quarantine: Optional[QuarantineWriter] = None) -> Iterator[List[Dict]]:
+        """
+        Agrupa en lotes los contactos normalizados de un adaptador
+
+        Como _iter_batches, pero los contactos ya vienen mapeados; los que no
+        tienen URL de LinkedIn se omiten (y van a la cuarentena con sus campos).
+        """
+        batch = []
+
+        for contact in contacts:
+            stats['total'] += 1
+
+            if not contact.get('linkedin_url'):
+                stats['no_url'] += 1
+                if quarantine:
+                    quarantine.write([contact.get(field) or '' for field in SOURCE_QUARANTINE_FIELDS],
+                                     REASON_NO_URL)
+                else:
+                    logger.warning(f"Registro {stats['total']}: URL de LinkedIn no encontrada")
+                continue
+
+            batch.append(contact)
+
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+
+    def _write_batch(self, batch: List[Dict], stats: Dict, options: Dict,
+                     run_id: Optional[int] = None) -> None:
+        """
+        Escribe un lote de contactos y actualiza las estadísticas
+
+        Args:
+            batch: Contactos mapeados
+            stats: Estadísticas de importación
+            options: Opciones de la importación (collect_contacts, upsert)
+            run_id: ID de la importación (el modo upsert marca los contactos vistos)
+        """
+        if options['upsert']:
+            self._upsert_batch(batch, stats, options, run_id)
+            return
+
+        results = self.db.add_contacts_batch(batch)
+
+        if results is None:
+            stats['errors'] += len(batch)
+            logger.error(f"Error importando lote de {len(batch)} contactos")
+            return
+
+        for contact, contact_id in zip(batch, results):
+            if contact_id is None:
+                stats['skipped'] += 1
+            elif contact_id:
+                stats['imported'] += 1
+                if options['collect_contacts']:
+                    stats['contacts'].append(contact)
+            else:
+                stats['errors'] += 1
+                logger.error(f"Error importando: {contact.get('name', 'N/A')}")
+
+    def _upsert_batch(self, batch: List[Dict], stats: Dict, options: Dict,
+                      run_id: Optional[int]) -> None:
+        """Escribe un lote en modo upsert (nuevos y cambiados) y actualiza las estadísticas"""
+        results = self.db.upsert_contacts_batch(batch, run_id)
+
+        if results is None:
+            stats['errors'] += len(batch)
+            logger.error(f"Error importando lote de {len(batch)} contactos")
+            return
+
+        for contact, outcome in zip(batch, results):
+            if outcome == 'added':
+                stats['imported'] += 1
+                if options['collect_contacts']:
+                    stats['contacts'].append(contact)
+            elif outcome == 'changed':
+                stats['changed'] += 1
+            elif outcome == 'unchanged':
+                stats['unchanged'] += 1
+            elif outcome == 'duplicate':
+                stats['skipped'] += 1
+            else:
+                stats['errors'] += 1
+                logger.error(f"Error importando: {contact.get('name', 'N/A')}")
+
+    # ===== ACTIVIDAD: MENSAJES E INVITACIONES =====
+
+    def import_messages(self, source: Any, batch_size: int = IMPORT_BATCH_SIZE) -> Dict[str, int]:
+        """
+        Importa messages.csv de la exportación de LinkedIn como interacciones
+
+        Cada mensaje se registra en el contacto que lo envió (outcome
+        'received') o en cada destinatario que sea contacto (outcome 'sent'),
+        con la fecha original del mensaje.
+
+        Args:
+            source: Ruta al CSV o archivo de texto ya abierto (p. ej. desde el ZIP)
+            batch_size: Filas por transacción de escritura
 
         Returns:
             Diccionario con estadísticas de importación
         """
-        if not os.path.exists(csv_file_path):
-            logger.error(f"Archivo no encontrado: {csv_file_path}")
-            return {
-                'success': False,
-                'error': 'Archivo no encontrado',
-                'total': 0,
-                'imported': 0,
-                'skipped': 0,
-                'errors': 0
-            }
+        def records(row: Dict[str, str], created_at: str) -> List[Dict]:
+            content = row['content'] or row['subject']
+            sender = row['sender_url']
+            recipients = [url for url in re.split(r'[,\s]+', row['recipient_urls']) if url]
+
+            counterparts = [(sender, 'received')] if sender else []
+            counterparts.extend((url, 'sent') for url in recipients)
+
+            return [{
+                'linkedin_urls': profile_url_variants(url),
+                'interaction_type': 'message',
+                'outcome': outcome,
+                'message': content,
+                'created_at': created_at,
+                'source_ref': activity_ref('msg', row['conversation_id'], row['date'],
+                                           sender, url, content)
+            } for url, outcome in counterparts]
+
+        return self._import_activity(source, 'messages.csv', MESSAGE_COLUMNS, 'date',
+                                     records, batch_size)
+
+    def import_invitations(self, source: Any, batch_size: int = IMPORT_BATCH_SIZE) -> Dict[str, int]:
+        """
+        Importa Invitations.csv de la exportación de LinkedIn como interacciones
 
+        Las invitaciones enviadas quedan como connection_request 'sent' en el
+        invitado y las recibidas como 'received' en quien invitó.
+
+        Args:
+            source: Ruta al CSV o archivo de texto ya abierto (p. ej. desde el ZIP)
+            batch_size: Filas por transacción de escritura
+
+        Returns:
+            Diccionario con estadísticas de importación
+        """
+        def records(row: Dict[str, str], created_at: str) -> List[Dict]:
+            direction = row['direction'].upper()
+            counterparts = []
+            if direction != 'INCOMING' and row['invitee_url']:
+                counterparts.append((row['invitee_url'], 'sent'))
+            if direction != 'OUTGOING' and row['inviter_url']:
+                counterparts.append((row['inviter_url'], 'received'))
+
+            return [{
+                'linkedin_urls': profile_url_variants(url),
+                'interaction_type': 'connection_request',
+                'outcome': outcome,
+                'message': row['message'] or None,
+                'created_at': created_at,
+                'source_ref': activity_ref('inv', row['inviter_url'], row['invitee_url'],
+                                           row['sent_at'])
+            } for url, outcome in counterparts]
+
+        return self._import_activity(source, 'Invitations.csv', INVITATION_COLUMNS, 'sent_at',
+                                     records, batch_size)
+
+    def import_archive_activity(self, zip_path: str) -> Dict[str, Optional[Dict[str, int]]]:
+        """
+        Importa mensajes e invitaciones directamente desde el ZIP de LinkedIn
+
+        Args:
+            zip_path: Ruta al ZIP de la exportación
+
+        Returns:
+            Diccionario nombre de archivo -> estadísticas (None si no está en el ZIP)
+        """
+        return self.process_archive_members(zip_path, {
+            'messages.csv': self.import_messages,
+            'Invitations.csv': self.import_invitations,
+        })
+
+    def _import_activity(self, source: Any, label: str, columns: Dict[str, str],
+                         date_field: str,
+                         build_records: Callable[[Dict[str, str], str], List[Dict]],
+                         batch_size: int) -> Dict[str, int]:
+        """
+        Lee en streaming un archivo de actividad y registra sus interacciones en lotes
+
+        Al terminar recalcula en bloque last_contact_date y follow_up_count de
+        los contactos que recibieron interacciones nuevas.
+
+        Args:
+            source: Ruta al CSV o archivo de texto ya abierto
+            label: Nombre del archivo, para mensajes y logs
+            columns: Campo -> nombre de columna (ver MESSAGE_COLUMNS)
+            date_field: Campo con la fecha de la interacción
+            build_records: Fila -> interacciones (una por contacto candidato)
+            batch_size: Filas por transacción de escritura
+
+        Returns:
+            Diccionario con total, importados, omitidos (ya importados),
+            sin contacto y errores
+        """
         stats = {
             'success': True,
             'total': 0,
             'imported': 0,
             'skipped': 0,
-            'errors': 0,
-            'contacts': []
+            'unmatched': 0,
+            'errors': 0
         }
+        touched = set()
 
-        try:
-            with open(csv_file_path, 'r', encoding='utf-8-sig') as f:
-                # Detectar el formato del CSV
-                sample = f.read(1024)
-                f.seek(0)
-
-                # Intentar diferentes dialectos
-                dialect = None
-                for delimiter in [',', ';', '\t']:
-                    try:
-                        sample_lines = sample.split('\n')[:5]
-                        reader = csv.DictReader(sample_lines, delimiter=delimiter)
-                        if len(list(reader)) > 0:
-                            dialect = delimiter
-                            break
-                    except:
-                        continue
+        def flush(batch: List[List[Dict]]) -> None:
+            interactions = [record for records in batch for record in records]
+            results = self.db.add_interactions_batch(interactions)
 
-                if not dialect:
-                    dialect = ','
+            if results is None:
+                stats['errors'] += len(batch)
+                return
 
-                # Leer archivo completo para procesar líneas de notes
-                lines = f.readlines()
+            position = 0
+            for records in batch:
+                row_results = results[position:position + len(records)]
+                position += len(records)
 
-                # Encontrar dónde empiezan los datos reales (línea que contiene "First Name")
-                data_start_line = 0
-                for i, line in enumerate(lines):
-                    if 'First Name' in line or 'LastName' in line or 'Last Name' in line:
-                        data_start_line = i
-                        break
+                added = [contact_id for contact_id in row_results if contact_id]
+                stats['imported'] += len(added)
+                touched.update(added)
 
-                logger.info(f"Datos reales encontrados en línea {data_start_line + 1}")
+                if not added:
+                    if None in row_results:
+                        stats['skipped'] += 1
+                    else:
+                        stats['unmatched'] += 1
 
-                # Crear reader solo desde los datos reales
-                csv_data = ''.join(lines[data_start_line:])
-                reader = csv.DictReader(csv_data.splitlines(), delimiter=dialect)
+        try:
+            if isinstance(source, str):
+                f = open(source, encoding='utf-8-sig', newline='')
+            else:
+                f = source
+
+            try:
+                reader = csv.reader(f)
+                positions = None
+                for row in itertools.islice(reader, HEADER_SCAN_LINES):
+                    lowered = [value.strip().lower() for value in row]
+                    if all(column in lowered for column in columns.values()):
+                        positions = {field: lowered.index(column) for field, column in columns.items()}
+                        break
 
-                # Detectar columnas
-                fieldnames = reader.fieldnames or []
-                logger.info(f"Columnas detectadas: {fieldnames}")
+                if positions is None:
+                    raise ValueError(f"{label} no tiene el encabezado esperado")
 
+                batch = []
                 for row in reader:
+                    if not row:
+                        continue
+
                     stats['total'] += 1
+                    values = {field: row[i].strip() if i < len(row) else ''
+                              for field, i in positions.items()}
+                    created_at = parse_linkedin_date(values[date_field])
+                    records = build_records(values, created_at) if created_at else []
 
-                    try:
-                        # Mapear campos del CSV a nuestros campos
-                        contact = self._map_csv_fields(row, fieldnames)
-
-                        if not contact or not contact.get('linkedin_url'):
-                            stats['skipped'] += 1
-                            logger.warning(f"Fila {stats['total']}: URL de LinkedIn no encontrada")
-                            continue
-
-                        if dry_run:
-                            stats['contacts'].append(contact)
-                            stats['imported'] += 1
-                            print(f"✅ Se importaría: {contact.get('name', 'N/A')}")
-                        else:
-                            # Verificar si ya existe
-                            existing = self.db.get_contact_by_url(contact['linkedin_url'])
-
-                            if existing:
-                                stats['skipped'] += 1
-                                logger.info(f"Contacto ya existe: {contact.get('name', 'N/A')}")
-                            else:
-                                # Importar contacto
-                                contact_id = self.db.add_contact(contact)
-
-                                if contact_id:
-                                    stats['imported'] += 1
-                                    stats['contacts'].append(contact)
-                                    print(f"✅ Importado: {contact.get('name', 'N/A')}")
-                                else:
-                                    stats['errors'] += 1
-                                    print(f"❌ Error importando: {contact.get('name', 'N/A')}")
-
-                    except Exception as e:
+                    if not records:
                         stats['errors'] += 1
-                        logger.error(f"Error procesando fila {stats['total']}: {e}")
+                        logger.warning(f"{label}, fila {stats['total']}: sin fecha o sin perfil")
                         continue
 
-            print(f"\n📊 RESUMEN:")
-            print(f"   Total de filas: {stats['total']}")
-            print(f"   Importados: {stats['imported']}")
-            print(f"   Omitidos (ya existían): {stats['skipped']}")
-            print(f"   Errores: {stats['errors']}")
+                    batch.append(records)
+                    if len(batch) >= batch_size:
+                        flush(batch)
+                        batch = []
+
+                if batch:
+                    flush(batch)
+
+            finally:
+                if isinstance(source, str):
+                    f.close()
+
+            self.db.refresh_contact_activity(sorted(touched))
+
+            print(f"\n📊 {label}: {stats['total']} filas | "
+                  f"{stats['imported']} interacciones nuevas | "
+                  f"{stats['skipped']} ya importadas | "
+                  f"{stats['unmatched']} sin contacto | {stats['errors']} errores")
 
             return stats
 
         except Exception as e:
-            logger.error(f"Error leyendo archivo CSV: {e}")
+            logger.error(f"Error importando {label}: {e}")
             stats['success'] = False
             stats['error'] = str(e)
             return stats
 
-    def _map_csv_fields(self, row: Dict, fieldnames: List[str]) -> Optional[Dict]:
+    def preview_import(self, csv_file_path: str, max_contacts: int = 10) -> Dict:
         """
-        Mapea los campos del CSV de LinkedIn a nuestro formato
+        Lee solo el inicio del archivo para mostrar qué se importaría
+
+        El costo no depende del tamaño del archivo: se mapean las primeras
+        filas (hasta max_contacts contactos o PREVIEW_MAX_ROWS filas) y el
+        total se estima por el tamaño en bytes. El formato detectado
+        (layout) se puede pasar a import_from_csv para no volver a detectarlo.
 
         Args:
-            row: Fila del CSV
-            fieldnames: Nombres de columnas
+            csv_file_path: Ruta al archivo CSV o ZIP
+            max_contacts: Contactos a leer para mostrar
 
         Returns:
-            Diccionario con el contacto mapeado o None
+            Diccionario con success, contacts, rows_read, estimated_rows
+            (exacto si exact es True) y layout
         """
-        contact = {}
-
-        # Buscar campos en diferentes idiomas/formatos
-        field_mapping = {
-            # URL de LinkedIn (varios formatos posibles)
-            'linkedin_url': [
-                'URL',
-                'LinkedIn URL',
-                'LinkedIn',
-                'Url',
-                'Profile URL',
-                'Profile Url',
-                'Enlace',
-                'Link',
-                'url'
-            ],
-            # Nombre
-            'name': [
-                'First Name',
-                'FirstName',
-                'Nombre',
-                'GivenName',
-                'First'
-            ],
-            # Apellido
-            'last_name': [
-                'Last Name',
-                'LastName',
-                'Apellido',
-                'FamilyName',
-                'Surname',
-                'Last'
-            ],
-            # Email
-            'email': [
-                'Email Address',
-                'Email',
-                'E-mail',
-                'Correo',
-                'Mail'
-            ],
-            # Empresa
-            'company': [
-                'Company',
-                'Empresa',
-                'Position Company',
-                'Organization'
-            ],
-            # Cargo
-            'job_title': [
-                'Position',
-                'Job Title',
-                'Title',
-                'Cargo',
-                'Role',
-                'Puesto'
-            ],
-            # Ubicación
-            'location': [
-                'Location',
-                'Ubicación',
-                'City',
-                'Ciudad'
-            ]
-        }
-
-        # Función auxiliar para buscar campo
-        def find_field(mapping_key: str) -> Optional[str]:
-            possible_names = field_mapping.get(mapping_key, [])
+        try:
+            if csv_file_path.lower().endswith(XLSX_EXTENSIONS):
+                return self._preview_workbook(csv_file_path, max_contacts)
 
-            for possible_name in possible_names:
-                # Búsqueda exacta
-                if possible_name in fieldnames:
-                    value = row.get(possible_name, '').strip()
-                    if value:
-                        return value
+            source = self._describe_source(csv_file_path)
 
-                # Búsqueda case-insensitive
-                for fieldname in fieldnames:
-                    if possible_name.lower() in fieldname.lower():
-                        value = row.get(fieldname, '').strip()
-                        if value:
-                            return value
+            with contextlib.ExitStack() as stack:
+                if source['member']:
+                    archive = stack.enter_context(zipfile.ZipFile(csv_file_path))
+                    raw = stack.enter_context(archive.open(source['member']))
+                else:
+                    raw = stack.enter_context(open(csv_file_path, 'rb'))
 
-            return None
+                lines, reader = self._open_reader(raw)
+                fieldnames = next((row for row in reader if row), [])
+                data_offset = lines.offset
+                resolver = get_header_resolver(tuple(fieldnames))
 
-        # Extraer URL de LinkedIn
-        linkedin_url = find_field('linkedin_url')
+                contacts = []
+                rows_read = 0
+                exact = True
+                for row in reader:
+                    if len(contacts) >= max_contacts or rows_read >= PREVIEW_MAX_ROWS:
+                        exact = False
+                        break
+                    if not row:
+                        continue
 
-        if not linkedin_url:
-            # Intentar extraer URL de otros campos
-            for fieldname in fieldnames:
-                value = str(row.get(fieldname, '')).strip()
-                if 'linkedin.com/in/' in value.lower():
-                    linkedin_url = value
-                    break
+                    rows_read += 1
+                    contact = resolver.map_row(row)
+                    if contact:
+                        contacts.append(contact)
 
-        if not linkedin_url:
-            return None
+                bytes_read = lines.offset - data_offset
 
-        contact['linkedin_url'] = linkedin_url
+            if exact or not bytes_read:
+                estimated_rows = rows_read
+            else:
+                estimated_rows = round((source['size'] - data_offset) * rows_read / bytes_read)
 
-        # Extraer nombre y apellido
-        first_name = find_field('name') or ''
-        last_name = find_field('last_name') or ''
+            return {
+                'success': True,
+                'contacts': contacts,
+                'rows_read': rows_read,
+                'estimated_rows': estimated_rows,
+                'exact': exact,
+                'layout': {
+                    'fingerprint': source['fingerprint'],
+                    'data_offset': data_offset,
+                    'delimiter': reader.dialect.delimiter,
+                    'fieldnames': tuple(fieldnames)
+                }
+            }
 
-        if first_name and last_name:
-            contact['name'] = f"{first_name} {last_name}"
-        elif first_name:
-            contact['name'] = first_name
-        else:
-            # Intentar extraer de un campo de nombre completo
-            for fieldname in fieldnames:
-                value = row.get(fieldname, '').strip()
-                if value and len(value.split()) >= 2 and 'name' in fieldname.lower():
-                    contact['name'] = value
-                    break
+        except Exception as e:
+            logger.error(f"Error leyendo vista previa: {e}")
+            return {'success': False, 'error': str(e)}
 
-            if 'name' not in contact:
-                # Usar parte del URL como nombre
-                match = re.search(r'/in/([^/]+)', linkedin_url)
-                if match:
-                    contact['name'] = match.group(1).replace('-', ' ').title()
-                else:
-                    contact['name'] = 'Contacto sin nombre'
+    def _preview_workbook(self, path: str, max_contacts: int) -> Dict:
+        """
+        Vista previa de una planilla de Excel (ver preview_import)
 
-        # Extraer otros campos
-        contact['company'] = find_field('company') or None
-        contact['job_title'] = find_field('job_title') or None
-        contact['location'] = find_field('location') or None
+        La cantidad de filas sale de la dimensión de la hoja (None si la hoja
+        no la declara); no hay layout que reusar, porque abrir la hoja en
+        modo solo lectura ya es barato.
+        """
+        workbook, fieldnames, data, sheet_rows = self._open_workbook_rows(path)
 
-        # Agregar notas con información adicional
-        notes = []
-        email = find_field('email')
-        if email:
-            notes.append(f"Email: {email}")
+        try:
+            resolver = get_header_resolver(tuple(fieldnames))
+            contacts = []
+            rows_read = 0
+            exact = True
+
+            for row in data:
+                if len(contacts) >= max_contacts or rows_read >= PREVIEW_MAX_ROWS:
+                    exact = False
+                    break
 
-        if notes:
-            contact['notes'] = ' | '.join(notes)
+                rows_read += 1
+                contact = resolver.map_row(row)
+                if contact:
+                    contacts.append(contact)
 
-        # Marcar como connected por defecto (ya son conexiones)
-        contact['status'] = 'connected'
-        contact['connection_message_sent'] = 1
+            return {
+                'success': True,
+                'contacts': contacts,
+                'rows_read': rows_read,
+                'estimated_rows': rows_read if exact else (sheet_rows - 1 if sheet_rows else None),
+                'exact': exact,
+                'layout': None
+            }
 
-        return contact
+        finally:
+            workbook.close()
 
-    def show_import_preview(self, csv_file_path: str, max_contacts: int = 10) -> None:
+    def show_import_preview(self, csv_file_path: str, max_contacts: int = 10) -> Optional[Dict]:
         """
         Muestra una vista previa de los contactos que se importarían
 
         Args:
             csv_file_path: Ruta al archivo CSV
             max_contacts: Máximo de contactos a mostrar
+
+        Returns:
+            Layout detectado (para import_from_csv) o None si hubo error
         """
         print("\n" + "="*70)
         print("📋 VISTA PREVIA DE IMPORTACIÓN")
         print("="*70)
 
-        stats = self.import_from_csv(csv_file_path, dry_run=True)
+        preview = self.preview_import(csv_file_path, max_contacts)
 
-        if not stats.get('success'):
-            print(f"\n❌ Error: {stats.get('error', 'Desconocido')}")
-            return
+        if not preview.get('success'):
+            print(f"\n❌ Error: {preview.get('error', 'Desconocido')}")
+            return None
 
-        print(f"\n✅ Se importarían {stats['imported']} contactos")
-        print(f"\n📝 Primeros {min(max_contacts, stats['imported'])} contactos:\n")
+        if preview['exact']:
+            print(f"\n✅ El archivo tiene {preview['estimated_rows']} filas")
+        elif preview['estimated_rows'] is None:
+            print(f"\n✅ El archivo tiene más de {preview['rows_read']} filas")
+        else:
+            print(f"\n✅ El archivo tiene aproximadamente {preview['estimated_rows']} filas "
+                  f"(estimado por su tamaño)")
+        print(f"\n📝 Primeros {len(preview['contacts'])} contactos:\n")
 
-        for i, contact in enumerate(stats['contacts'][:max_contacts], 1):
+        for i, contact in enumerate(preview['contacts'], 1):
             print(f"{i}. {contact.get('name', 'N/A')}")
             print(f"   🏢 {contact.get('company', 'N/A')} - {contact.get('job_title', 'N/A')}")
             print(f"   🔗 {contact.get('linkedin_url', 'N/A')}")
             print("-" * 70)
 
+        return preview['layout']
+
 
 def export_linkedin_connections_guide():
     """Muestra instrucciones para exportar conexiones de LinkedIn"""
@@ -359,7 +2254,7 @@ def export_linkedin_connections_guide():
 7. Solicita el archivo
 8. Espera el email (puede tardar minutos u horas)
 9. Descarga el archivo ZIP
-10. Extrae el archivo CSV de conexiones
+10. Importa el ZIP directamente (o el Connections.csv si ya lo extrajiste)
 
 🔷 FORMATOS DE ARCHIVO ESPERADOS:
 
@@ -371,9 +2266,9 @@ El importador detecta automáticamente:
 
 🔷 DESPUÉS DE EXPORTAR:
 
-1. Coloca el archivo CSV en la carpeta de la suite
+1. Coloca el archivo ZIP o CSV en la carpeta de la suite
 2. Ejecuta la opción de importación en el menú
-3. Selecciona el archivo CSV
+3. Selecciona el archivo ZIP o CSV
 4. Confirma la importación
 
 ✅ VENTAJAS:
@@ -401,8 +2296,12 @@ if __name__ == "__main__":
 
     print(export_linkedin_connections_guide())
 
-    if len(sys.argv) > 1:
-        csv_file = sys.argv[1]
+    # Uso: python csv_importer.py Connections.csv [--pandas]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    engine = 'pandas' if '--pandas' in sys.argv else 'rows'
+
+    if args:
+        csv_file = args[0]
 
         print(f"\n📂 Procesando archivo: {csv_file}\n")
 
@@ -410,13 +2309,14 @@ if __name__ == "__main__":
         importer = LinkedInCSVImporter(db)
 
         # Mostrar preview
-        importer.show_import_preview(csv_file)
+        layout = importer.show_import_preview(csv_file)
 
         # Importar
         confirm = input("\n¿Deseas importar estos contactos? (s/n): ").strip().lower()
 
         if confirm == 's':
-            stats = importer.import_from_csv(csv_file)
+            stats = importer.import_from_csv(csv_file, collect_contacts=False, layout=layout,
+                                             engine=engine)
 
             if stats.get('success'):
                 print(f"\n✅ Importación completada: {stats['imported']} contactos")
@@ -6,22 +6,434 @@ Maneja el almacenamiento y recuperación de contactos de recruiters
 """
 
 import os
+import math
+import hashlib
+import time
+import random
 import sqlite3
+import threading
 import json
+import unicodedata
+import contextlib
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Tuple
+from typing import Any, Callable, Iterable, Iterator, List, Dict, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Versión del esquema (PRAGMA user_version); ver ContactDatabase._migrate
+SCHEMA_VERSION = 9
+
+# Columnas de valores repetitivos guardadas como códigos enteros:
+# columna lógica -> (tabla, tabla de lookup, valores iniciales en orden de código)
+ENUM_COLUMNS = {
+    'status': ('contacts', 'contact_statuses',
+               ('pending', 'connected', 'responded', 'rejected', 'not_interested')),
+    'interaction_type': ('interactions', 'interaction_types',
+                         ('connection_request', 'message', 'email', 'follow_up')),
+    'outcome': ('interactions', 'interaction_outcomes',
+                ('sent', 'accepted', 'rejected', 'no_response')),
+    'reminder_type': ('reminders', 'reminder_types',
+                      ('follow_up', 'connection_request')),
+}
+
+# Columnas de la tabla contacts (las que usan los listados) y columnas de texto
+# largo que viven aparte en contact_details y solo se leen cuando se piden
+CONTACT_COLUMNS = (
+    'id', 'linkedin_url', 'name', 'job_title', 'company', 'location', 'industry',
+    'first_contact_date', 'last_contact_date', 'status', 'connection_message_sent',
+    'follow_up_count', 'created_at', 'updated_at', 'email'
+)
+CONTACT_DETAIL_COLUMNS = ('about', 'skills', 'notes')
+
+# Proyección de los listados (ver todos, filtrar por estado, búsqueda)
+LIST_COLUMNS = ('id', 'name', 'company', 'job_title', 'status', 'linkedin_url')
+
+# Contactos por página al recorrer la base con iter_contacts
+CONTACT_PAGE_SIZE = 2000
+
+# Mayor rowid de SQLite (límite superior de un recorrido sin rango de IDs)
+MAX_ROWID = 2 ** 63 - 1
+
+# Dimensiones sobre las que se pueden calcular facetas (y filtrar)
+FACET_DIMENSIONS = ('status', 'company', 'location', 'industry')
+
+# Campos indexados por trigramas para la búsqueda tolerante a errores
+TRIGRAM_FIELDS = ('name', 'company')
+
+# Similitud mínima (fracción de trigramas de la búsqueda presentes) para la búsqueda difusa
+FUZZY_MIN_SIMILARITY = 0.45
+
+# Entradas de un trigrama a partir de las cuales se lo considera común: la
+# búsqueda difusa arma los candidatos con los trigramas raros de la consulta
+TRIGRAM_COMMON_POSTINGS = 5000
+
+# Columnas de import_runs que se actualizan en cada checkpoint
+IMPORT_RUN_FIELDS = (
+    'status', 'byte_offset', 'batches_committed', 'rows_processed',
+    'imported', 'skipped', 'no_url', 'errors', 'changed', 'unchanged',
+    'quarantine_bytes', 'finished_at'
+)
+
+# Campos que trae la exportación de LinkedIn y que una reimportación
+# (upsert) compara por hash y actualiza si cambiaron
+IMPORT_HASH_FIELDS = ('name', 'job_title', 'company', 'location')
+
+
+def fold_text(text: Optional[str]) -> str:
+    """Normaliza un texto: minúsculas, sin acentos y solo letras/números"""
+    if not text:
+        return ''
+
+    decomposed = unicodedata.normalize('NFKD', text)
+    without_accents = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+    return ''.join(ch if ch.isalnum() else ' ' for ch in without_accents.lower())
+
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    """Email como se guarda y se compara: sin espacios y en minúsculas (None si está vacío)"""
+    email = (email or '').strip().lower()
+    return email or None
+
+
+def content_hash(contact: Dict) -> str:
+    """Hash de los campos importados de un contacto (ver IMPORT_HASH_FIELDS)"""
+    values = [(contact.get(field) or '').strip() for field in IMPORT_HASH_FIELDS]
+    return hashlib.sha1('\x1f'.join(values).encode('utf-8')).hexdigest()
+
+
+def _source_name(source: str) -> str:
+    """Nombre del archivo de una importación, sin carpeta ni ZIP ("datos.zip!Connections.csv" → "Connections.csv")"""
+    return os.path.basename(source.split('!')[-1])
+
+
+def text_trigrams(text: Optional[str]) -> set:
+    """
+    Obtiene los trigramas de un texto (estilo pg_trgm)
+
+    Cada palabra se rellena con dos espacios al inicio y uno al final,
+    así "Gonzales" y "González" comparten la mayoría de sus trigramas.
+    """
+    trigrams = set()
+
+    for word in fold_text(text).split():
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            trigrams.add(padded[i:i + 3])
+
+    return trigrams
+
+
+CONTACTS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        linkedin_url TEXT UNIQUE NOT NULL,
+        name TEXT NOT NULL,
+        job_title TEXT,
+        company TEXT,
+        location TEXT,
+        industry TEXT,
+        first_contact_date TEXT,
+        last_contact_date TEXT,
+        status_id INTEGER DEFAULT 1 REFERENCES contact_statuses(id),
+        connection_message_sent INTEGER DEFAULT 0,
+        follow_up_count INTEGER DEFAULT 0,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        email TEXT
+    )
+"""
+
+CONTACT_DETAILS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        contact_id INTEGER PRIMARY KEY REFERENCES contacts(id) ON DELETE CASCADE,
+        about TEXT,
+        skills TEXT,
+        notes TEXT
+    )
+"""
+
+INTERACTIONS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        contact_id INTEGER NOT NULL,
+        interaction_type_id INTEGER NOT NULL REFERENCES interaction_types(id),
+        message TEXT,
+        outcome_id INTEGER REFERENCES interaction_outcomes(id),
+        next_follow_up_date TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        source_ref TEXT,
+        FOREIGN KEY (contact_id) REFERENCES contacts(id) ON DELETE CASCADE
+    )
+"""
+
+REMINDERS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        contact_id INTEGER NOT NULL,
+        reminder_date TEXT NOT NULL,
+        reminder_type_id INTEGER NOT NULL REFERENCES reminder_types(id),
+        message TEXT,
+        is_completed INTEGER DEFAULT 0,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (contact_id) REFERENCES contacts(id) ON DELETE CASCADE
+    )
+"""
+
+# Templates de mensajes personalizados (los predeterminados viven en
+# MessageGenerator); updated_at cambia en cada alta o edición
+TEMPLATES_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        template_type TEXT NOT NULL,
+        name TEXT NOT NULL,
+        content TEXT NOT NULL,
+        tone TEXT DEFAULT 'professional',
+        days_after INTEGER,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE (template_type, name)
+    )
+"""
+
+# Columnas y valores de un contacto nuevo (INSERT / INSERT OR REPLACE)
+CONTACT_INSERT_SQL = """
+    INTO contacts (
+        linkedin_url, name, job_title, company, location,
+        industry, first_contact_date, last_contact_date, status_id,
+        connection_message_sent, follow_up_count, updated_at, email
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Vistas con los nombres de los códigos, para consultas ad-hoc y herramientas externas
+NAMED_VIEWS = {
+    'contacts_named': """
+        SELECT c.*, s.name AS status, d.about, d.skills, d.notes
+        FROM contacts c
+        LEFT JOIN contact_statuses s ON s.id = c.status_id
+        LEFT JOIN contact_details d ON d.contact_id = c.id
+    """,
+    'interactions_named': """
+        SELECT i.*, t.name AS interaction_type, o.name AS outcome
+        FROM interactions i
+        LEFT JOIN interaction_types t ON t.id = i.interaction_type_id
+        LEFT JOIN interaction_outcomes o ON o.id = i.outcome_id
+    """,
+    'reminders_named': """
+        SELECT r.*, t.name AS reminder_type
+        FROM reminders r
+        LEFT JOIN reminder_types t ON t.id = r.reminder_type_id
+    """,
+}
+
+
+# Esquemas de versiones anteriores que usan las migraciones al reconstruir
+# tablas. No se modifican: cada migración debe producir siempre lo mismo.
+CONTACTS_TABLE_V1_SQL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        linkedin_url TEXT UNIQUE NOT NULL,
+        name TEXT NOT NULL,
+        job_title TEXT,
+        company TEXT,
+        location TEXT,
+        industry TEXT,
+        about TEXT,
+        skills TEXT,
+        notes TEXT,
+        first_contact_date TEXT,
+        last_contact_date TEXT,
+        status_id INTEGER DEFAULT 1 REFERENCES contact_statuses(id),
+        connection_message_sent INTEGER DEFAULT 0,
+        follow_up_count INTEGER DEFAULT 0,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+INTERACTIONS_TABLE_V1_SQL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        contact_id INTEGER NOT NULL,
+        interaction_type_id INTEGER NOT NULL REFERENCES interaction_types(id),
+        message TEXT,
+        outcome_id INTEGER REFERENCES interaction_outcomes(id),
+        next_follow_up_date TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (contact_id) REFERENCES contacts(id) ON DELETE CASCADE
+    )
+"""
+
+REMINDERS_TABLE_V1_SQL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        contact_id INTEGER NOT NULL,
+        reminder_date TEXT NOT NULL,
+        reminder_type_id INTEGER NOT NULL REFERENCES reminder_types(id),
+        message TEXT,
+        is_completed INTEGER DEFAULT 0,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (contact_id) REFERENCES contacts(id) ON DELETE CASCADE
+    )
+"""
+
+CONTACTS_TABLE_V2_SQL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        linkedin_url TEXT UNIQUE NOT NULL,
+        name TEXT NOT NULL,
+        job_title TEXT,
+        company TEXT,
+        location TEXT,
+        industry TEXT,
+        first_contact_date TEXT,
+        last_contact_date TEXT,
+        status_id INTEGER DEFAULT 1 REFERENCES contact_statuses(id),
+        connection_message_sent INTEGER DEFAULT 0,
+        follow_up_count INTEGER DEFAULT 0,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+def is_busy_error(error: Exception) -> bool:
+    """Indica si un error de SQLite corresponde a SQLITE_BUSY / base bloqueada"""
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and (
+        'database is locked' in message or 'database is busy' in message
+    )
+
+
+class LockMetrics:
+    """Contadores e histograma de esperas por el lock de escritura"""
+
+    # Límites superiores (ms) de los buckets del histograma
+    BUCKETS_MS = (1, 10, 50, 100, 500, 1000, 5000)
+
+    # Espera (ms) a partir de la cual una transacción cuenta como disputada
+    # aunque la haya resuelto busy_timeout sin reintentos
+    CONTENDED_WAIT_MS = 1.0
+
+    def __init__(self):
+        """Inicializa los contadores en cero"""
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Pone todos los contadores en cero"""
+        with self._lock:
+            self.transactions = 0
+            self.contended = 0
+            self.busy_errors = 0
+            self.retries = 0
+            self.failures = 0
+            self.total_wait_ms = 0.0
+            self.max_wait_ms = 0.0
+            self.histogram = [0] * (len(self.BUCKETS_MS) + 1)
+
+    def record_busy(self, retried: bool) -> None:
+        """Registra un SQLITE_BUSY (reintentado o definitivo)"""
+        with self._lock:
+            self.busy_errors += 1
+            if retried:
+                self.retries += 1
+            else:
+                self.failures += 1
+
+    def record_wait(self, wait_seconds: float, attempts: int) -> None:
+        """
+        Registra el tiempo que una transacción esperó hasta obtener el lock
+
+        Es disputada si necesitó reintentos o si esperó más de CONTENDED_WAIT_MS
+        (SQLite espera dentro de busy_timeout sin devolver SQLITE_BUSY).
+        """
+        wait_ms = wait_seconds * 1000
+
+        with self._lock:
+            self.transactions += 1
+            if attempts > 1 or wait_ms > self.CONTENDED_WAIT_MS:
+                self.contended += 1
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+
+            for i, limit in enumerate(self.BUCKETS_MS):
+                if wait_ms <= limit:
+                    self.histogram[i] += 1
+                    break
+            else:
+                self.histogram[-1] += 1
+
+    def snapshot(self) -> Dict:
+        """Devuelve una copia de las métricas actuales"""
+        with self._lock:
+            labels = [f"<={limit}ms" for limit in self.BUCKETS_MS]
+            labels.append(f">{self.BUCKETS_MS[-1]}ms")
+
+            return {
+                'transactions': self.transactions,
+                'contended': self.contended,
+                'busy_errors': self.busy_errors,
+                'retries': self.retries,
+                'failures': self.failures,
+                'avg_wait_ms': round(self.total_wait_ms / self.transactions, 3) if self.transactions else 0.0,
+                'max_wait_ms': round(self.max_wait_ms, 3),
+                'wait_histogram': dict(zip(labels, self.histogram))
+            }
+
+
+class _RollbackConnection(sqlite3.Connection):
+    """
+    Conexión de una transacción que se descarta (ver ContactDatabase.rollback_scope)
+
+    Mientras dura el alcance, commit() y close() de quienes la piden no
+    hacen nada: la transacción entera se deshace al salir.
+    """
+
+    def commit(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
 
 class ContactDatabase:
     """Gestiona la base de datos SQLite de contactos"""
 
-    def __init__(self, db_path: str = "data/contacts.db"):
-        """Inicializa la conexión a la base de datos"""
+    def __init__(self, db_path: str = "data/contacts.db",
+                 busy_timeout: Optional[float] = None,
+                 max_retries: Optional[int] = None,
+                 retry_base_delay: Optional[float] = None):
+        """
+        Inicializa la conexión a la base de datos
+
+        Args:
+            db_path: Ruta al archivo SQLite
+            busy_timeout: Segundos que SQLite espera un lock antes de fallar
+                          (default: DB_BUSY_TIMEOUT o 5)
+            max_retries: Reintentos de una escritura ante SQLITE_BUSY
+                         (default: DB_WRITE_RETRIES o 5)
+            retry_base_delay: Espera base (segundos) del backoff exponencial con jitter
+                              (default: DB_RETRY_BASE_DELAY o 0.05)
+        """
         self.db_path = db_path
 
+        # Configuración de contención (parámetros o .env)
+        self.busy_timeout = busy_timeout if busy_timeout is not None else float(os.getenv('DB_BUSY_TIMEOUT', '5'))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('DB_WRITE_RETRIES', '5'))
+        self.retry_base_delay = (retry_base_delay if retry_base_delay is not None
+                                 else float(os.getenv('DB_RETRY_BASE_DELAY', '0.05')))
+        self.lock_metrics = LockMetrics()
+
+        # Caché de las tablas de lookup (nombre -> código y código -> nombre)
+        self._enum_ids: Dict[str, Dict[str, int]] = {}
+        self._enum_names: Dict[str, Dict[int, str]] = {}
+
+        # Conexión de rollback_scope en curso y el hilo que la abrió
+        self._rollback_conn: Optional[_RollbackConnection] = None
+        self._rollback_thread: Optional[int] = None
+
         # Crear directorio si no existe
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
 
@@ -30,97 +442,775 @@ class ContactDatabase:
 
     def _get_connection(self) -> sqlite3.Connection:
         """Obtiene una conexión a la base de datos"""
-        conn = sqlite3.connect(self.db_path)
+        if self._in_rollback_scope():
+            return self._rollback_conn
+
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout)
         conn.row_factory = sqlite3.Row
+        # Para que INSERT OR REPLACE dispare los triggers de borrado
+        conn.execute("PRAGMA recursive_triggers = ON")
         return conn
 
+    def _run_write(self, operation: Callable[[sqlite3.Cursor], Any]) -> Any:
+        """
+        Ejecuta una operación de escritura en una transacción BEGIN IMMEDIATE
+
+        Tomar el lock de escritura al inicio evita que la transacción falle a
+        mitad de camino. Si SQLite responde SQLITE_BUSY (incluso tras esperar
+        busy_timeout), la transacción completa se reintenta con backoff
+        exponencial y jitter. Los tiempos de espera quedan en lock_metrics.
+
+        Args:
+            operation: Función que recibe el cursor y realiza las escrituras
+
+        Returns:
+            Lo que devuelva la operación
+
+        Raises:
+            sqlite3.OperationalError: Si se agotan los reintentos (u otro error)
+        """
+        if self._in_rollback_scope():
+            return self._run_savepoint(self._rollback_conn, operation)
+
+        attempt = 0
+        start = time.perf_counter()
+
+        while True:
+            attempt += 1
+            conn = self._get_connection()
+
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                wait = time.perf_counter() - start
+
+                result = operation(conn.cursor())
+                conn.commit()
+
+                self.lock_metrics.record_wait(wait, attempt)
+                return result
+
+            except sqlite3.OperationalError as e:
+                if conn.in_transaction:
+                    conn.rollback()
+
+                if not is_busy_error(e):
+                    raise
+
+                retry = attempt <= self.max_retries
+                self.lock_metrics.record_busy(retried=retry)
+
+                if not retry:
+                    logger.error(f"Base de datos bloqueada tras {attempt} intentos: {e}")
+                    raise
+
+                delay = random.uniform(0, self.retry_base_delay * (2 ** (attempt - 1)))
+                logger.warning(f"Base de datos bloqueada, reintento {attempt} en {delay:.3f}s")
+                time.sleep(delay)
+
+            except Exception:
+                if conn.in_transaction:
+                    conn.rollback()
+                raise
+
+            finally:
+                conn.close()
+
+    def _in_rollback_scope(self) -> bool:
+        """True si este hilo está dentro de rollback_scope"""
+        return self._rollback_conn is not None and self._rollback_thread == threading.get_ident()
+
+    def _run_savepoint(self, conn: sqlite3.Connection,
+                       operation: Callable[[sqlite3.Cursor], Any]) -> Any:
+        """
+        Ejecuta una escritura como savepoint dentro de rollback_scope
+
+        Si la operación falla se deshace solo ella, igual que una transacción
+        de _run_write; lo ya escrito en el alcance sigue visible.
+        """
+        conn.execute("SAVEPOINT run_write")
+
+        try:
+            result = operation(conn.cursor())
+        except Exception:
+            conn.execute("ROLLBACK TO run_write")
+            conn.execute("RELEASE run_write")
+            raise
+
+        conn.execute("RELEASE run_write")
+        return result
+
+    @contextlib.contextmanager
+    def rollback_scope(self) -> Iterator[None]:
+        """
+        Alcance cuyas escrituras se descartan al salir (importación de prueba)
+
+        Abre una transacción BEGIN IMMEDIATE en una conexión propia: dentro
+        del alcance, en este hilo, cada _run_write es un savepoint sobre ella
+        y las lecturas usan la misma conexión, así ven lo escrito. Al salir
+        (también con una excepción) todo se deshace con ROLLBACK.
+
+        Mientras dura se tiene el lock de escritura de la base. Al salir se
+        vacía la caché de códigos enteros: los valores creados dentro del
+        alcance se cargaron desde la transacción que se deshace.
+        """
+        if self._rollback_conn is not None:
+            raise RuntimeError("Ya hay un rollback_scope en curso")
+
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout,
+                               factory=_RollbackConnection)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA recursive_triggers = ON")
+        conn.execute("BEGIN IMMEDIATE")
+        self._rollback_conn, self._rollback_thread = conn, threading.get_ident()
+
+        try:
+            yield
+        finally:
+            self._rollback_conn, self._rollback_thread = None, None
+            sqlite3.Connection.rollback(conn)
+            sqlite3.Connection.close(conn)
+            self._enum_ids.clear()
+            self._enum_names.clear()
+
+    def get_lock_metrics(self) -> Dict:
+        """Obtiene las métricas de contención de escritura"""
+        return self.lock_metrics.snapshot()
+
     def _init_db(self) -> None:
-        """Crea las tablas necesarias si no existen"""
+        """
+        Crea las tablas necesarias si no existen y migra esquemas anteriores
+
+        Una base ya al día (PRAGMA user_version) se abre sin escribir: así
+        abrirla no espera el lock de escritura de una importación en curso.
+        Si hay que crear o migrar, se hace en una transacción de _run_write
+        (con sus reintentos ante SQLITE_BUSY).
+        """
         conn = self._get_connection()
-        cursor = conn.cursor()
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+        finally:
+            conn.close()
+
+        if version >= SCHEMA_VERSION:
+            return
 
         try:
-            # Tabla de contactos
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS contacts (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    linkedin_url TEXT UNIQUE NOT NULL,
-                    name TEXT NOT NULL,
-                    job_title TEXT,
-                    company TEXT,
-                    location TEXT,
-                    industry TEXT,
-                    about TEXT,
-                    skills TEXT,
-                    notes TEXT,
-                    first_contact_date TEXT,
-                    last_contact_date TEXT,
-                    status TEXT DEFAULT 'pending',
-                    connection_message_sent INTEGER DEFAULT 0,
-                    follow_up_count INTEGER DEFAULT 0,
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
+            self._run_write(self._create_schema)
+            logger.info("Base de datos inicializada correctamente")
+        except Exception as e:
+            logger.error(f"Error inicializando base de datos: {e}")
+            raise
 
-            # Tabla de interacciones
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS interactions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    contact_id INTEGER NOT NULL,
-                    interaction_type TEXT NOT NULL,
-                    message TEXT,
-                    outcome TEXT,
-                    next_follow_up_date TEXT,
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (contact_id) REFERENCES contacts(id) ON DELETE CASCADE
+    def _create_schema(self, cursor: sqlite3.Cursor) -> None:
+        """Migra la base (si ya existía) y crea lo que falte del esquema actual"""
+        # Releída dentro de la transacción: otro proceso pudo haber migrado antes
+        cursor.execute("PRAGMA user_version")
+        version = cursor.fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+
+        cursor.execute("""
+            SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'contacts'
+        """)
+        if cursor.fetchone():
+            self._migrate(cursor, version)
+
+        # Tablas de lookup de los códigos enteros
+        self._create_enum_tables(cursor)
+
+        # Tabla de contactos (columnas de los listados)
+        cursor.execute(CONTACTS_TABLE_SQL.format(table='contacts'))
+
+        # Texto largo de cada contacto (se lee solo cuando se pide)
+        cursor.execute(CONTACT_DETAILS_TABLE_SQL.format(table='contact_details'))
+
+        # Tabla de interacciones
+        cursor.execute(INTERACTIONS_TABLE_SQL.format(table='interactions'))
+
+        # Tabla de recordatorios
+        cursor.execute(REMINDERS_TABLE_SQL.format(table='reminders'))
+
+        # Índices para optimizar búsquedas
+        # Índices de cobertura de los listados: el filtro por estado y el
+        # orden por fecha se resuelven sin leer la tabla
+        cursor.execute("DROP INDEX IF EXISTS idx_contacts_status")
+
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_contacts_status_list
+            ON contacts(status_id, created_at, name, company, job_title, linkedin_url)
+        """)
+
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_contacts_created_list
+            ON contacts(created_at, name, company, job_title, linkedin_url, status_id)
+        """)
+
+        # Dimensiones de las facetas (y búsqueda por empresa)
+        self._create_facet_indexes(cursor)
+
+        # Email: búsqueda exacta y clave de deduplicación (si lo tiene)
+        cursor.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_contacts_email
+            ON contacts(email) WHERE email IS NOT NULL
+        """)
+
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_interactions_contact_id
+            ON interactions(contact_id)
+        """)
+
+        # Origen de las interacciones importadas (mensajes e invitaciones
+        # de LinkedIn): reimportar el mismo archivo no las duplica
+        cursor.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_interactions_source_ref
+            ON interactions(source_ref) WHERE source_ref IS NOT NULL
+        """)
+
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_reminders_date
+            ON reminders(reminder_date)
+        """)
+
+        # Índice de trigramas para búsqueda difusa (nombre y empresa)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS contact_trigrams (
+                trigram TEXT NOT NULL,
+                contact_id INTEGER NOT NULL,
+                PRIMARY KEY (trigram, contact_id)
+            ) WITHOUT ROWID
+        """)
+
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_contact_trigrams_contact_id
+            ON contact_trigrams(contact_id)
+        """)
+
+        # Contactos pendientes de (re)indexar; los triggers la mantienen
+        # para cualquier escritura, incluidas las importaciones masivas
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS trigram_queue (
+                contact_id INTEGER PRIMARY KEY
+            )
+        """)
+
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_contacts_trigram_insert
+            AFTER INSERT ON contacts
+            BEGIN
+                INSERT OR IGNORE INTO trigram_queue (contact_id) VALUES (new.id);
+            END
+        """)
+
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_contacts_trigram_update
+            AFTER UPDATE OF name, company ON contacts
+            BEGIN
+                INSERT OR IGNORE INTO trigram_queue (contact_id) VALUES (new.id);
+            END
+        """)
+
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_contacts_details_delete
+            AFTER DELETE ON contacts
+            BEGIN
+                DELETE FROM contact_details WHERE contact_id = old.id;
+            END
+        """)
+
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_contacts_trigram_delete
+            AFTER DELETE ON contacts
+            BEGIN
+                DELETE FROM contact_trigrams WHERE contact_id = old.id;
+                DELETE FROM trigram_queue WHERE contact_id = old.id;
+            END
+        """)
+
+        # Bases existentes: encolar todos los contactos si el índice está vacío
+        cursor.execute("""
+            INSERT OR IGNORE INTO trigram_queue (contact_id)
+            SELECT id FROM contacts
+            WHERE NOT EXISTS (SELECT 1 FROM contact_trigrams)
+        """)
+
+        # Templates de mensajes personalizados
+        cursor.execute(TEMPLATES_TABLE_SQL.format(table='templates'))
+
+        # Checkpoints de importaciones (para reanudar y consultar el progreso)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS import_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                source TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'running',
+                total_bytes INTEGER,
+                byte_offset INTEGER DEFAULT 0,
+                batches_committed INTEGER DEFAULT 0,
+                rows_processed INTEGER DEFAULT 0,
+                imported INTEGER DEFAULT 0,
+                skipped INTEGER DEFAULT 0,
+                no_url INTEGER DEFAULT 0,
+                errors INTEGER DEFAULT 0,
+                changed INTEGER DEFAULT 0,
+                unchanged INTEGER DEFAULT 0,
+                upsert INTEGER DEFAULT 0,
+                engine TEXT,
+                quarantine_bytes INTEGER DEFAULT 0,
+                started_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                finished_at TEXT
+            )
+        """)
+
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_import_runs_fingerprint
+            ON import_runs(fingerprint, status)
+        """)
+
+        # Hash de lo importado por contacto y última importación que lo
+        # incluyó (para el modo upsert: detectar cambios y contactos faltantes)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS contact_import_state (
+                contact_id INTEGER PRIMARY KEY REFERENCES contacts(id) ON DELETE CASCADE,
+                content_hash TEXT NOT NULL,
+                last_import_run INTEGER
+            )
+        """)
+
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_contact_import_state_run
+            ON contact_import_state(last_import_run)
+        """)
+
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_contacts_import_state_delete
+            AFTER DELETE ON contacts
+            BEGIN
+                DELETE FROM contact_import_state WHERE contact_id = old.id;
+            END
+        """)
+
+        # Vistas con nombres legibles
+        for view, select in NAMED_VIEWS.items():
+            cursor.execute(f"CREATE VIEW IF NOT EXISTS {view} AS {select}")
+
+        cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _create_enum_tables(self, cursor: sqlite3.Cursor) -> None:
+        """Crea las tablas de lookup de ENUM_COLUMNS con sus valores iniciales"""
+        for table, lookup, initial_values in ENUM_COLUMNS.values():
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {lookup} (
+                    id INTEGER PRIMARY KEY,
+                    name TEXT UNIQUE NOT NULL
                 )
             """)
+            cursor.executemany(f"""
+                INSERT OR IGNORE INTO {lookup} (id, name) VALUES (?, ?)
+            """, list(enumerate(initial_values, 1)))
 
-            # Tabla de recordatorios
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS reminders (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    contact_id INTEGER NOT NULL,
-                    reminder_date TEXT NOT NULL,
-                    reminder_type TEXT NOT NULL,
-                    message TEXT,
-                    is_completed INTEGER DEFAULT 0,
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (contact_id) REFERENCES contacts(id) ON DELETE CASCADE
-                )
-            """)
+    def _migrate(self, cursor: sqlite3.Cursor, version: int) -> None:
+        """
+        Migra una base existente desde `version` hasta SCHEMA_VERSION
 
-            # Índices para optimizar búsquedas
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_contacts_status
-                ON contacts(status)
-            """)
+        Corre dentro de la transacción de _create_schema: si un paso falla no
+        queda ninguna migración a medias.
+        """
+        migrations = [
+            self._migrate_v1_enum_columns,
+            self._migrate_v2_contact_details,
+            self._migrate_v3_email,
+            self._migrate_v4_import_run_counters,
+            self._migrate_v5_interaction_source_ref,
+            self._migrate_v6_templates,
+            self._migrate_v7_import_run_mode,
+            self._migrate_v8_import_run_quarantine,
+            self._migrate_v9_facet_indexes,
+        ]
+
+        # Las vistas dependen de las tablas que se reconstruyen; se recrean al final
+        for view in NAMED_VIEWS:
+            cursor.execute(f"DROP VIEW IF EXISTS {view}")
+
+        for step in migrations[version:]:
+            logger.info(f"Migrando base de datos: {step.__doc__.strip().splitlines()[0]}")
+            step(cursor)
+
+    def _rebuild_table(self, cursor: sqlite3.Cursor, table: str,
+                       create_sql: str, columns: List[str],
+                       select_exprs: List[str]) -> None:
+        """
+        Reconstruye una tabla con un nuevo esquema copiando sus filas
 
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_contacts_company
-                ON contacts(company)
+        Args:
+            cursor: Cursor dentro de la transacción de migración
+            table: Nombre de la tabla
+            create_sql: Plantilla CREATE TABLE con {table}
+            columns: Columnas de la tabla nueva a completar
+            select_exprs: Expresiones (sobre la tabla vieja) para cada columna
+        """
+        cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,))
+        row = cursor.fetchone()
+        sequence = row[0] if row else 0
+
+        cursor.execute(create_sql.format(table=f"{table}_new"))
+        cursor.execute(f"""
+            INSERT INTO {table}_new ({', '.join(columns)})
+            SELECT {', '.join(select_exprs)} FROM {table}
+        """)
+        cursor.execute(f"DROP TABLE {table}")
+        cursor.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+
+        # Conservar el AUTOINCREMENT para no reutilizar IDs eliminados
+        cursor.execute("""
+            UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?
+        """, (sequence, table))
+
+    def _migrate_v1_enum_columns(self, cursor: sqlite3.Cursor) -> None:
+        """v1: status, interaction_type, outcome y reminder_type como códigos enteros"""
+        self._create_enum_tables(cursor)
+
+        for column, (table, lookup, _) in ENUM_COLUMNS.items():
+            cursor.execute(f"""
+                INSERT OR IGNORE INTO {lookup} (name)
+                SELECT DISTINCT {column} FROM {table} WHERE {column} IS NOT NULL
             """)
 
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_interactions_contact_id
-                ON interactions(contact_id)
-            """)
+        def code(column: str, table: str) -> str:
+            lookup = ENUM_COLUMNS[column][1]
+            return f"(SELECT id FROM {lookup} WHERE name = {table}.{column})"
+
+        contact_columns = [
+            'id', 'linkedin_url', 'name', 'job_title', 'company', 'location',
+            'industry', 'about', 'skills', 'notes', 'first_contact_date',
+            'last_contact_date', 'connection_message_sent', 'follow_up_count',
+            'created_at', 'updated_at'
+        ]
+        self._rebuild_table(
+            cursor, 'contacts', CONTACTS_TABLE_V1_SQL,
+            contact_columns + ['status_id'],
+            contact_columns + [code('status', 'contacts')]
+        )
+
+        interaction_columns = ['id', 'contact_id', 'message', 'next_follow_up_date', 'created_at']
+        self._rebuild_table(
+            cursor, 'interactions', INTERACTIONS_TABLE_V1_SQL,
+            interaction_columns + ['interaction_type_id', 'outcome_id'],
+            interaction_columns + [code('interaction_type', 'interactions'),
+                                   code('outcome', 'interactions')]
+        )
+
+        reminder_columns = ['id', 'contact_id', 'reminder_date', 'message', 'is_completed', 'created_at']
+        self._rebuild_table(
+            cursor, 'reminders', REMINDERS_TABLE_V1_SQL,
+            reminder_columns + ['reminder_type_id'],
+            reminder_columns + [code('reminder_type', 'reminders')]
+        )
+
+    def _migrate_v2_contact_details(self, cursor: sqlite3.Cursor) -> None:
+        """v2: about, skills y notes pasan de contacts a contact_details"""
+        cursor.execute(CONTACT_DETAILS_TABLE_SQL.format(table='contact_details'))
+        cursor.execute("""
+            INSERT OR REPLACE INTO contact_details (contact_id, about, skills, notes)
+            SELECT id, about, skills, notes FROM contacts
+            WHERE about IS NOT NULL OR skills IS NOT NULL OR notes IS NOT NULL
+        """)
+
+        columns = [
+            'id', 'linkedin_url', 'name', 'job_title', 'company', 'location',
+            'industry', 'first_contact_date', 'last_contact_date', 'status_id',
+            'connection_message_sent', 'follow_up_count', 'created_at', 'updated_at'
+        ]
+        self._rebuild_table(cursor, 'contacts', CONTACTS_TABLE_V2_SQL, columns, columns)
+
+    def _migrate_v3_email(self, cursor: sqlite3.Cursor) -> None:
+        """v3: columna email en contacts, completada desde las notas ("Email: ...")"""
+        cursor.execute("PRAGMA table_info(contacts)")
+        if 'email' not in {row[1] for row in cursor.fetchall()}:
+            cursor.execute("ALTER TABLE contacts ADD COLUMN email TEXT")
+
+        # El email es lo que sigue a "Email: " hasta el primer espacio o salto
+        # de línea. Si varios contactos tienen el mismo, queda en el de menor ID
+        # (el índice es único); las notas no se modifican.
+        cursor.execute("""
+            WITH found AS (
+                SELECT contact_id,
+                       replace(replace(substr(notes, instr(notes, 'Email: ') + 7),
+                                       char(13), ' '), char(10), ' ') || ' ' AS rest
+                FROM contact_details
+                WHERE instr(notes, 'Email: ') > 0
+            ),
+            emails AS (
+                SELECT lower(substr(rest, 1, instr(rest, ' ') - 1)) AS email,
+                       MIN(contact_id) AS contact_id
+                FROM found
+                WHERE substr(rest, 1, instr(rest, ' ') - 1) LIKE '_%@_%'
+                GROUP BY 1
+            )
+            UPDATE contacts
+            SET email = (SELECT email FROM emails WHERE emails.contact_id = contacts.id)
+            WHERE email IS NULL AND id IN (SELECT contact_id FROM emails)
+        """)
+        logger.info(f"Emails recuperados de las notas: {cursor.rowcount}")
+
+    def _migrate_v4_import_run_counters(self, cursor: sqlite3.Cursor) -> None:
+        """v4: contadores no_url, y changed y unchanged del modo upsert, en import_runs"""
+        cursor.execute("PRAGMA table_info(import_runs)")
+        columns = {row[1] for row in cursor.fetchall()}
+
+        # Sin import_runs (base anterior a los checkpoints) _init_db la crea completa
+        if not columns:
+            return
+
+        for column in ('no_url', 'changed', 'unchanged'):
+            if column not in columns:
+                cursor.execute(f"ALTER TABLE import_runs ADD COLUMN {column} INTEGER DEFAULT 0")
+
+    def _migrate_v5_interaction_source_ref(self, cursor: sqlite3.Cursor) -> None:
+        """v5: columna source_ref en interactions (origen de las interacciones importadas)"""
+        cursor.execute("PRAGMA table_info(interactions)")
+        if 'source_ref' not in {row[1] for row in cursor.fetchall()}:
+            cursor.execute("ALTER TABLE interactions ADD COLUMN source_ref TEXT")
+
+    def _migrate_v6_templates(self, cursor: sqlite3.Cursor) -> None:
+        """v6: tabla templates para los templates de mensajes personalizados"""
+        cursor.execute(TEMPLATES_TABLE_SQL.format(table='templates'))
+
+    def _migrate_v7_import_run_mode(self, cursor: sqlite3.Cursor) -> None:
+        """v7: modo de la importación (upsert y motor) en import_runs, para reanudarla igual"""
+        cursor.execute("PRAGMA table_info(import_runs)")
+        columns = {row[1] for row in cursor.fetchall()}
+
+        if not columns or 'upsert' in columns:
+            return
+
+        cursor.execute("ALTER TABLE import_runs ADD COLUMN upsert INTEGER DEFAULT 0")
+        cursor.execute("ALTER TABLE import_runs ADD COLUMN engine TEXT")
+
+        # Las importaciones anteriores no guardaban el modo: solo una upsert
+        # registra contactos actualizados o sin cambios
+        cursor.execute("UPDATE import_runs SET upsert = 1 WHERE changed > 0 OR unchanged > 0")
+
+    def _migrate_v8_import_run_quarantine(self, cursor: sqlite3.Cursor) -> None:
+        """v8: tamaño del CSV de cuarentena en cada checkpoint de import_runs"""
+        cursor.execute("PRAGMA table_info(import_runs)")
+        columns = {row[1] for row in cursor.fetchall()}
+
+        # Sin valor por defecto: las importaciones anteriores quedan en NULL y
+        # al reanudarlas se agrega al final de la cuarentena, como antes
+        if columns and 'quarantine_bytes' not in columns:
+            cursor.execute("ALTER TABLE import_runs ADD COLUMN quarantine_bytes INTEGER")
+
+    def _migrate_v9_facet_indexes(self, cursor: sqlite3.Cursor) -> None:
+        """v9: índices de empresa, ubicación e industria con el estado (facetas)"""
+        cursor.execute("DROP INDEX IF EXISTS idx_contacts_company")
+        self._create_facet_indexes(cursor)
+
+    def _create_facet_indexes(self, cursor: sqlite3.Cursor) -> None:
+        """
+        Índices de las dimensiones de facets
 
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_reminders_date
-                ON reminders(reminder_date)
+        Con status_id al final, el conteo por dimensión filtrado por estado
+        se resuelve en el índice. idx_contacts_company también sirve para
+        buscar por empresa.
+        """
+        for dimension in FACET_DIMENSIONS:
+            if dimension in ENUM_COLUMNS:
+                continue
+            cursor.execute(f"""
+                CREATE INDEX IF NOT EXISTS idx_contacts_{dimension}
+                ON contacts({dimension}, status_id)
             """)
 
-            conn.commit()
-            logger.info("Base de datos inicializada correctamente")
+    # ===== CÓDIGOS ENTEROS (status, interaction_type, outcome, reminder_type) =====
 
-        except Exception as e:
-            logger.error(f"Error inicializando base de datos: {e}")
-            raise
+    def _load_enum(self, column: str) -> None:
+        """Carga (o recarga) en memoria la tabla de lookup de una columna"""
+        lookup = ENUM_COLUMNS[column][1]
+        conn = self._get_connection()
+
+        try:
+            rows = conn.execute(f"SELECT id, name FROM {lookup}").fetchall()
+            self._enum_ids[column] = {row['name']: row['id'] for row in rows}
+            self._enum_names[column] = {row['id']: row['name'] for row in rows}
         finally:
             conn.close()
 
+    def enum_name(self, column: str, code: Optional[int]) -> Optional[str]:
+        """
+        Traduce un código entero a su nombre (p. ej. status_id 2 -> 'connected')
+
+        Args:
+            column: Columna lógica ('status', 'interaction_type', 'outcome', 'reminder_type')
+            code: Código almacenado
+
+        Returns:
+            Nombre o None si el código es None o desconocido
+        """
+        if code is None:
+            return None
+
+        names = self._enum_names.get(column)
+        if names is None or code not in names:
+            self._load_enum(column)
+            names = self._enum_names[column]
+
+        return names.get(code)
+
+    def enum_code(self, column: str, name: Optional[str]) -> Optional[int]:
+        """
+        Traduce un nombre a su código entero sin crearlo (para filtros)
+
+        Returns:
+            Código o None si el valor no existe (ninguna fila lo usa)
+        """
+        if name is None:
+            return None
+
+        ids = self._enum_ids.get(column)
+        if ids is None or name not in ids:
+            self._load_enum(column)
+            ids = self._enum_ids[column]
+
+        return ids.get(name)
+
+    def _enum_code_for_write(self, cursor: sqlite3.Cursor, column: str,
+                             name: Optional[str]) -> Optional[int]:
+        """
+        Obtiene el código de un valor dentro de una escritura, creándolo si es nuevo
+
+        Los valores nuevos no se cachean hasta que se lean ya confirmados,
+        por si la transacción se revierte (p. ej. en un reintento).
+        """
+        if name is None:
+            return None
+
+        code = (self._enum_ids.get(column) or {}).get(name)
+        if code is not None:
+            return code
+
+        lookup = ENUM_COLUMNS[column][1]
+        cursor.execute(f"INSERT OR IGNORE INTO {lookup} (name) VALUES (?)", (name,))
+        cursor.execute(f"SELECT id FROM {lookup} WHERE name = ?", (name,))
+        return cursor.fetchone()[0]
+
+    def _row_to_dict(self, row: sqlite3.Row) -> Dict:
+        """Convierte una fila en diccionario reemplazando los códigos por sus nombres"""
+        data = dict(row)
+
+        if not any(f"{column}_id" in data for column in ENUM_COLUMNS):
+            return data
+
+        decoded = {}
+        for key, value in data.items():
+            column = key[:-3] if key.endswith('_id') else None
+            if column in ENUM_COLUMNS:
+                decoded[column] = self.enum_name(column, value)
+            else:
+                decoded[key] = value
+
+        return decoded
+
+    def _insert_contact(self, cursor: sqlite3.Cursor, contact_data: Dict, now: str) -> int:
+        """
+        Inserta (o reemplaza) un contacto y sus detalles dentro de una escritura
+
+        Args:
+            cursor: Cursor de la transacción en curso
+            contact_data: Diccionario con los datos del contacto
+            now: Fecha actual en formato ISO
+
+        Returns:
+            ID del contacto
+        """
+        status_id = self._enum_code_for_write(
+            cursor, 'status', contact_data.get('status', 'pending')
+        )
+
+        # INSERT OR REPLACE borraría al otro contacto que tenga ese email
+        email = normalize_email(contact_data.get('email'))
+        if email:
+            cursor.execute("SELECT linkedin_url FROM contacts WHERE email = ?", (email,))
+            row = cursor.fetchone()
+            if row and row[0] != contact_data.get('linkedin_url'):
+                raise sqlite3.IntegrityError(f"El email {email} ya pertenece a otro contacto")
+
+        cursor.execute(f"INSERT OR REPLACE {CONTACT_INSERT_SQL}",
+                       self._contact_row(contact_data, status_id, now))
+        contact_id = cursor.lastrowid
+
+        details = [contact_data.get(column) for column in CONTACT_DETAIL_COLUMNS]
+        if any(value is not None for value in details):
+            cursor.execute("""
+                INSERT OR REPLACE INTO contact_details (contact_id, about, skills, notes)
+                VALUES (?, ?, ?, ?)
+            """, (contact_id, *details))
+
+        return contact_id
+
+    def _contact_row(self, contact_data: Dict, status_id: int, now: str) -> Tuple:
+        """Valores de CONTACT_INSERT_SQL para un contacto"""
+        return (
+            contact_data.get('linkedin_url'),
+            contact_data.get('name'),
+            contact_data.get('job_title'),
+            contact_data.get('company'),
+            contact_data.get('location'),
+            contact_data.get('industry'),
+            contact_data.get('first_contact_date', now),
+            contact_data.get('last_contact_date', now),
+            status_id,
+            contact_data.get('connection_message_sent', 0),
+            contact_data.get('follow_up_count', 0),
+            now,
+            normalize_email(contact_data.get('email'))
+        )
+
+    def _bulk_insert_contacts(self, cursor: sqlite3.Cursor, contacts: List[Dict],
+                              now: str) -> List[int]:
+        """
+        Inserta contactos nuevos con executemany dentro de una escritura
+
+        Las URLs no deben existir todavía (ver add_contacts_batch).
+
+        Args:
+            cursor: Cursor de la transacción en curso
+            contacts: Contactos a insertar
+            now: Fecha actual en formato ISO
+
+        Returns:
+            IDs de los contactos, en el mismo orden
+        """
+        status_ids = {
+            name: self._enum_code_for_write(cursor, 'status', name)
+            for name in {contact_data.get('status', 'pending') for contact_data in contacts}
+        }
+
+        cursor.executemany(f"INSERT {CONTACT_INSERT_SQL}", (
+            self._contact_row(contact_data, status_ids[contact_data.get('status', 'pending')], now)
+            for contact_data in contacts
+        ))
+
+        urls = [contact_data['linkedin_url'] for contact_data in contacts]
+        cursor.execute("""
+            SELECT c.linkedin_url, c.id
+            FROM json_each(?) j
+            JOIN contacts c ON c.linkedin_url = j.value
+        """, (json.dumps(urls),))
+        ids = dict(cursor.fetchall())
+
+        cursor.executemany("""
+            INSERT OR REPLACE INTO contact_details (contact_id, about, skills, notes)
+            VALUES (?, ?, ?, ?)
+        """, (
+            (ids[contact_data['linkedin_url']], *details)
+            for contact_data in contacts
+            for details in [[contact_data.get(column) for column in CONTACT_DETAIL_COLUMNS]]
+            if any(value is not None for value in details)
+        ))
+
+        return [ids[url] for url in urls]
+
     def add_contact(self, contact_data: Dict) -> Optional[int]:
         """
         Agrega un nuevo contacto a la base de datos
@@ -131,62 +1221,453 @@ class ContactDatabase:
         Returns:
             ID del contacto agregado o None si hubo error
         """
+        now = datetime.now().isoformat()
+
+        try:
+            contact_id = self._run_write(lambda cursor: self._insert_contact(cursor, contact_data, now))
+            logger.info(f"Contacto agregado: {contact_data.get('name')} (ID: {contact_id})")
+            return contact_id
+
+        except sqlite3.IntegrityError as e:
+            logger.warning(f"El contacto con URL {contact_data.get('linkedin_url')} ya existe ({e})")
+            return None
+        except Exception as e:
+            logger.error(f"Error agregando contacto: {e}")
+            return None
+
+    def add_contacts_batch(self, contacts: List[Dict]) -> Optional[List[Optional[int]]]:
+        """
+        Agrega un lote de contactos nuevos en una sola transacción
+
+        Los contactos cuya URL o email ya existe (en la base o antes en el
+        mismo lote) se omiten sin modificarse; la existencia se resuelve con
+        un JOIN por lote.
+
+        Args:
+            contacts: Lista de diccionarios con los datos de cada contacto
+
+        Returns:
+            Lista paralela a contacts con el ID agregado, None si ya existía
+            o 0 si falló esa fila; None si falló el lote completo
+        """
+        now = datetime.now().isoformat()
+
+        def operation(cursor: sqlite3.Cursor) -> List[Optional[int]]:
+            existing = self._existing_urls(
+                cursor, [contact_data.get('linkedin_url') for contact_data in contacts]
+            )
+            emails = [normalize_email(contact_data.get('email')) for contact_data in contacts]
+            existing_emails = set(self._existing_emails(cursor, emails))
+            results = [None] * len(contacts)
+            new = []
+
+            for i, (contact_data, email) in enumerate(zip(contacts, emails)):
+                linkedin_url = contact_data.get('linkedin_url')
+                if linkedin_url in existing or email in existing_emails:
+                    continue
+
+                # Los siguientes con la misma URL o email en el lote son duplicados
+                existing.add(linkedin_url)
+                if email:
+                    existing_emails.add(email)
+                new.append(i)
+
+            ids = self._insert_new_contacts(cursor, [contacts[i] for i in new], now)
+            for i, contact_id in zip(new, ids):
+                results[i] = contact_id
+
+            return results
+
+        try:
+            results = self._run_write(operation)
+            logger.debug(f"Lote de contactos agregado: {sum(1 for r in results if r)} nuevos")
+            return results
+
+        except Exception as e:
+            logger.error(f"Error agregando lote de contactos: {e}")
+            return None
+
+    def upsert_contacts_batch(self, contacts: List[Dict],
+                              import_run: Optional[int] = None) -> Optional[List[str]]:
+        """
+        Agrega o actualiza un lote de contactos importados en una transacción
+
+        Compara en bloque el hash de los campos importados (IMPORT_HASH_FIELDS)
+        con el guardado: solo se escriben en contacts los nuevos y los que
+        cambiaron; estado, notas e historial de los existentes no se tocan.
+
+        Args:
+            contacts: Contactos mapeados del CSV
+            import_run: ID de la importación, para marcar los contactos vistos
+
+        Returns:
+            Lista paralela a contacts con 'added', 'changed', 'unchanged',
+            'duplicate' (URL repetida en el lote) o 'error'; None si falló el lote
+        """
+        now = datetime.now().isoformat()
+
+        def operation(cursor: sqlite3.Cursor) -> List[str]:
+            urls = [contact_data.get('linkedin_url') for contact_data in contacts]
+            cursor.execute(f"""
+                SELECT c.linkedin_url, c.id, s.content_hash,
+                       {', '.join(f'c.{field}' for field in IMPORT_HASH_FIELDS)}
+                FROM json_each(?) j
+                JOIN contacts c ON c.linkedin_url = j.value
+                LEFT JOIN contact_import_state s ON s.contact_id = c.id
+            """, (json.dumps([url for url in urls if url]),))
+            existing = {row['linkedin_url']: row for row in cursor.fetchall()}
+
+            results = [None] * len(contacts)
+            hashes = [content_hash(contact_data) for contact_data in contacts]
+            emails = [normalize_email(contact_data.get('email')) for contact_data in contacts]
+            taken_emails = set(self._existing_emails(cursor, emails))
+            seen_urls = set()
+            new, changed, seen = [], [], []
+
+            for i, (contact_data, url) in enumerate(zip(contacts, urls)):
+                if url in seen_urls:
+                    results[i] = 'duplicate'
+                    continue
+                seen_urls.add(url)
+
+                row = existing.get(url)
+                if row is None:
+                    # URL nueva con el email de otro contacto: es ese contacto
+                    if emails[i] in taken_emails:
+                        results[i] = 'duplicate'
+                        continue
+                    if emails[i]:
+                        taken_emails.add(emails[i])
+                    new.append(i)
+                    continue
+
+                # Contactos sin hash guardado: se compara con sus valores actuales
+                stored_hash = row['content_hash'] or content_hash(dict(row))
+                if stored_hash == hashes[i]:
+                    results[i] = 'unchanged'
+                else:
+                    results[i] = 'changed'
+                    changed.append((*(contact_data.get(field) for field in IMPORT_HASH_FIELDS),
+                                    now, row['id']))
+                seen.append((row['id'], hashes[i], import_run))
+
+            if changed:
+                assignments = ', '.join(f"{field} = ?" for field in IMPORT_HASH_FIELDS)
+                cursor.executemany(f"""
+                    UPDATE contacts SET {assignments}, updated_at = ? WHERE id = ?
+                """, changed)
+
+            ids = self._insert_new_contacts(cursor, [contacts[i] for i in new], now)
+            for i, contact_id in zip(new, ids):
+                results[i] = 'added' if contact_id else 'error'
+                if contact_id:
+                    seen.append((contact_id, hashes[i], import_run))
+
+            cursor.executemany("""
+                INSERT OR REPLACE INTO contact_import_state (contact_id, content_hash, last_import_run)
+                VALUES (?, ?, ?)
+            """, seen)
+
+            return results
+
+        try:
+            results = self._run_write(operation)
+            logger.debug(f"Lote reimportado: {results.count('added')} nuevos, "
+                        f"{results.count('changed')} actualizados")
+            return results
+
+        except Exception as e:
+            logger.error(f"Error reimportando lote de contactos: {e}")
+            return None
+
+    def count_missing_from_import(self, import_run: int) -> int:
+        """
+        Cuenta los contactos importados antes que no aparecieron en una importación
+
+        Solo cuentan los contactos que trajo una importación anterior del mismo
+        archivo (mismo nombre: cada exportación de LinkedIn llega en un ZIP con
+        la fecha, pero adentro siempre está Connections.csv). Los cargados a mano
+        o desde otra fuente no faltan de este archivo.
+
+        Args:
+            import_run: ID de la importación (upsert) ya terminada
+
+        Returns:
+            Cantidad de contactos de esa fuente no vistos en ese run
+        """
         conn = self._get_connection()
         cursor = conn.cursor()
 
         try:
-            now = datetime.now().isoformat()
+            cursor.execute("SELECT id, source FROM import_runs")
+            runs = cursor.fetchall()
+            names = {run_id: _source_name(source) for run_id, source in runs}
+            previous = [run_id for run_id, name in names.items()
+                        if run_id != import_run and name == names.get(import_run)]
 
             cursor.execute("""
-                INSERT OR REPLACE INTO contacts (
-                    linkedin_url, name, job_title, company, location,
-                    industry, about, skills, notes, first_contact_date,
-                    last_contact_date, status, connection_message_sent,
-                    follow_up_count, updated_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                contact_data.get('linkedin_url'),
-                contact_data.get('name'),
-                contact_data.get('job_title'),
-                contact_data.get('company'),
-                contact_data.get('location'),
-                contact_data.get('industry'),
-                contact_data.get('about'),
-                contact_data.get('skills'),
-                contact_data.get('notes'),
-                contact_data.get('first_contact_date', now),
-                contact_data.get('last_contact_date', now),
-                contact_data.get('status', 'pending'),
-                contact_data.get('connection_message_sent', 0),
-                contact_data.get('follow_up_count', 0),
-                now
-            ))
+                SELECT COUNT(*) FROM contact_import_state s
+                JOIN json_each(?) j ON j.value = s.last_import_run
+            """, (json.dumps(previous),))
+            return cursor.fetchone()[0]
 
-            conn.commit()
-            contact_id = cursor.lastrowid
-            logger.info(f"Contacto agregado: {contact_data.get('name')} (ID: {contact_id})")
-            return contact_id
+        except Exception as e:
+            logger.error(f"Error contando contactos faltantes: {e}")
+            return 0
+        finally:
+            conn.close()
+
+    def _insert_new_contacts(self, cursor: sqlite3.Cursor, contacts: List[Dict],
+                             now: str) -> List[int]:
+        """
+        Inserta contactos con URL nueva: en bloque, o fila por fila si alguno falla
+
+        Returns:
+            IDs en el mismo orden (0 para las filas que fallaron)
+        """
+        if not contacts:
+            return []
+
+        cursor.execute("SAVEPOINT bulk_contacts")
+        try:
+            ids = self._bulk_insert_contacts(cursor, contacts, now)
+            cursor.execute("RELEASE bulk_contacts")
+            return ids
+        except sqlite3.Error as e:
+            cursor.execute("ROLLBACK TO bulk_contacts")
+            cursor.execute("RELEASE bulk_contacts")
+            logger.warning(f"Inserción masiva fallida ({e}), insertando fila por fila")
+
+        ids = []
+        for contact_data in contacts:
+            try:
+                ids.append(self._insert_contact(cursor, contact_data, now))
+            except sqlite3.Error as e:
+                logger.error(f"Error agregando contacto {contact_data.get('name')}: {e}")
+                ids.append(0)
+
+        return ids
+
+    def _existing_urls(self, cursor: sqlite3.Cursor, urls: List[str]) -> set:
+        """
+        Resuelve qué URLs de un lote ya existen con un solo JOIN
+
+        Las URLs viajan como un único parámetro JSON que json_each expande
+        y se cruzan con el índice único de contacts.linkedin_url.
+
+        Args:
+            cursor: Cursor de la transacción en curso
+            urls: URLs del lote
+
+        Returns:
+            Conjunto de URLs que ya están en contacts
+        """
+        cursor.execute("""
+            SELECT c.linkedin_url
+            FROM json_each(?) j
+            JOIN contacts c ON c.linkedin_url = j.value
+        """, (json.dumps([url for url in urls if url]),))
+        return {row[0] for row in cursor.fetchall()}
+
+    def _existing_emails(self, cursor: sqlite3.Cursor,
+                         emails: List[Optional[str]]) -> Dict[str, int]:
+        """
+        Resuelve qué emails (ya normalizados) de un lote existen, con un solo JOIN
+
+        Returns:
+            Diccionario email -> ID del contacto que lo tiene
+        """
+        emails = [email for email in emails if email]
+        if not emails:
+            return {}
+
+        cursor.execute("""
+            SELECT c.email, c.id
+            FROM json_each(?) j
+            JOIN contacts c ON c.email = j.value
+        """, (json.dumps(emails),))
+        return dict(cursor.fetchall())
+
+    # ===== IMPORTACIONES (checkpoints en import_runs) =====
+
+    def start_import_run(self, source: str, fingerprint: str,
+                         total_bytes: Optional[int] = None, upsert: bool = False,
+                         engine: Optional[str] = None) -> Optional[int]:
+        """
+        Registra el inicio de una importación
+
+        Args:
+            source: Archivo importado (ruta, y miembro si viene de un ZIP)
+            fingerprint: Huella del contenido, para reconocer el mismo archivo al reanudar
+            total_bytes: Tamaño del CSV en bytes (para calcular el progreso)
+            upsert: Si la importación actualiza los contactos existentes
+            engine: Motor de lectura del CSV ('rows' o 'pandas'; None para adaptadores)
+
+        Returns:
+            ID de la importación o None si hubo error
+        """
+        def operation(cursor: sqlite3.Cursor) -> int:
+            cursor.execute("""
+                INSERT INTO import_runs (source, fingerprint, total_bytes, upsert, engine)
+                VALUES (?, ?, ?, ?, ?)
+            """, (source, fingerprint, total_bytes, int(upsert), engine))
+            return cursor.lastrowid
+
+        try:
+            run_id = self._run_write(operation)
+            logger.info(f"Importación {run_id} iniciada: {source}")
+            return run_id
 
-        except sqlite3.IntegrityError:
-            logger.warning(f"El contacto con URL {contact_data.get('linkedin_url')} ya existe")
-            return None
         except Exception as e:
-            logger.error(f"Error agregando contacto: {e}")
+            logger.error(f"Error registrando importación: {e}")
             return None
+
+    def update_import_run(self, run_id: int, **kwargs) -> bool:
+        """
+        Guarda el checkpoint o el estado de una importación
+
+        Args:
+            run_id: ID de la importación
+            **kwargs: Campos a actualizar (ver IMPORT_RUN_FIELDS)
+
+        Returns:
+            True si se actualizó correctamente
+        """
+        fields = {key: value for key, value in kwargs.items() if key in IMPORT_RUN_FIELDS}
+
+        if not fields:
+            return False
+
+        def operation(cursor: sqlite3.Cursor) -> None:
+            assignments = ', '.join(f"{key} = ?" for key in fields)
+            cursor.execute(f"""
+                UPDATE import_runs
+                SET {assignments}, updated_at = ?
+                WHERE id = ?
+            """, (*fields.values(), datetime.now().isoformat(), run_id))
+
+        try:
+            self._run_write(operation)
+            return True
+
+        except Exception as e:
+            logger.error(f"Error actualizando importación {run_id}: {e}")
+            return False
+
+    def get_import_run(self, run_id: int) -> Optional[Dict]:
+        """
+        Obtiene el estado de una importación (se puede consultar mientras corre)
+
+        Returns:
+            Diccionario con el checkpoint y 'progress' (0 a 1) o None
+        """
+        runs = self._query_import_runs("WHERE id = ?", (run_id,))
+        return runs[0] if runs else None
+
+    def get_import_runs(self, limit: int = 10) -> List[Dict]:
+        """Obtiene las últimas importaciones, la más reciente primero"""
+        return self._query_import_runs("ORDER BY id DESC LIMIT ?", (limit,))
+
+    def get_resumable_import_run(self, fingerprint: str) -> Optional[Dict]:
+        """
+        Busca la importación a reanudar de un archivo: la última que se
+        hizo de ese archivo, si no terminó
+
+        Args:
+            fingerprint: Huella del contenido del archivo
+
+        Returns:
+            Importación a reanudar o None
+        """
+        runs = self._query_import_runs("""
+            WHERE id = (SELECT MAX(id) FROM import_runs WHERE fingerprint = ?)
+              AND status != 'completed'
+        """, (fingerprint,))
+        return runs[0] if runs else None
+
+    def get_last_import_run(self, fingerprint: str) -> Optional[Dict]:
+        """
+        Última importación de un archivo, terminada o no
+
+        Args:
+            fingerprint: Huella del contenido del archivo
+
+        Returns:
+            Importación o None si ese contenido nunca se importó
+        """
+        runs = self._query_import_runs("""
+            WHERE id = (SELECT MAX(id) FROM import_runs WHERE fingerprint = ?)
+        """, (fingerprint,))
+        return runs[0] if runs else None
+
+    def _query_import_runs(self, where: str, params: Tuple) -> List[Dict]:
+        """Consulta import_runs agregando el progreso calculado"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute(f"SELECT * FROM import_runs {where}", params)
+
+            runs = []
+            for row in cursor.fetchall():
+                run = dict(row)
+                run['progress'] = (min(1.0, run['byte_offset'] / run['total_bytes'])
+                                   if run['total_bytes'] else None)
+                runs.append(run)
+
+            return runs
+
+        except Exception as e:
+            logger.error(f"Error obteniendo importaciones: {e}")
+            return []
         finally:
             conn.close()
 
+    def _contact_projection(self, columns: Optional[List[str]] = None) -> Tuple[str, str]:
+        """
+        Arma la proyección de una consulta de contactos (alias c)
+
+        Los detalles (about, skills, notes) solo se unen si se piden.
+
+        Args:
+            columns: Columnas a leer (None = todas, incluidos los detalles)
+
+        Returns:
+            Tupla (columnas del SELECT, JOIN a agregar después de FROM contacts c)
+        """
+        details_join = "LEFT JOIN contact_details d ON d.contact_id = c.id"
+
+        if columns is None:
+            return "c.*, d.about, d.skills, d.notes", details_join
+
+        select = []
+        needs_details = False
+
+        for column in columns:
+            if column in CONTACT_DETAIL_COLUMNS:
+                select.append(f"d.{column}")
+                needs_details = True
+            elif column in ENUM_COLUMNS and column in CONTACT_COLUMNS:
+                select.append(f"c.{column}_id")
+            elif column in CONTACT_COLUMNS:
+                select.append(f"c.{column}")
+            else:
+                raise ValueError(f"Columna de contacto desconocida: {column}")
+
+        return ", ".join(select), details_join if needs_details else ""
+
     def get_contact(self, contact_id: int) -> Optional[Dict]:
-        """Obtiene un contacto por su ID"""
+        """Obtiene un contacto por su ID (con todos sus detalles)"""
         conn = self._get_connection()
         cursor = conn.cursor()
 
         try:
-            cursor.execute("SELECT * FROM contacts WHERE id = ?", (contact_id,))
+            select, join = self._contact_projection()
+            cursor.execute(f"SELECT {select} FROM contacts c {join} WHERE c.id = ?", (contact_id,))
             row = cursor.fetchone()
 
             if row:
-                return dict(row)
+                return self._row_to_dict(row)
             return None
 
         except Exception as e:
@@ -201,11 +1682,13 @@ class ContactDatabase:
         cursor = conn.cursor()
 
         try:
-            cursor.execute("SELECT * FROM contacts WHERE linkedin_url = ?", (linkedin_url,))
+            select, join = self._contact_projection()
+            cursor.execute(f"SELECT {select} FROM contacts c {join} WHERE c.linkedin_url = ?",
+                           (linkedin_url,))
             row = cursor.fetchone()
 
             if row:
-                return dict(row)
+                return self._row_to_dict(row)
             return None
 
         except Exception as e:
@@ -214,68 +1697,235 @@ class ContactDatabase:
         finally:
             conn.close()
 
+    def get_contact_by_email(self, email: str) -> Optional[Dict]:
+        """Obtiene un contacto por su email (sin distinguir mayúsculas)"""
+        email = normalize_email(email)
+        if not email:
+            return None
+
+        conn = self._get_connection()
+        cursor = conn.cursor()
+
+        try:
+            select, join = self._contact_projection()
+            cursor.execute(f"SELECT {select} FROM contacts c {join} WHERE c.email = ?", (email,))
+            row = cursor.fetchone()
+
+            if row:
+                return self._row_to_dict(row)
+            return None
+
+        except Exception as e:
+            logger.error(f"Error obteniendo contacto por email: {e}")
+            return None
+        finally:
+            conn.close()
+
+    def get_contacts_by_emails(self, emails: List[str],
+                               columns: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """
+        Busca muchos emails a la vez (p. ej. para unir una fuente sin URL de LinkedIn)
+
+        Los emails viajan como un único parámetro JSON que se cruza con el
+        índice de contacts.email, en una sola consulta.
+
+        Args:
+            emails: Emails a buscar (se normalizan)
+            columns: Columnas a leer (None = todas)
+
+        Returns:
+            Diccionario email normalizado -> contacto, solo con los encontrados
+        """
+        emails = sorted({email for email in map(normalize_email, emails) if email})
+        if not emails:
+            return {}
+
+        conn = self._get_connection()
+        cursor = conn.cursor()
+
+        try:
+            select, join = self._contact_projection(columns)
+            cursor.execute(f"""
+                SELECT c.email AS lookup_email, {select}
+                FROM json_each(?) j
+                JOIN contacts c ON c.email = j.value
+                {join}
+            """, (json.dumps(emails),))
+
+            found = {}
+            for row in cursor.fetchall():
+                contact = self._row_to_dict(row)
+                found[contact.pop('lookup_email')] = contact
+            return found
+
+        except Exception as e:
+            logger.error(f"Error buscando contactos por email: {e}")
+            return {}
+        finally:
+            conn.close()
+
     def get_all_contacts(self, status: Optional[str] = None,
-                        limit: Optional[int] = None) -> List[Dict]:
+                        limit: Optional[int] = None,
+                        columns: Optional[List[str]] = None) -> List[Dict]:
         """
         Obtiene todos los contactos, opcionalmente filtrados por estado
 
         Args:
             status: Filtrar por estado ('pending', 'connected', 'rejected', etc.)
             limit: Limitar cantidad de resultados
+            columns: Columnas a leer (None = todas). Con LIST_COLUMNS la consulta
+                     se resuelve solo con los índices de cobertura
+
+        Returns:
+            Lista de contactos
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+
+        try:
+            select, join = self._contact_projection(columns)
+            query = f"SELECT {select} FROM contacts c {join}"
+            params = []
+
+            if status:
+                query += " WHERE c.status_id = ?"
+                params.append(self.enum_code('status', status))
+
+            query += " ORDER BY c.created_at DESC"
+
+            if limit:
+                query += " LIMIT ?"
+                params.append(limit)
+
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+
+            return [self._row_to_dict(row) for row in rows]
+
+        except Exception as e:
+            logger.error(f"Error obteniendo contactos: {e}")
+            return []
+        finally:
+            conn.close()
+
+    def iter_contacts(self, status: Optional[str] = None,
+                      columns: Optional[List[str]] = None,
+                      page_size: int = CONTACT_PAGE_SIZE,
+                      id_range: Optional[Tuple[int, int]] = None) -> Iterator[List[Dict]]:
+        """
+        Recorre los contactos por páginas, en orden de ID
+
+        Cada página es una consulta aparte que sigue desde el último ID leído
+        por la clave primaria, así la memoria no depende de la cantidad de
+        contactos y entre páginas no queda una lectura abierta que bloquee
+        las escrituras.
+
+        Args:
+            status: Filtrar por estado
+            columns: Columnas a leer (None = todas); id se agrega si falta
+            page_size: Contactos por página
+            id_range: Recorrer solo los IDs entre (primero, último), inclusive
+
+        Yields:
+            Listas de hasta page_size contactos
+
+        Raises:
+            sqlite3.Error: Si falla la lectura de una página (el recorrido no
+                           se corta en silencio: quien lo usa sabe que quedó incompleto)
+        """
+        query, params = self.contact_page_query(status, columns)
+        conn = self._get_connection()
+        last_id, end_id = (id_range[0] - 1, id_range[1]) if id_range else (0, MAX_ROWID)
+
+        try:
+            while True:
+                rows = conn.execute(query, [last_id, end_id, *params, page_size]).fetchall()
+                if not rows:
+                    break
+
+                last_id = rows[-1]['id']
+                yield [self._row_to_dict(row) for row in rows]
+
+                if len(rows) < page_size:
+                    break
+
+        except Exception as e:
+            logger.error(f"Error recorriendo contactos: {e}")
+            raise
+        finally:
+            conn.close()
+
+    def contact_page_query(self, status: Optional[str] = None,
+                           columns: Optional[List[str]] = None) -> Tuple[str, List]:
+        """
+        Consulta de una página de iter_contacts
+
+        La pueden correr otras conexiones (los procesos de mail_merge la
+        corren en una conexión de solo lectura). Sus parámetros son el último
+        ID leído, el último ID a recorrer, los de la lista devuelta y el
+        tamaño de la página.
+
+        Args:
+            status: Filtrar por estado
+            columns: Columnas a leer (None = todas); id se agrega si falta
 
         Returns:
-            Lista de contactos
+            Tupla (SQL, parámetros del filtro)
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        if columns is not None and 'id' not in columns:
+            columns = ['id'] + list(columns)
 
-        try:
-            query = "SELECT * FROM contacts"
-            params = []
+        select, join = self._contact_projection(columns)
+        # +c.status_id: filtrar sin usar el índice de estado, así el recorrido
+        # va por rango de ID y no ordena el estado completo en cada página
+        query = f"SELECT {select} FROM contacts c {join} WHERE c.id > ? AND c.id <= ?"
+        params = []
 
-            if status:
-                query += " WHERE status = ?"
-                params.append(status)
+        if status:
+            query += " AND +c.status_id = ?"
+            params.append(self.enum_code('status', status))
 
-            query += " ORDER BY created_at DESC"
+        query += " ORDER BY c.id LIMIT ?"
+        return query, params
 
-            if limit:
-                query += " LIMIT ?"
-                params.append(limit)
+    def get_contact_id_bounds(self) -> Tuple[int, int]:
+        """
+        Menor y mayor ID de contacto (para repartir la base en rangos)
 
-            cursor.execute(query, params)
-            rows = cursor.fetchall()
+        Returns:
+            Tupla (primer ID, último ID); (0, 0) si no hay contactos
+        """
+        conn = self._get_connection()
 
-            return [dict(row) for row in rows]
+        try:
+            first_id, last_id = conn.execute("SELECT MIN(id), MAX(id) FROM contacts").fetchone()
+            return first_id or 0, last_id or 0
 
         except Exception as e:
-            logger.error(f"Error obteniendo contactos: {e}")
-            return []
+            logger.error(f"Error obteniendo rango de IDs: {e}")
+            return 0, 0
         finally:
             conn.close()
 
     def update_contact_status(self, contact_id: int, status: str) -> bool:
         """Actualiza el estado de un contacto"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        now = datetime.now().isoformat()
 
-        try:
-            now = datetime.now().isoformat()
+        def operation(cursor: sqlite3.Cursor) -> None:
             cursor.execute("""
                 UPDATE contacts
-                SET status = ?, updated_at = ?
+                SET status_id = ?, updated_at = ?
                 WHERE id = ?
-            """, (status, now, contact_id))
+            """, (self._enum_code_for_write(cursor, 'status', status), now, contact_id))
 
-            conn.commit()
+        try:
+            self._run_write(operation)
             logger.info(f"Contacto {contact_id} actualizado a estado: {status}")
             return True
 
         except Exception as e:
             logger.error(f"Error actualizando estado: {e}")
             return False
-        finally:
-            conn.close()
 
     def update_contact(self, contact_id: int, **kwargs) -> bool:
         """
@@ -291,15 +1941,19 @@ class ContactDatabase:
         if not kwargs:
             return False
 
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        kwargs['updated_at'] = datetime.now().isoformat()
 
-        try:
-            now = datetime.now().isoformat()
-            kwargs['updated_at'] = now
+        def operation(cursor: sqlite3.Cursor) -> None:
+            fields = {k: v for k, v in kwargs.items() if k not in CONTACT_DETAIL_COLUMNS}
+            details = {k: v for k, v in kwargs.items() if k in CONTACT_DETAIL_COLUMNS}
 
-            set_clause = ", ".join(f"{k} = ?" for k in kwargs.keys())
-            values = list(kwargs.values()) + [contact_id]
+            if 'status' in fields:
+                fields['status_id'] = self._enum_code_for_write(cursor, 'status', fields.pop('status'))
+            if 'email' in fields:
+                fields['email'] = normalize_email(fields['email'])
+
+            set_clause = ", ".join(f"{k} = ?" for k in fields.keys())
+            values = list(fields.values()) + [contact_id]
 
             cursor.execute(f"""
                 UPDATE contacts
@@ -307,32 +1961,39 @@ class ContactDatabase:
                 WHERE id = ?
             """, values)
 
-            conn.commit()
+            if details and cursor.rowcount:
+                columns = ", ".join(details.keys())
+                placeholders = ", ".join('?' * len(details))
+                updates = ", ".join(f"{k} = excluded.{k}" for k in details.keys())
+
+                cursor.execute(f"""
+                    INSERT INTO contact_details (contact_id, {columns})
+                    VALUES (?, {placeholders})
+                    ON CONFLICT(contact_id) DO UPDATE SET {updates}
+                """, [contact_id] + list(details.values()))
+
+        try:
+            self._run_write(operation)
             logger.info(f"Contacto {contact_id} actualizado")
             return True
 
         except Exception as e:
             logger.error(f"Error actualizando contacto: {e}")
             return False
-        finally:
-            conn.close()
 
     def delete_contact(self, contact_id: int) -> bool:
         """Elimina un contacto"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        def operation(cursor: sqlite3.Cursor) -> None:
+            cursor.execute("DELETE FROM contacts WHERE id = ?", (contact_id,))
 
         try:
-            cursor.execute("DELETE FROM contacts WHERE id = ?", (contact_id,))
-            conn.commit()
+            self._run_write(operation)
             logger.info(f"Contacto {contact_id} eliminado")
             return True
 
         except Exception as e:
             logger.error(f"Error eliminando contacto: {e}")
             return False
-        finally:
-            conn.close()
 
     def add_interaction(self, contact_id: int, interaction_type: str,
                        message: str = None, outcome: str = None,
@@ -350,19 +2011,22 @@ class ContactDatabase:
         Returns:
             ID de la interacción o None si hubo error
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
-        try:
-            now = datetime.now().isoformat()
+        now = datetime.now().isoformat()
 
+        def operation(cursor: sqlite3.Cursor) -> int:
             cursor.execute("""
                 INSERT INTO interactions (
-                    contact_id, interaction_type, message, outcome, next_follow_up_date, created_at
+                    contact_id, interaction_type_id, message, outcome_id, next_follow_up_date, created_at
                 ) VALUES (?, ?, ?, ?, ?, ?)
-            """, (contact_id, interaction_type, message, outcome, next_follow_up, now))
+            """, (
+                contact_id,
+                self._enum_code_for_write(cursor, 'interaction_type', interaction_type),
+                message,
+                self._enum_code_for_write(cursor, 'outcome', outcome),
+                next_follow_up,
+                now
+            ))
 
-            conn.commit()
             interaction_id = cursor.lastrowid
 
             # Actualizar contador de follow-ups si corresponde
@@ -373,16 +2037,159 @@ class ContactDatabase:
                         last_contact_date = ?
                     WHERE id = ?
                 """, (now, contact_id))
-                conn.commit()
 
+            return interaction_id
+
+        try:
+            interaction_id = self._run_write(operation)
             logger.info(f"Interacción registrada para contacto {contact_id}")
             return interaction_id
 
         except Exception as e:
             logger.error(f"Error registrando interacción: {e}")
             return None
-        finally:
-            conn.close()
+
+    def add_interactions_batch(self, interactions: List[Dict]) -> Optional[List[Optional[int]]]:
+        """
+        Registra un lote de interacciones importadas en una transacción
+
+        El contacto de cada interacción se resuelve por su URL de LinkedIn con
+        un solo JOIN contra el índice de contacts; las que ya se importaron
+        (mismo source_ref) se omiten. No actualiza last_contact_date ni
+        follow_up_count: al terminar la importación se recalculan en bloque
+        con refresh_contact_activity.
+
+        Args:
+            interactions: Diccionarios con linkedin_url (o lista de URLs
+                candidatas en linkedin_urls), interaction_type, outcome,
+                message, created_at y source_ref
+
+        Returns:
+            Lista paralela a interactions con el ID del contacto si se registró,
+            None si ya estaba importada o 0 si la URL no es de ningún contacto;
+            None si falló el lote
+        """
+        def operation(cursor: sqlite3.Cursor) -> List[Optional[int]]:
+            candidates = [
+                interaction.get('linkedin_urls') or [interaction.get('linkedin_url')]
+                for interaction in interactions
+            ]
+            cursor.execute("""
+                SELECT c.linkedin_url, c.id
+                FROM json_each(?) j
+                JOIN contacts c ON c.linkedin_url = j.value
+            """, (json.dumps([url for urls in candidates for url in urls if url]),))
+            contact_ids = dict(cursor.fetchall())
+
+            refs = [interaction.get('source_ref') for interaction in interactions]
+            cursor.execute("""
+                SELECT i.source_ref
+                FROM json_each(?) j
+                JOIN interactions i ON i.source_ref = j.value
+            """, (json.dumps([ref for ref in refs if ref]),))
+            seen = {row[0] for row in cursor.fetchall()}
+
+            # Códigos de tipo y resultado resueltos una vez por lote
+            codes = {}
+
+            def code(column: str, name: Optional[str]) -> Optional[int]:
+                if (column, name) not in codes:
+                    codes[column, name] = self._enum_code_for_write(cursor, column, name)
+                return codes[column, name]
+
+            results = []
+            rows = []
+            for interaction, urls, ref in zip(interactions, candidates, refs):
+                contact_id = next((contact_ids[url] for url in urls if url in contact_ids), 0)
+                if contact_id and ref in seen:
+                    results.append(None)
+                    continue
+
+                results.append(contact_id)
+                if not contact_id:
+                    continue
+
+                if ref:
+                    seen.add(ref)
+                rows.append((
+                    contact_id,
+                    code('interaction_type', interaction['interaction_type']),
+                    interaction.get('message'),
+                    code('outcome', interaction.get('outcome')),
+                    interaction.get('created_at') or datetime.now().isoformat(),
+                    ref
+                ))
+
+            cursor.executemany("""
+                INSERT INTO interactions (
+                    contact_id, interaction_type_id, message, outcome_id, created_at, source_ref
+                ) VALUES (?, ?, ?, ?, ?, ?)
+            """, rows)
+
+            return results
+
+        try:
+            return self._run_write(operation)
+
+        except Exception as e:
+            logger.error(f"Error registrando lote de interacciones: {e}")
+            return None
+
+    def refresh_contact_activity(self, contact_ids: List[int]) -> bool:
+        """
+        Recalcula last_contact_date y follow_up_count a partir de las interacciones
+
+        Se hace con un solo UPDATE sobre todos los contactos indicados:
+        last_contact_date es la interacción más reciente y follow_up_count
+        cuenta los follow-ups registrados más los mensajes enviados después
+        de un primer contacto (invitación o mensaje) ya enviado.
+
+        Args:
+            contact_ids: IDs de los contactos a recalcular
+
+        Returns:
+            True si se actualizó correctamente
+        """
+        if not contact_ids:
+            return True
+
+        def operation(cursor: sqlite3.Cursor) -> None:
+            follow_up = self._enum_code_for_write(cursor, 'interaction_type', 'follow_up')
+            message = self._enum_code_for_write(cursor, 'interaction_type', 'message')
+            sent = self._enum_code_for_write(cursor, 'outcome', 'sent')
+
+            cursor.execute("""
+                UPDATE contacts SET
+                    last_contact_date = COALESCE(
+                        (SELECT MAX(i.created_at) FROM interactions i WHERE i.contact_id = contacts.id),
+                        last_contact_date
+                    ),
+                    follow_up_count = (
+                        SELECT COUNT(*) FROM interactions i
+                        WHERE i.contact_id = contacts.id
+                          AND (i.interaction_type_id = :follow_up
+                               OR (i.interaction_type_id = :message AND i.outcome_id = :sent
+                                   AND EXISTS (
+                                       SELECT 1 FROM interactions p
+                                       WHERE p.contact_id = i.contact_id
+                                         AND p.outcome_id = :sent
+                                         AND p.created_at < i.created_at
+                                   )))
+                    ),
+                    updated_at = :now
+                WHERE id IN (SELECT value FROM json_each(:ids))
+            """, {
+                'follow_up': follow_up, 'message': message, 'sent': sent,
+                'now': datetime.now().isoformat(), 'ids': json.dumps(list(contact_ids))
+            })
+
+        try:
+            self._run_write(operation)
+            return True
+
+        except Exception as e:
+            logger.error(f"Error recalculando actividad de contactos: {e}")
+            return False
 
     def get_contact_interactions(self, contact_id: int) -> List[Dict]:
         """Obtiene todas las interacciones de un contacto"""
@@ -397,7 +2204,7 @@ class ContactDatabase:
             """, (contact_id,))
 
             rows = cursor.fetchall()
-            return [dict(row) for row in rows]
+            return [self._row_to_dict(row) for row in rows]
 
         except Exception as e:
             logger.error(f"Error obteniendo interacciones: {e}")
@@ -419,26 +2226,65 @@ class ContactDatabase:
         Returns:
             ID del recordatorio o None si hubo error
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
-        try:
+        def operation(cursor: sqlite3.Cursor) -> int:
             cursor.execute("""
                 INSERT INTO reminders (
-                    contact_id, reminder_date, reminder_type, message
+                    contact_id, reminder_date, reminder_type_id, message
                 ) VALUES (?, ?, ?, ?)
-            """, (contact_id, reminder_date, reminder_type, message))
+            """, (
+                contact_id,
+                reminder_date,
+                self._enum_code_for_write(cursor, 'reminder_type', reminder_type),
+                message
+            ))
+            return cursor.lastrowid
 
-            conn.commit()
-            reminder_id = cursor.lastrowid
+        try:
+            reminder_id = self._run_write(operation)
             logger.info(f"Recordatorio agregado para contacto {contact_id}")
             return reminder_id
 
         except Exception as e:
             logger.error(f"Error agregando recordatorio: {e}")
             return None
-        finally:
-            conn.close()
+
+    def add_reminders_batch(self, reminders: List[Dict]) -> Optional[int]:
+        """
+        Agrega un lote de recordatorios en una transacción
+
+        Args:
+            reminders: Diccionarios con contact_id, reminder_date,
+                       reminder_type y message
+
+        Returns:
+            Cantidad de recordatorios agregados o None si hubo error
+        """
+        def operation(cursor: sqlite3.Cursor) -> int:
+            # Códigos de tipo resueltos una vez por lote
+            codes = {}
+            rows = []
+
+            for reminder in reminders:
+                reminder_type = reminder['reminder_type']
+                if reminder_type not in codes:
+                    codes[reminder_type] = self._enum_code_for_write(cursor, 'reminder_type',
+                                                                     reminder_type)
+                rows.append((reminder['contact_id'], reminder['reminder_date'],
+                             codes[reminder_type], reminder.get('message')))
+
+            cursor.executemany("""
+                INSERT INTO reminders (
+                    contact_id, reminder_date, reminder_type_id, message
+                ) VALUES (?, ?, ?, ?)
+            """, rows)
+            return len(rows)
+
+        try:
+            return self._run_write(operation)
+
+        except Exception as e:
+            logger.error(f"Error agregando lote de recordatorios: {e}")
+            return None
 
     def get_pending_reminders(self, days_ahead: int = 1) -> List[Dict]:
         """
@@ -461,7 +2307,7 @@ class ContactDatabase:
                 SELECT
                     r.id as reminder_id,
                     r.reminder_date,
-                    r.reminder_type,
+                    r.reminder_type_id,
                     r.message,
                     c.id as contact_id,
                     c.name,
@@ -476,7 +2322,7 @@ class ContactDatabase:
             """, (future_date.isoformat(),))
 
             rows = cursor.fetchall()
-            return [dict(row) for row in rows]
+            return [self._row_to_dict(row) for row in rows]
 
         except Exception as e:
             logger.error(f"Error obteniendo recordatorios: {e}")
@@ -486,23 +2332,119 @@ class ContactDatabase:
 
     def complete_reminder(self, reminder_id: int) -> bool:
         """Marca un recordatorio como completado"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
-        try:
+        def operation(cursor: sqlite3.Cursor) -> None:
             cursor.execute("""
                 UPDATE reminders
                 SET is_completed = 1
                 WHERE id = ?
             """, (reminder_id,))
 
-            conn.commit()
+        try:
+            self._run_write(operation)
             logger.info(f"Recordatorio {reminder_id} marcado como completado")
             return True
 
         except Exception as e:
             logger.error(f"Error completando recordatorio: {e}")
             return False
+
+    # ===== TEMPLATES DE MENSAJES =====
+
+    def save_template(self, template_type: str, name: str, content: str,
+                      tone: str = 'professional', days_after: Optional[int] = None) -> Optional[int]:
+        """
+        Guarda un template personalizado (si ya hay uno del mismo tipo y
+        nombre, lo reemplaza)
+
+        Args:
+            template_type: Tipo de template (connection, follow_up, thank_you)
+            name: Nombre del template
+            content: Contenido con variables {var}
+            tone: Tono del template
+            days_after: Días de espera (solo follow_up)
+
+        Returns:
+            ID del template o None si hubo error
+        """
+        now = datetime.now().isoformat()
+
+        def operation(cursor: sqlite3.Cursor) -> int:
+            cursor.execute("""
+                INSERT INTO templates (template_type, name, content, tone, days_after,
+                                       created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (template_type, name) DO UPDATE SET
+                    content = excluded.content,
+                    tone = excluded.tone,
+                    days_after = excluded.days_after,
+                    updated_at = excluded.updated_at
+                RETURNING id
+            """, (template_type, name, content, tone, days_after, now, now))
+            return cursor.fetchone()[0]
+
+        try:
+            template_id = self._run_write(operation)
+            logger.info(f"Template '{name}' ({template_type}) guardado")
+            return template_id
+
+        except Exception as e:
+            logger.error(f"Error guardando template: {e}")
+            return None
+
+    def delete_template(self, template_type: str, name: str) -> bool:
+        """Elimina un template personalizado"""
+        def operation(cursor: sqlite3.Cursor) -> int:
+            cursor.execute("DELETE FROM templates WHERE template_type = ? AND name = ?",
+                           (template_type, name))
+            return cursor.rowcount
+
+        try:
+            return self._run_write(operation) > 0
+
+        except Exception as e:
+            logger.error(f"Error eliminando template: {e}")
+            return False
+
+    def get_templates(self) -> List[Dict]:
+        """Obtiene los templates personalizados, en orden de alta"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute("""
+                SELECT id, template_type, name, content, tone, days_after, updated_at
+                FROM templates
+                ORDER BY id
+            """)
+            return [dict(row) for row in cursor.fetchall()]
+
+        except Exception as e:
+            logger.error(f"Error obteniendo templates: {e}")
+            return []
+        finally:
+            conn.close()
+
+    def get_templates_version(self) -> Optional[Tuple[int, str]]:
+        """
+        Versión de los templates guardados
+
+        Cambia con cada alta, edición o baja; es una sola lectura de la
+        tabla, para saber si hay que recargarlos sin leerlos completos.
+
+        Returns:
+            Tupla (cantidad, última modificación) o None si hubo error
+        """
+        conn = self._get_connection()
+
+        try:
+            count, updated_at = conn.execute(
+                "SELECT COUNT(*), COALESCE(MAX(updated_at), '') FROM templates"
+            ).fetchone()
+            return count, updated_at
+
+        except Exception as e:
+            logger.error(f"Error obteniendo versión de templates: {e}")
+            return None
         finally:
             conn.close()
 
@@ -520,11 +2462,14 @@ class ContactDatabase:
 
             # Contactos por estado
             cursor.execute("""
-                SELECT status, COUNT(*) as count
+                SELECT status_id, COUNT(*) as count
                 FROM contacts
-                GROUP BY status
+                GROUP BY status_id
             """)
-            stats['by_status'] = {row['status']: row['count'] for row in cursor.fetchall()}
+            stats['by_status'] = {
+                self.enum_name('status', row['status_id']): row['count']
+                for row in cursor.fetchall()
+            }
 
             # Contactos agregados esta semana
             week_ago = (datetime.now() - timedelta(days=7)).isoformat()
@@ -561,32 +2506,135 @@ class ContactDatabase:
         finally:
             conn.close()
 
-    def search_contacts(self, query: str) -> List[Dict]:
+    def facets(self, filters: Optional[Dict] = None,
+               dimensions: Optional[List[str]] = None,
+               top_n: Optional[int] = None) -> Dict:
+        """
+        Calcula la distribución de contactos en varias dimensiones a la vez
+
+        Cada dimensión es un GROUP BY aparte con el mismo filtro, que recorre
+        su índice (con el estado, para filtrar sin leer la tabla) y se corta
+        en top_n en la misma consulta.
+
+        Args:
+            filters: Filtros a aplicar ({'status': 'connected'} o
+                     {'company': ['Acme', 'Globex']})
+            dimensions: Dimensiones a contar (default: todas las de FACET_DIMENSIONS)
+            top_n: Limitar cada dimensión a los N valores más frecuentes
+
+        Returns:
+            Diccionario con 'total' y 'facets' ({dimensión: [(valor, cantidad), ...]})
+        """
+        dimensions = list(dimensions or FACET_DIMENSIONS)
+        filters = {k: v for k, v in (filters or {}).items() if v is not None}
+
+        for column in list(dimensions) + list(filters):
+            if column not in FACET_DIMENSIONS:
+                raise ValueError(f"Dimensión no soportada: {column}")
+
+        conn = self._get_connection()
+        cursor = conn.cursor()
+
+        try:
+            # Las columnas codificadas se agrupan por su código entero
+            def sql_column(dimension: str) -> str:
+                return f"{dimension}_id" if dimension in ENUM_COLUMNS else dimension
+
+            def sql_value(dimension: str, value: Any) -> Any:
+                return self.enum_code(dimension, value) if dimension in ENUM_COLUMNS else value
+
+            where = []
+            params = []
+
+            for column, value in filters.items():
+                if isinstance(value, (list, tuple, set)):
+                    values = [sql_value(column, v) for v in value]
+                    where.append(f"{sql_column(column)} IN ({', '.join('?' * len(values))})")
+                    params.extend(values)
+                else:
+                    where.append(f"{sql_column(column)} = ?")
+                    params.append(sql_value(column, value))
+
+            where_sql = " WHERE " + " AND ".join(where) if where else ""
+            cursor.execute(f"SELECT COUNT(*) FROM contacts{where_sql}", params)
+            total = cursor.fetchone()[0]
+
+            def decode(dimension: str, value: Any) -> Any:
+                return self.enum_name(dimension, value) if dimension in ENUM_COLUMNS else value
+
+            facets = {}
+
+            for dimension in dimensions:
+                column = sql_column(dimension)
+                conditions = list(where)
+                # Igual que en get_statistics, los valores vacíos no cuentan
+                if dimension != 'status':
+                    conditions.append(f"{column} != ''")
+
+                query = f"SELECT {column}, COUNT(*) AS count FROM contacts"
+                if conditions:
+                    query += " WHERE " + " AND ".join(conditions)
+                query += f" GROUP BY {column} ORDER BY count DESC, {column} LIMIT ?"
+
+                cursor.execute(query, params + [-1 if top_n is None else top_n])
+                facets[dimension] = [(decode(dimension, row[0]), row['count'])
+                                     for row in cursor.fetchall()]
+
+            return {'total': total, 'facets': facets}
+
+        except Exception as e:
+            logger.error(f"Error calculando facetas: {e}")
+            return {'total': 0, 'facets': {dimension: [] for dimension in dimensions}}
+        finally:
+            conn.close()
+
+    def search_contacts(self, query: str, fuzzy: bool = False,
+                        limit: Optional[int] = None,
+                        min_similarity: float = FUZZY_MIN_SIMILARITY,
+                        columns: Optional[List[str]] = None) -> List[Dict]:
         """
-        Busca contactos por nombre, empresa o cargo
+        Busca contactos por nombre, empresa, cargo, habilidades o email (exacto)
 
         Args:
             query: Término de búsqueda
+            fuzzy: Si es True, usa el índice de trigramas (tolera acentos y errores
+                   de tipeo en nombre y empresa) y ordena por similitud
+            limit: Máximo de resultados (default en modo difuso: 50)
+            min_similarity: Similitud mínima en modo difuso (0 a 1)
+            columns: Columnas a devolver (None = todas)
 
         Returns:
             Lista de contactos que coinciden
         """
+        if fuzzy:
+            return self._fuzzy_search(query, limit or 50, min_similarity, columns)
+
         conn = self._get_connection()
         cursor = conn.cursor()
 
         try:
             search_pattern = f"%{query}%"
-            cursor.execute("""
-                SELECT * FROM contacts
-                WHERE name LIKE ?
-                   OR company LIKE ?
-                   OR job_title LIKE ?
-                   OR skills LIKE ?
-                ORDER BY name ASC
-            """, (search_pattern, search_pattern, search_pattern, search_pattern))
+            select, join = self._contact_projection(columns)
+            sql = f"""
+                SELECT {select} FROM contacts c {join}
+                WHERE c.name LIKE ?
+                   OR c.company LIKE ?
+                   OR c.job_title LIKE ?
+                   OR c.id IN (SELECT contact_id FROM contact_details WHERE skills LIKE ?)
+                   OR c.email = ?
+                ORDER BY c.name ASC
+            """
+            params = [search_pattern, search_pattern, search_pattern, search_pattern,
+                      normalize_email(query)]
+
+            if limit:
+                sql += " LIMIT ?"
+                params.append(limit)
+
+            cursor.execute(sql, params)
 
             rows = cursor.fetchall()
-            return [dict(row) for row in rows]
+            return [self._row_to_dict(row) for row in rows]
 
         except Exception as e:
             logger.error(f"Error buscando contactos: {e}")
@@ -594,6 +2642,225 @@ class ContactDatabase:
         finally:
             conn.close()
 
+    def _fuzzy_search(self, query: str, limit: int, min_similarity: float,
+                      columns: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Búsqueda difusa por trigramas
+
+        Primero obtiene candidatos desde la tabla de trigramas (contactos que
+        comparten suficientes trigramas con la búsqueda) y luego los ordena por
+        similitud calculada sobre nombre y empresa. Solo lee: los contactos que
+        esperan en trigram_queue (editados desde la última importación) se
+        suman como candidatos leyéndolos directamente.
+
+        Los candidatos salen de los trigramas raros de la búsqueda (menos de
+        TRIGRAM_COMMON_POSTINGS entradas): uno común ("  j", "ez ") aparece en
+        buena parte de la red y agruparlo costaría tanto como recorrerla. Si
+        un contacto fuera de esos candidatos podría quedar entre los mejores,
+        se agrupan todos los trigramas pero solo hasta el ID en el que el más
+        común junta TRIGRAM_COMMON_POSTINGS entradas: exacto entre los
+        contactos más antiguos, aproximado para el resto de la red.
+        """
+        query_trigrams = text_trigrams(query)
+
+        if not query_trigrams:
+            return []
+
+        if columns is not None:
+            columns = list(columns) + [f for f in ('id',) + TRIGRAM_FIELDS if f not in columns]
+
+        conn = self._get_connection()
+        cursor = conn.cursor()
+
+        try:
+            select, join = self._contact_projection(columns)
+            min_hits = max(1, math.ceil(min_similarity * len(query_trigrams)))
+
+            # Un trigrama es común si tiene una entrada número TRIGRAM_COMMON_POSTINGS
+            # (búsqueda acotada en la clave primaria); su ID marca hasta dónde
+            # llegan sus primeras entradas
+            rare = []
+            max_id = None
+            for trigram in query_trigrams:
+                cursor.execute("""
+                    SELECT contact_id FROM contact_trigrams WHERE trigram = ?
+                    ORDER BY contact_id LIMIT 1 OFFSET ?
+                """, (trigram, TRIGRAM_COMMON_POSTINGS - 1))
+                row = cursor.fetchone()
+                if row is None:
+                    rare.append(trigram)
+                else:
+                    max_id = row[0] if max_id is None else min(max_id, row[0])
+
+            max_candidates = max(limit * 10, 200)
+
+            # Contactos nuevos o editados que todavía no están en el índice
+            cursor.execute(f"""
+                SELECT {select}
+                FROM trigram_queue q
+                JOIN contacts c ON c.id = q.contact_id
+                {join}
+            """)
+            candidates = {row['id']: row for row in cursor.fetchall()}
+
+            common = len(query_trigrams) - len(rare)
+            # Los trigramas comunes que falten cuentan como presentes
+            rare_hits = max(1, min_hits - common)
+
+            if rare:
+                candidates.update(self._trigram_candidates(cursor, select, join, rare,
+                                                           rare_hits, max_candidates))
+
+            results = self._score_candidates(candidates.values(), query_trigrams, min_similarity)
+            results.sort(key=lambda item: item[0], reverse=True)
+
+            # Similitud máxima de un contacto que no salió de los trigramas raros
+            missed = (common + rare_hits - 1) / len(query_trigrams)
+
+            if common and (len(results) < limit or missed > results[limit - 1][0][0]):
+                # Puede haber mejores coincidencias solo en trigramas comunes (p. ej.
+                # un error de tipeo en un nombre común): todos, hasta max_id
+                more = self._trigram_candidates(cursor, select, join, list(query_trigrams),
+                                                min_hits, max_candidates, max_id)
+                results.extend(self._score_candidates(
+                    (row for contact_id, row in more.items() if contact_id not in candidates),
+                    query_trigrams, min_similarity
+                ))
+
+            results.sort(key=lambda item: item[0], reverse=True)
+            return [contact for _, contact in results[:limit]]
+
+        except Exception as e:
+            logger.error(f"Error en búsqueda difusa: {e}")
+            return []
+        finally:
+            conn.close()
+
+    def _score_candidates(self, rows: Iterable[sqlite3.Row], query_trigrams: set,
+                          min_similarity: float) -> List[Tuple[Tuple[float, float], Dict]]:
+        """
+        Calcula la similitud de cada candidato (ver _fuzzy_search)
+
+        Returns:
+            Lista de ((similitud, jaccard), contacto) con similitud >= min_similarity
+        """
+        results = []
+
+        for row in rows:
+            contact = self._row_to_dict(row)
+
+            # Similitud = fracción de trigramas de la búsqueda presentes en el
+            # campo; Jaccard desempata a favor de coincidencias más exactas
+            best = (0.0, 0.0)
+            for field in TRIGRAM_FIELDS:
+                field_trigrams = text_trigrams(contact.get(field))
+                if not field_trigrams:
+                    continue
+                shared = len(query_trigrams & field_trigrams)
+                coverage = shared / len(query_trigrams)
+                jaccard = shared / len(query_trigrams | field_trigrams)
+                best = max(best, (coverage, jaccard))
+
+            if best[0] >= min_similarity:
+                contact['similarity'] = round(best[0], 3)
+                results.append((best, contact))
+
+        return results
+
+    def _trigram_candidates(self, cursor: sqlite3.Cursor, select: str, join: str,
+                            trigrams: List[str], min_hits: int, max_candidates: int,
+                            max_id: Optional[int] = None) -> Dict[int, Any]:
+        """
+        Contactos con al menos min_hits de los trigramas dados (ver _fuzzy_search)
+
+        Args:
+            max_id: Considerar solo los contactos con ID hasta este (None = todos)
+
+        Returns:
+            ID -> fila del contacto, los de más coincidencias primero
+        """
+        placeholders = ', '.join('?' * len(trigrams))
+        id_filter = "AND contact_id <= ?" if max_id is not None else ""
+        params = list(trigrams) + ([max_id] if max_id is not None else [])
+
+        cursor.execute(f"""
+            SELECT {select}
+            FROM (
+                SELECT contact_id, COUNT(*) AS hits
+                FROM contact_trigrams
+                WHERE trigram IN ({placeholders}) {id_filter}
+                GROUP BY contact_id
+                HAVING COUNT(*) >= ?
+                ORDER BY hits DESC
+                LIMIT ?
+            ) t
+            JOIN contacts c ON c.id = t.contact_id
+            {join}
+        """, (*params, min_hits, max_candidates))
+
+        return {row['id']: row for row in cursor.fetchall()}
+
+    def refresh_trigram_index(self, batch_size: int = 5000,
+                              max_batches: Optional[int] = None) -> int:
+        """
+        Indexa los contactos encolados en trigram_queue
+
+        Cada lote es una transacción. Un error (p. ej. la base bloqueada) se
+        registra y corta la actualización: lo que falta queda en la cola.
+
+        Args:
+            batch_size: Contactos por transacción
+            max_batches: Máximo de lotes (None = hasta vaciar la cola)
+
+        Returns:
+            Cantidad de contactos indexados
+        """
+        def index_batch(cursor: sqlite3.Cursor) -> int:
+            cursor.execute(f"""
+                SELECT q.contact_id, c.{', c.'.join(TRIGRAM_FIELDS)}
+                FROM trigram_queue q
+                LEFT JOIN contacts c ON c.id = q.contact_id
+                LIMIT ?
+            """, (batch_size,))
+            rows = cursor.fetchall()
+
+            ids = [(row['contact_id'],) for row in rows]
+            postings = []
+
+            for row in rows:
+                trigrams = set()
+                for field in TRIGRAM_FIELDS:
+                    trigrams |= text_trigrams(row[field])
+                postings.extend((trigram, row['contact_id']) for trigram in trigrams)
+
+            cursor.executemany("DELETE FROM contact_trigrams WHERE contact_id = ?", ids)
+            cursor.executemany("""
+                INSERT OR IGNORE INTO contact_trigrams (trigram, contact_id) VALUES (?, ?)
+            """, postings)
+            cursor.executemany("DELETE FROM trigram_queue WHERE contact_id = ?", ids)
+
+            return len(rows)
+
+        indexed = 0
+        batches = 0
+
+        while max_batches is None or batches < max_batches:
+            try:
+                count = self._run_write(index_batch)
+            except Exception as e:
+                logger.warning(f"Índice de trigramas sin actualizar: {e}")
+                break
+
+            if not count:
+                break
+            indexed += count
+            batches += 1
+
+        if indexed:
+            logger.info(f"Índice de trigramas actualizado: {indexed} contactos")
+
+        return indexed
+
     def get_contacts_due_for_followup(self, days_since_last_contact: int = 7) -> List[Dict]:
         """
         Obtiene contactos que necesitan follow-up
@@ -610,15 +2877,18 @@ class ContactDatabase:
         try:
             cutoff_date = (datetime.now() - timedelta(days=days_since_last_contact)).isoformat()
 
-            cursor.execute("""
-                SELECT * FROM contacts
-                WHERE status IN ('connected', 'responded')
-                  AND (last_contact_date IS NULL OR last_contact_date <= ?)
-                ORDER BY last_contact_date ASC
+            select, join = self._contact_projection()
+            cursor.execute(f"""
+                SELECT {select} FROM contacts c {join}
+                WHERE c.status_id IN (
+                    SELECT id FROM contact_statuses WHERE name IN ('connected', 'responded')
+                )
+                  AND (c.last_contact_date IS NULL OR c.last_contact_date <= ?)
+                ORDER BY c.last_contact_date ASC
             """, (cutoff_date,))
 
             rows = cursor.fetchall()
-            return [dict(row) for row in rows]
+            return [self._row_to_dict(row) for row in rows]
 
         except Exception as e:
             logger.error(f"Error obteniendo contactos para follow-up: {e}")
@@ -42,8 +42,12 @@ class ExportManager:
             Ruta del archivo o None
         """
         try:
-            # Obtener contactos
-            contacts = self.db.get_all_contacts(status=status_filter)
+            # Obtener contactos (solo las columnas que se exportan)
+            contacts = self.db.get_all_contacts(status=status_filter, columns=[
+                'id', 'name', 'job_title', 'company', 'location', 'industry',
+                'status', 'follow_up_count', 'skills', 'notes', 'linkedin_url',
+                'first_contact_date', 'last_contact_date'
+            ])
 
             if not contacts:
                 print("❌ No hay contactos para exportar")
@@ -107,13 +111,10 @@ class ExportManager:
                 if stats:
                     self._add_statistics_sheet(writer, stats, df_export)
 
-                # Hoja de distribución por estado
-                if 'Estado' in df_export.columns:
-                    self._add_status_distribution_sheet(writer, df_export)
-
-                # Hoja de top empresas
-                if 'Empresa' in df_export.columns:
-                    self._add_top_companies_sheet(writer, df_export)
+                # Hojas de distribución por estado y top empresas (un solo recorrido)
+                facets = self.db.facets({'status': status_filter}, ['status', 'company'], top_n=20)
+                self._add_status_distribution_sheet(writer, facets)
+                self._add_top_companies_sheet(writer, facets)
 
             # Aplicar formato
             self._format_excel(filename)
@@ -291,16 +292,11 @@ class ExportManager:
                     df_reminders = pd.DataFrame(reminders)
                     df_reminders.to_excel(writer, sheet_name='Recordatorios', index=False)
 
-                # 4. Distribución
-                if contacts:
-                    df_contacts = pd.DataFrame(contacts)
-                    if 'status' in df_contacts.columns:
-                        self._add_status_distribution_sheet(writer, df_contacts)
-
-                # 5. Top empresas
+                # 4 y 5. Distribución por estado y top empresas
                 if contacts:
-                    if 'company' in df_contacts.columns:
-                        self._add_top_companies_sheet(writer, df_contacts)
+                    facets = self.db.facets(dimensions=['status', 'company'], top_n=20)
+                    self._add_status_distribution_sheet(writer, facets)
+                    self._add_top_companies_sheet(writer, facets)
 
             self._format_excel(filename)
 
@@ -329,20 +325,18 @@ class ExportManager:
         df_stats = pd.DataFrame(stats_data)
         df_stats.to_excel(writer, sheet_name='Estadísticas', index=False)
 
-    def _add_status_distribution_sheet(self, writer, df: pd.DataFrame):
+    def _add_status_distribution_sheet(self, writer, facets: Dict):
         """Agrega hoja de distribución por estado"""
-        if 'Estado' in df.columns:
-            status_dist = df['Estado'].value_counts().reset_index()
-            status_dist.columns = ['Estado', 'Cantidad']
+        status_counts = facets['facets'].get('status')
+        if status_counts:
+            status_dist = pd.DataFrame(status_counts, columns=['Estado', 'Cantidad'])
             status_dist.to_excel(writer, sheet_name='Distribución Estado', index=False)
 
-    def _add_top_companies_sheet(self, writer, df: pd.DataFrame):
+    def _add_top_companies_sheet(self, writer, facets: Dict):
         """Agrega hoja de top empresas"""
-        if 'Empresa' in df.columns:
-            # Filtrar vacíos
-            df_filtered = df[df['Empresa'].notna() & (df['Empresa'] != '')]
-            top_companies = df_filtered['Empresa'].value_counts().head(20).reset_index()
-            top_companies.columns = ['Empresa', 'Cantidad']
+        company_counts = facets['facets'].get('company')
+        if company_counts:
+            top_companies = pd.DataFrame(company_counts, columns=['Empresa', 'Cantidad'])
             top_companies.to_excel(writer, sheet_name='Top Empresas', index=False)
 
     def _add_interaction_summary_sheet(self, writer, contact: Dict, df: pd.DataFrame):
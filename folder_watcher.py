@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Vigilancia de carpeta para Networking Suite
+Importa automáticamente las exportaciones que se dejan en una carpeta
+"""
+
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from database import ContactDatabase
+from csv_importer import LinkedInCSVImporter, QUARANTINE_SUFFIX, XLSX_EXTENSIONS
+from source_adapters import VCardSource, VCARD_EXTENSIONS
+
+logger = logging.getLogger(__name__)
+
+# Segundos entre dos revisiones de la carpeta
+WATCH_INTERVAL = 5.0
+
+# Archivos que se importan solos; un CSV, ZIP o Excel entra solo si es la
+# exportación de conexiones de LinkedIn (un CSV genérico necesita su mapeo)
+WATCH_EXTENSIONS = ('.csv', '.zip') + XLSX_EXTENSIONS + VCARD_EXTENSIONS
+
+# Revisiones seguidas que pueden saltearse el listado si la carpeta no cambió;
+# después se lista igual, para ver archivos sobrescritos en el lugar
+FULL_SCAN_EVERY = 12
+
+# Subcarpeta (dentro de la vigilada) a la que se mueven los archivos importados
+ARCHIVE_FOLDER_NAME = 'importados'
+
+
+class FolderWatcher:
+    """
+    Revisa una carpeta cada WATCH_INTERVAL segundos e importa lo nuevo
+
+    Si el mtime de la carpeta no cambió (no se agregó, borró ni renombró
+    nada) y no hay archivos esperando, la revisión es un único stat; cada
+    FULL_SCAN_EVERY revisiones se lista igual, por los archivos sobrescritos
+    en el lugar. Un listado es un os.scandir con un stat por archivo: un
+    archivo cuyo (mtime, tamaño) ya está en el índice no se vuelve a abrir. Uno
+    nuevo o modificado se importa recién cuando su (mtime, tamaño) no cambió
+    entre dos revisiones (la copia terminó); antes se busca su huella en
+    import_runs, así un contenido ya importado no se lee de nuevo y una
+    importación interrumpida se reanuda.
+
+    Los archivos importados se mueven a la carpeta de archivo con la fecha
+    adelante del nombre; su cuarentena queda junto a ellos. Los que fallan,
+    o que no son la exportación de conexiones de LinkedIn (ver
+    LinkedInCSVImporter.is_connections_export), se dejan en su lugar y no
+    se reintentan hasta que cambien.
+    """
+
+    def __init__(self, importer: LinkedInCSVImporter, folder: str,
+                 archive_folder: Optional[str] = None,
+                 interval: float = WATCH_INTERVAL,
+                 upsert: bool = False):
+        """
+        Args:
+            importer: Importador con la base de destino
+            folder: Carpeta a vigilar
+            archive_folder: Destino de los archivos importados
+                            (por defecto, ARCHIVE_FOLDER_NAME dentro de folder)
+            interval: Segundos entre revisiones
+            upsert: Si es True, actualiza los contactos existentes que cambiaron
+        """
+        self.importer = importer
+        self.folder = folder
+        self.archive_folder = archive_folder or os.path.join(folder, ARCHIVE_FOLDER_NAME)
+        self.interval = interval
+        self.upsert = upsert
+
+        # Ruta -> (mtime_ns, tamaño) de los archivos ya resueltos
+        self.index: Dict[str, Tuple[int, int]] = {}
+        # Ruta -> (mtime_ns, tamaño) visto en la revisión anterior, esperando que se asiente
+        self.pending: Dict[str, Tuple[int, int]] = {}
+        # mtime de la carpeta en el último listado y revisiones salteadas desde entonces
+        self.folder_mtime: Optional[int] = None
+        self.skipped_scans = 0
+
+    def scan(self) -> List[str]:
+        """
+        Revisa la carpeta una vez
+
+        Returns:
+            Archivos nuevos o modificados listos para importar (sin cambios
+            desde la revisión anterior)
+        """
+        folder_mtime = os.stat(self.folder).st_mtime_ns
+
+        if (folder_mtime == self.folder_mtime and not self.pending
+                and self.skipped_scans < FULL_SCAN_EVERY):
+            self.skipped_scans += 1
+            return []
+
+        self.folder_mtime = folder_mtime
+        self.skipped_scans = 0
+        ready = []
+        seen = set()
+
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                name = entry.name.lower()
+                if not name.endswith(WATCH_EXTENSIONS) or name.endswith(QUARANTINE_SUFFIX):
+                    continue
+
+                try:
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except OSError:
+                    # Se borró o movió entre el listado y el stat
+                    continue
+
+                path = entry.path
+                signature = (stat.st_mtime_ns, stat.st_size)
+                seen.add(path)
+
+                if self.index.get(path) == signature:
+                    continue
+
+                if self.pending.get(path) == signature:
+                    del self.pending[path]
+                    ready.append(path)
+                else:
+                    self.pending[path] = signature
+
+        # Olvidar los archivos que ya no están
+        if len(seen) < len(self.index) + len(self.pending):
+            self.index = {path: sig for path, sig in self.index.items() if path in seen}
+            self.pending = {path: sig for path, sig in self.pending.items() if path in seen}
+
+        return sorted(ready)
+
+    def poll(self) -> List[Dict]:
+        """
+        Revisa la carpeta e importa los archivos listos
+
+        Returns:
+            Resultado de cada archivo procesado: path, status ('imported',
+            'already_imported' o 'failed'), stats y archived_path
+        """
+        results = []
+
+        for path in self.scan():
+            try:
+                signature = os.stat(path)
+                signature = (signature.st_mtime_ns, signature.st_size)
+            except OSError:
+                continue
+
+            result = self.ingest(path)
+            results.append(result)
+
+            if result['status'] == 'failed':
+                # No reintentar hasta que el archivo cambie
+                self.index[path] = signature
+
+        return results
+
+    def ingest(self, path: str) -> Dict:
+        """
+        Importa un archivo de la carpeta (o lo reconoce como ya importado) y lo archiva
+
+        Args:
+            path: Archivo a importar
+
+        Returns:
+            Resultado (ver poll)
+        """
+        source = VCardSource(path) if path.lower().endswith(VCARD_EXTENSIONS) else None
+
+        if not source and not self.importer.is_connections_export(path):
+            logger.error(f"{path} no es una exportación de conexiones de LinkedIn; se deja en su lugar")
+            stats = {'success': False, 'error': 'No es una exportación de conexiones de LinkedIn'}
+            return {'path': path, 'status': 'failed', 'stats': stats, 'archived_path': None}
+
+        last_run = self.importer.find_last_run(path, source)
+        archived_path = self._archive_path(path)
+        quarantine_path = os.path.splitext(archived_path)[0] + QUARANTINE_SUFFIX
+
+        if last_run and last_run['status'] == 'completed':
+            logger.info(f"{path} ya se importó (importación #{last_run['id']}); se archiva")
+            status, stats = 'already_imported', None
+        else:
+            resume = last_run is not None
+            if resume:
+                logger.info(f"Reanudando la importación #{last_run['id']} de {path}")
+            else:
+                logger.info(f"Importando {path}")
+
+            os.makedirs(self.archive_folder, exist_ok=True)
+
+            if source:
+                stats = self.importer.import_from_source(source, collect_contacts=False,
+                                                         resume=resume, upsert=self.upsert,
+                                                         quiet=True, quarantine_path=quarantine_path)
+            else:
+                stats = self.importer.import_from_csv(path, collect_contacts=False, resume=resume,
+                                                      workers=os.cpu_count() or 1,
+                                                      upsert=self.upsert, quiet=True,
+                                                      quarantine_path=quarantine_path)
+
+            if not stats.get('success'):
+                logger.error(f"No se pudo importar {path}: {stats.get('error', 'Desconocido')}")
+                return {'path': path, 'status': 'failed', 'stats': stats, 'archived_path': None}
+
+            status = 'imported'
+
+        try:
+            os.makedirs(self.archive_folder, exist_ok=True)
+            os.replace(path, archived_path)
+        except OSError as e:
+            logger.error(f"No se pudo archivar {path}: {e}")
+            archived_path = None
+
+        return {'path': path, 'status': status, 'stats': stats, 'archived_path': archived_path}
+
+    def _archive_path(self, path: str) -> str:
+        """Destino de un archivo en la carpeta de archivo (con la fecha adelante)"""
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        return os.path.join(self.archive_folder, f"{stamp}_{os.path.basename(path)}")
+
+    def run(self, max_polls: Optional[int] = None) -> None:
+        """
+        Vigila la carpeta hasta Ctrl+C (o max_polls revisiones)
+
+        Args:
+            max_polls: Cantidad de revisiones (None = sin límite)
+        """
+        logger.info(f"Vigilando {self.folder} cada {self.interval:g} s")
+        polls = 0
+
+        try:
+            while max_polls is None or polls < max_polls:
+                for result in self.poll():
+                    if result['status'] == 'imported':
+                        stats = result['stats']
+                        print(f"✅ {os.path.basename(result['path'])}: {stats['imported']} nuevos, "
+                              f"{stats['skipped']} ya existían, {stats['no_url']} sin URL, "
+                              f"{stats['errors']} errores")
+                    elif result['status'] == 'already_imported':
+                        print(f"⏭️  {os.path.basename(result['path'])}: ya importado, archivado")
+                    else:
+                        print(f"❌ {os.path.basename(result['path'])}: "
+                              f"{result['stats'].get('error', 'error en la importación')}")
+
+                polls += 1
+                if max_polls is None or polls < max_polls:
+                    time.sleep(self.interval)
+
+        except KeyboardInterrupt:
+            print("\n⏹️  Vigilancia detenida")
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Uso: python folder_watcher.py carpeta [--upsert]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+
+    if not args:
+        print("Uso: python folder_watcher.py carpeta [--upsert]")
+        sys.exit(1)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    watcher = FolderWatcher(LinkedInCSVImporter(ContactDatabase()), args[0],
+                            upsert='--upsert' in sys.argv)
+    watcher.run()
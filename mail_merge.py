@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Combinación de correspondencia para Networking Suite
+Genera mensajes para todos los contactos de un estado en una sola corrida
+"""
+
+import io
+import csv
+import json
+import time
+import random
+import sqlite3
+import contextlib
+import functools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+import logging
+
+from database import ContactDatabase
+from message_generator import MessageGenerator, compile_template
+
+logger = logging.getLogger(__name__)
+
+# IDs de contacto por bloque (lo que lee y arma cada proceso)
+MERGE_CHUNK_SIZE = 5000
+
+# Destinos posibles de los mensajes
+MERGE_OUTPUTS = ('csv', 'jsonl', 'reminders')
+
+# Columnas que se leen de cada contacto: las que usan los templates y las de la salida
+MERGE_CONTACT_COLUMNS = ['id', 'name', 'company', 'industry', 'job_title', 'skills',
+                         'email', 'linkedin_url']
+
+# Columnas de los archivos generados
+MERGE_OUTPUT_FIELDS = ('contact_id', 'name', 'email', 'linkedin_url', 'template', 'message')
+
+# Tipo de recordatorio según el tipo de mensaje
+MERGE_REMINDER_TYPES = {
+    'connection': 'connection_request',
+    'follow_up': 'follow_up',
+    'thank_you': 'follow_up',
+}
+
+
+@functools.lru_cache(maxsize=4)
+def _worker_connection(db_path: str) -> sqlite3.Connection:
+    """
+    Conexión de solo lectura del proceso (una por ruta y proceso)
+
+    Sin ContactDatabase: el proceso solo lee, así no revisa el esquema ni
+    carga las tablas de lookup al arrancar.
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+@functools.lru_cache(maxsize=1)
+def _worker_generator() -> MessageGenerator:
+    """Generador de mensajes del proceso (uno por proceso)"""
+    return MessageGenerator()
+
+
+def render_range(db: Union[ContactDatabase, str], id_range: Tuple[int, int],
+                 query: Tuple[str, List], template_type: str,
+                 templates: List[Tuple[str, str]], custom_vars: Optional[Dict],
+                 output: str, seed: int) -> Tuple[int, Any]:
+    """
+    Lee los contactos de un rango de IDs y arma sus mensajes
+
+    Se ejecuta en los procesos de la generación en paralelo (con db como
+    ruta) o en el proceso principal. Cada proceso lee su rango de la base y
+    devuelve la salida ya formateada, así al proceso principal solo le
+    queda escribirla en orden. Los templates llegan como texto, así no
+    depende de los templates cargados en el proceso.
+
+    Args:
+        db: ContactDatabase o ruta a la base (el proceso la abre de solo lectura)
+        id_range: (primer ID, último ID) inclusive
+        query: Consulta de los contactos (ver ContactDatabase.contact_page_query)
+        template_type: Tipo de template (connection, follow_up, thank_you)
+        templates: (nombre, texto) de los templates; se elige uno al azar por contacto
+        custom_vars: Variables personalizadas
+        output: Formato de la salida (ver MERGE_OUTPUTS)
+        seed: Semilla de la corrida; con el primer ID del rango fija la
+              elección de templates (los procesos heredan el mismo estado
+              de random, así cada rango usa su propio generador)
+
+    Returns:
+        Tupla (contactos procesados, salida): texto CSV o JSONL, o lista de
+        (contact_id, mensaje) para los recordatorios
+    """
+    sql, params = query
+    params = [id_range[0] - 1, id_range[1], *params, id_range[1] - id_range[0] + 1]
+
+    if isinstance(db, str):
+        page = _worker_connection(db).execute(sql, params).fetchall()
+    else:
+        conn = db._get_connection()
+        try:
+            page = conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    # Las columnas de MERGE_CONTACT_COLUMNS no tienen códigos enteros que traducir
+    page = [dict(row) for row in page]
+
+    rng = random.Random(seed + id_range[0])
+    generator = _worker_generator()
+    compiled = [(name, compile_template(text)) for name, text in templates]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if output == 'csv' else None
+    reminders = []
+    rows = []
+
+    for contact in page:
+        name, template = rng.choice(compiled) if len(compiled) > 1 else compiled[0]
+        message = template.render(generator.build_variables(template_type, contact,
+                                                            custom_vars)).strip()
+
+        if output == 'reminders':
+            reminders.append((contact['id'], message))
+        else:
+            rows.append((contact['id'], contact['name'], contact['email'],
+                         contact['linkedin_url'], name, message))
+
+    if writer:
+        writer.writerows(rows)
+    elif output == 'jsonl':
+        buffer.writelines(json.dumps(dict(zip(MERGE_OUTPUT_FIELDS, row)), ensure_ascii=False) + '\n'
+                          for row in rows)
+
+    return len(page), reminders if output == 'reminders' else buffer.getvalue()
+
+
+class MailMerge:
+    """
+    Genera mensajes para muchos contactos
+
+    La base se reparte en rangos de MERGE_CHUNK_SIZE IDs; cada rango se lee
+    y se arma en un proceso (si workers > 1) con a lo sumo workers * 2
+    rangos en vuelo, y se escribe al terminar, en orden. La memoria no
+    depende de la cantidad de contactos.
+    """
+
+    def __init__(self, db: ContactDatabase, generator: Optional[MessageGenerator] = None):
+        """
+        Args:
+            db: Instancia de ContactDatabase
+            generator: Generador de mensajes (por defecto, uno con los templates de db)
+        """
+        self.db = db
+        self.generator = generator or MessageGenerator(db)
+
+    def run(self, template_type: str = 'connection', status: Optional[str] = 'pending',
+            output: str = 'csv', path: Optional[str] = None,
+            template_index: Optional[int] = None, context: str = 'connection',
+            custom_vars: Optional[Dict] = None, workers: int = 1,
+            chunk_size: int = MERGE_CHUNK_SIZE, reminder_days: int = 0) -> Dict:
+        """
+        Genera un mensaje para cada contacto del estado pedido
+
+        Args:
+            template_type: Tipo de template (connection, follow_up, thank_you)
+            status: Estado de los contactos (None = todos)
+            output: 'csv', 'jsonl' o 'reminders' (un recordatorio por contacto
+                    con el mensaje sugerido)
+            path: Archivo de salida (por defecto, mensajes_<tipo>_<fecha>.<formato>)
+            template_index: Índice del template a usar (None = uno al azar por contacto)
+            context: Contexto del agradecimiento (solo thank_you)
+            custom_vars: Variables personalizadas
+            workers: Procesos para leer y armar los mensajes (1 = en este proceso)
+            chunk_size: IDs de contacto por bloque
+            reminder_days: Días desde hoy para los recordatorios
+
+        Returns:
+            Diccionario con success, total, written, path, elapsed y error
+        """
+        stats = {'success': False, 'total': 0, 'written': 0, 'path': None, 'elapsed': 0.0}
+        started = time.perf_counter()
+
+        if output not in MERGE_OUTPUTS:
+            stats['error'] = f"Destino no válido: {output}"
+            return stats
+
+        try:
+            templates = self.generator.select_templates(template_type, template_index, context)
+        except (KeyError, IndexError):
+            stats['error'] = f"Template no válido: {template_type} #{template_index}"
+            return stats
+
+        templates = [(template['name'], template['template']) for template in templates]
+
+        if output == 'reminders':
+            path = None
+        else:
+            path = path or f"mensajes_{template_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{output}"
+            stats['path'] = path
+
+        first_id, last_id = self.db.get_contact_id_bounds()
+        ranges = ((start, min(start + chunk_size - 1, last_id))
+                  for start in range(first_id, last_id + 1, chunk_size))
+
+        reminder_date = (datetime.now() + timedelta(days=reminder_days)).isoformat()
+        reminder_type = MERGE_REMINDER_TYPES[template_type]
+
+        try:
+            with contextlib.ExitStack() as stack:
+                f = stack.enter_context(open(path, 'w', encoding='utf-8', newline='')) if path else None
+                if output == 'csv':
+                    csv.writer(f).writerow(MERGE_OUTPUT_FIELDS)
+
+                for count, result in self._render(ranges, status, template_type, templates,
+                                                  custom_vars, output, workers):
+                    stats['total'] += count
+
+                    if output != 'reminders':
+                        f.write(result)
+                        stats['written'] += count
+                        continue
+
+                    if result:
+                        added = self.db.add_reminders_batch([
+                            {'contact_id': contact_id, 'reminder_date': reminder_date,
+                             'reminder_type': reminder_type, 'message': message}
+                            for contact_id, message in result
+                        ])
+                        if added is None:
+                            raise RuntimeError("No se pudieron guardar los recordatorios")
+                        stats['written'] += added
+
+            stats['success'] = True
+
+        except Exception as e:
+            logger.error(f"Error generando mensajes en lote: {e}")
+            stats['error'] = str(e)
+
+        stats['elapsed'] = time.perf_counter() - started
+        logger.info(f"Mensajes en lote: {stats['written']} de {stats['total']} contactos "
+                    f"({template_type}, {output}) en {stats['elapsed']:.2f} s")
+        return stats
+
+    def _render(self, ranges: Iterator[Tuple[int, int]], status: Optional[str],
+                template_type: str, templates: List[Tuple[str, str]],
+                custom_vars: Optional[Dict], output: str,
+                workers: int) -> Iterator[Tuple[int, Any]]:
+        """
+        Arma los mensajes de cada rango de IDs, en orden
+
+        Args:
+            ranges: Rangos (primer ID, último ID)
+            workers: Procesos (1 = en este proceso)
+            (resto: ver render_range)
+
+        Yields:
+            Resultado de render_range para cada rango
+        """
+        query = self.db.contact_page_query(status, MERGE_CONTACT_COLUMNS)
+        seed = random.getrandbits(32)
+
+        if workers <= 1:
+            for id_range in ranges:
+                yield render_range(self.db, id_range, query, template_type,
+                                   templates, custom_vars, output, seed)
+            return
+
+        in_flight = deque()
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            def submit_next() -> None:
+                id_range = next(ranges, None)
+                if id_range:
+                    in_flight.append(executor.submit(
+                        render_range, self.db.db_path, id_range, query, template_type,
+                        templates, custom_vars, output, seed
+                    ))
+
+            for _ in range(workers * 2):
+                submit_next()
+
+            while in_flight:
+                future = in_flight.popleft()
+                submit_next()
+                yield future.result()
@@ -16,11 +16,14 @@ if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
-from database import ContactDatabase
+from database import ContactDatabase, LIST_COLUMNS
 from message_generator import MessageGenerator
 from reminder_system import ReminderSystem
 from export_manager import ExportManager
 from csv_importer import LinkedInCSVImporter, export_linkedin_connections_guide
+from source_adapters import MappedCSVSource, VCardSource, VCARD_EXTENSIONS
+from folder_watcher import FolderWatcher, ARCHIVE_FOLDER_NAME
+from mail_merge import MailMerge
 
 
 # Configurar logging
@@ -42,10 +45,11 @@ class LinkedInNetworkingSuite:
     def __init__(self):
         """Inicializa la aplicación"""
         self.db = ContactDatabase()
-        self.msg_generator = MessageGenerator()
+        self.msg_generator = MessageGenerator(self.db)
         self.reminder_system = ReminderSystem(self.db)
         self.export_manager = ExportManager(self.db)
         self.csv_importer = LinkedInCSVImporter(self.db)
+        self.mail_merge = MailMerge(self.db, self.msg_generator)
 
     def clear_screen(self):
         """Limpia la pantalla"""
@@ -132,6 +136,8 @@ class LinkedInNetworkingSuite:
 3. 🙏 Generar mensaje de agradecimiento
 4. 👁️  Previsualizar mensaje
 5. 📋 Ver templates disponibles
+6. 📬 Generar mensajes en lote
+7. ✏️  Crear template personalizado
 0. ⬅️  Volver
 
 """)
@@ -147,6 +153,10 @@ class LinkedInNetworkingSuite:
                 self.preview_message()
             elif option == '5':
                 self.view_templates()
+            elif option == '6':
+                self.batch_generate_messages()
+            elif option == '7':
+                self.create_custom_template()
             elif option == '0':
                 break
             else:
@@ -243,6 +253,9 @@ class LinkedInNetworkingSuite:
 1. 📖 Ver instrucciones para exportar desde LinkedIn
 2. 📂 Importar archivo CSV
 3. 👁️  Vista previa de archivo CSV
+4. ♻️  Reimportar filas en cuarentena
+5. 📇 Importar vCard (.vcf) o CSV de otro CRM
+6. 👀 Vigilar una carpeta e importar lo que llegue
 0. ⬅️  Volver
 
 """)
@@ -254,6 +267,12 @@ class LinkedInNetworkingSuite:
                 self.import_csv_file()
             elif option == '3':
                 self.preview_csv_file()
+            elif option == '4':
+                self.reimport_quarantine_file()
+            elif option == '5':
+                self.import_other_source()
+            elif option == '6':
+                self.watch_import_folder()
             elif option == '0':
                 break
             else:
@@ -272,13 +291,13 @@ class LinkedInNetworkingSuite:
         print("📂 IMPORTAR ARCHIVO CSV")
         print("="*70)
 
-        print("\n💡 El archivo CSV debe estar en la carpeta del proyecto")
+        print("\n💡 El archivo CSV, Excel (.xlsx) o el ZIP descargado de LinkedIn debe estar en la carpeta del proyecto")
         print("   o ingresa la ruta completa\n")
 
-        csv_file = input("📄 Nombre del archivo CSV (o ruta completa): ").strip()
+        csv_file = input("📄 Nombre del archivo CSV, XLSX o ZIP de LinkedIn (o ruta completa): ").strip()
 
         # Si no tiene extensión, agregarla
-        if not csv_file.endswith('.csv'):
+        if not csv_file.lower().endswith(('.csv', '.zip', '.xlsx', '.xlsm')):
             csv_file += '.csv'
 
         # Si no es ruta absoluta, asumir que está en el directorio actual
@@ -291,41 +310,194 @@ class LinkedInNetworkingSuite:
             return
 
         print(f"\n📂 Archivo encontrado: {csv_file}")
-        print("\n🔍 Analizando archivo...\n")
 
-        # Mostrar preview
-        self.csv_importer.show_import_preview(csv_file, max_contacts=5)
+        # Importación anterior sin terminar del mismo archivo
+        resume = False
+        pending_run = self.csv_importer.find_resumable_run(csv_file)
+
+        if pending_run:
+            progress = f" ({pending_run['progress']:.0%})" if pending_run['progress'] is not None else ""
+            print(f"\n⏩ Hay una importación sin terminar de este archivo: "
+                  f"{pending_run['rows_processed']} filas procesadas{progress}")
+            resume = input("   ¿Reanudarla desde ahí? (s/n): ").strip().lower() == 's'
+
+        layout = None
+        if resume:
+            confirm = 's'
+            # La importación sigue en el modo con que empezó
+            upsert = bool(pending_run['upsert'])
+        else:
+            print("\n🔍 Analizando archivo...\n")
+
+            # Mostrar preview (solo lee el inicio; su formato se reusa al importar)
+            layout = self.csv_importer.show_import_preview(csv_file, max_contacts=5)
 
-        confirm = input("\n⚠️  ¿Importar estos contactos? (s/n): ").strip().lower()
+            confirm = input("\n⚠️  ¿Importar estos contactos? (s/n): ").strip().lower()
+
+            upsert = False
+            if confirm == 's':
+                upsert = input("   ¿Actualizar los contactos existentes que cambiaron "
+                               "(cargo, empresa, ubicación)? (s/n): ").strip().lower() == 's'
 
         if confirm == 's':
             print("\n⏳ Importando... esto puede tomar unos segundos...\n")
 
-            stats = self.csv_importer.import_from_csv(csv_file, dry_run=False)
+            stats = self.csv_importer.import_from_csv(csv_file, dry_run=False, collect_contacts=False,
+                                                      resume=resume, workers=os.cpu_count() or 1,
+                                                      upsert=upsert, layout=layout)
 
             if stats.get('success'):
                 print(f"\n✅ Importación completada!")
                 print(f"   Total: {stats['total']} filas")
                 print(f"   Importados: {stats['imported']} contactos nuevos")
                 print(f"   Omitidos: {stats['skipped']} (ya existían)")
+                if stats.get('no_url'):
+                    print(f"   Sin URL de LinkedIn: {stats['no_url']} (a la cuarentena)")
+                if upsert:
+                    print(f"   Actualizados: {stats['changed']} | Sin cambios: {stats['unchanged']}")
+                    print(f"   Faltantes (ya no están en la exportación): {stats['missing']}")
                 print(f"   Errores: {stats['errors']}")
 
+                if stats.get('quarantined'):
+                    print(f"\n📋 {stats['quarantined']} filas rechazadas guardadas en: {stats['quarantine_path']}")
+                    print(f"   Corrígelas y usa 'Reimportar filas en cuarentena' para cargarlas")
+
                 if stats['imported'] > 0:
                     print(f"\n💡 Ahora puedes ver tus contactos en: Gestión de Contactos → Ver todos")
+
+                if csv_file.endswith('.zip'):
+                    activity = input("\n💬 ¿Importar también mensajes e invitaciones del ZIP? (s/n): ")
+                    if activity.strip().lower() == 's':
+                        print("\n⏳ Importando historial de mensajes e invitaciones...")
+                        self.csv_importer.import_archive_activity(csv_file)
             else:
                 print(f"\n❌ Error en la importación: {stats.get('error', 'Desconocido')}")
 
         input("\nPresiona Enter para continuar...")
 
+    def reimport_quarantine_file(self):
+        """Reimporta las filas rechazadas (ya corregidas) de una importación anterior"""
+        print("\n" + "="*70)
+        print("♻️  REIMPORTAR FILAS EN CUARENTENA")
+        print("="*70)
+
+        quarantine_file = input("\n📄 Archivo de cuarentena (ej. Connections.cuarentena.csv): ").strip()
+
+        if not os.path.isabs(quarantine_file):
+            quarantine_file = os.path.join(os.path.dirname(__file__), quarantine_file)
+
+        if not os.path.exists(quarantine_file):
+            print(f"\n❌ Archivo no encontrado: {quarantine_file}")
+            input("\nPresiona Enter para continuar...")
+            return
+
+        stats = self.csv_importer.reimport_quarantine(quarantine_file)
+
+        if stats.get('success'):
+            print(f"\n✅ Importados: {stats['imported']} | Omitidos: {stats['skipped']}")
+            if stats.get('quarantined'):
+                print(f"   Siguen en cuarentena: {stats['quarantined']} filas")
+            else:
+                print(f"   La cuarentena quedó vacía y se eliminó")
+        else:
+            print(f"\n❌ Error: {stats.get('error', 'Desconocido')}")
+
+        input("\nPresiona Enter para continuar...")
+
+    def import_other_source(self):
+        """Importa contactos de un vCard o de un CSV genérico con columnas elegidas"""
+        print("\n" + "="*70)
+        print("📇 IMPORTAR vCard O CSV DE OTRO CRM")
+        print("="*70)
+
+        source_file = input("\n📄 Archivo .vcf o .csv (o ruta completa): ").strip()
+
+        if not os.path.isabs(source_file):
+            source_file = os.path.join(os.path.dirname(__file__), source_file)
+
+        if not os.path.exists(source_file):
+            print(f"\n❌ Archivo no encontrado: {source_file}")
+            input("\nPresiona Enter para continuar...")
+            return
+
+        if source_file.lower().endswith(VCARD_EXTENSIONS):
+            source = VCardSource(source_file)
+        else:
+            fieldnames = MappedCSVSource(source_file, {}).read_fieldnames()
+            if not fieldnames:
+                print("\n❌ El CSV no tiene encabezado")
+                input("\nPresiona Enter para continuar...")
+                return
+
+            print("\n📋 Columnas del archivo:")
+            for i, name in enumerate(fieldnames, 1):
+                print(f"   {i}. {name}")
+
+            print("\n💡 Indica el número de columna de cada campo (Enter para omitirlo)")
+            mapping = {}
+            for field, label in (('linkedin_url', 'URL de LinkedIn'), ('name', 'Nombre completo'),
+                                 ('first_name', 'Nombre'), ('last_name', 'Apellido'),
+                                 ('company', 'Empresa'), ('job_title', 'Cargo'),
+                                 ('location', 'Ubicación'), ('email', 'Email'), ('notes', 'Notas')):
+                answer = input(f"   {label}: ").strip()
+                if answer.isdigit() and 1 <= int(answer) <= len(fieldnames):
+                    mapping[field] = fieldnames[int(answer) - 1]
+
+            source = MappedCSVSource(source_file, mapping)
+
+        resume = False
+        pending_run = self.csv_importer.find_resumable_run(source_file, source)
+        if pending_run:
+            print(f"\n⏩ Hay una importación sin terminar de este archivo: "
+                  f"{pending_run['rows_processed']} registros procesados")
+            resume = input("   ¿Reanudarla desde ahí? (s/n): ").strip().lower() == 's'
+
+        print("\n⏳ Importando...\n")
+        stats = self.csv_importer.import_from_source(source, collect_contacts=False, resume=resume)
+
+        if stats.get('success'):
+            print(f"\n✅ Importados: {stats['imported']} | Omitidos (ya existían): {stats['skipped']} | "
+                  f"Errores: {stats['errors']}")
+            if stats.get('quarantined'):
+                print(f"   Sin URL de LinkedIn: {stats['no_url']} → {stats['quarantine_path']}")
+        else:
+            print(f"\n❌ Error en la importación: {stats.get('error', 'Desconocido')}")
+
+        input("\nPresiona Enter para continuar...")
+
+    def watch_import_folder(self):
+        """Vigila una carpeta e importa las exportaciones que se dejan en ella"""
+        print("\n" + "="*70)
+        print("👀 VIGILAR CARPETA")
+        print("="*70)
+
+        folder = input("\n📁 Carpeta a vigilar (o ruta completa): ").strip()
+
+        if not os.path.isabs(folder):
+            folder = os.path.join(os.path.dirname(__file__), folder)
+
+        if not os.path.isdir(folder):
+            print(f"\n❌ Carpeta no encontrada: {folder}")
+            input("\nPresiona Enter para continuar...")
+            return
+
+        upsert = input("¿Actualizar los contactos existentes que cambiaron? (s/n): ").strip().lower() == 's'
+
+        print(f"\n⏳ Vigilando {folder} (Ctrl+C para detener)")
+        print(f"   Los archivos importados se mueven a {os.path.join(folder, ARCHIVE_FOLDER_NAME)}\n")
+        FolderWatcher(self.csv_importer, folder, upsert=upsert).run()
+
+        input("\nPresiona Enter para continuar...")
+
     def preview_csv_file(self):
         """Muestra vista previa del CSV"""
         print("\n" + "="*70)
         print("👁️  VISTA PREVIA DE ARCHIVO CSV")
         print("="*70)
 
-        csv_file = input("\n📄 Nombre del archivo CSV: ").strip()
+        csv_file = input("\n📄 Nombre del archivo CSV, XLSX o ZIP: ").strip()
 
-        if not csv_file.endswith('.csv'):
+        if not csv_file.lower().endswith(('.csv', '.zip', '.xlsx', '.xlsm')):
             csv_file += '.csv'
 
         if not os.path.isabs(csv_file):
@@ -368,6 +540,7 @@ class LinkedInNetworkingSuite:
         contact['job_title'] = input("   Cargo/Role: ").strip() or None
         contact['company'] = input("   Empresa: ").strip() or None
         contact['location'] = input("   Ubicación: ").strip() or None
+        contact['email'] = input("   Email: ").strip() or None
         contact['industry'] = input("   Industria: ").strip() or None
         contact['skills'] = input("   Habilidades (separadas por coma): ").strip() or None
         contact['about'] = input("   Sobre mí: ").strip() or None
@@ -397,7 +570,7 @@ class LinkedInNetworkingSuite:
         print("📋 TODOS LOS CONTACTOS")
         print("="*70)
 
-        contacts = self.db.get_all_contacts()
+        contacts = self.db.get_all_contacts(columns=LIST_COLUMNS)
 
         if not contacts:
             print("\n📭 No hay contactos registrados")
@@ -427,7 +600,14 @@ class LinkedInNetworkingSuite:
             input("Presiona Enter para continuar...")
             return
 
-        results = self.db.search_contacts(query)
+        results = self.db.search_contacts(query, columns=LIST_COLUMNS)
+
+        if not results:
+            # Sin coincidencias exactas: buscar tolerando acentos y errores de tipeo
+            results = self.db.search_contacts(query, fuzzy=True, limit=20, columns=LIST_COLUMNS)
+
+            if results:
+                print("\n🔎 Sin coincidencias exactas, mostrando resultados aproximados")
 
         if not results:
             print("\n📭 No se encontraron resultados")
@@ -437,7 +617,8 @@ class LinkedInNetworkingSuite:
         print(f"\n✅ Se encontraron {len(results)} resultados:\n")
 
         for i, contact in enumerate(results, 1):
-            print(f"{i}. {contact['name']}")
+            similarity = f" ({contact['similarity']:.0%} similar)" if 'similarity' in contact else ""
+            print(f"{i}. {contact['name']}{similarity}")
             print(f"   🏢 {contact.get('company', 'N/A')} - {contact.get('job_title', 'N/A')}")
             print(f"   📌 Estado: {contact.get('status', 'pending')}")
             print("-" * 70)
@@ -570,6 +751,7 @@ class LinkedInNetworkingSuite:
         print(f"🏭 Industria: {contact.get('industry', 'N/A')}")
         print(f"📌 Estado: {contact.get('status', 'N/A')}")
         print(f"🔗 LinkedIn: {contact.get('linkedin_url', 'N/A')}")
+        print(f"📧 Email: {contact.get('email') or 'N/A'}")
         print(f"\n💻 Habilidades:")
         print(f"   {contact.get('skills', 'N/A')}")
         print(f"\n📝 Notas:")
@@ -594,12 +776,20 @@ class LinkedInNetworkingSuite:
         print("🏷️  FILTRAR POR ESTADO")
         print("="*70)
 
+        status_labels = {
+            'pending': 'Pendiente de contacto',
+            'connected': 'Conectado',
+            'responded': 'Respondió',
+            'rejected': 'Rechazó',
+            'not_interested': 'No interesado'
+        }
+
+        status_counts = dict(self.db.facets(dimensions=['status'])['facets']['status'])
+
         print("\nEstados disponibles:")
-        print("  - pending: Pendiente de contacto")
-        print("  - connected: Conectado")
-        print("  - responded: Respondió")
-        print("  - rejected: Rechazó")
-        print("  - not_interested: No interesado")
+        for status_name in list(status_labels) + [s for s in status_counts if s not in status_labels]:
+            label = status_labels.get(status_name, status_name)
+            print(f"  - {status_name}: {label} ({status_counts.get(status_name, 0)})")
 
         status = input("\n📌 Estado a filtrar: ").strip().lower()
 
@@ -607,7 +797,7 @@ class LinkedInNetworkingSuite:
             input("Presiona Enter para continuar...")
             return
 
-        contacts = self.db.get_all_contacts(status=status)
+        contacts = self.db.get_all_contacts(status=status, columns=LIST_COLUMNS)
 
         if not contacts:
             print(f"\n📭 No hay contactos con estado '{status}'")
@@ -621,6 +811,15 @@ class LinkedInNetworkingSuite:
             print(f"   🏢 {contact.get('company', 'N/A')} - {contact.get('job_title', 'N/A')}")
             print("-" * 70)
 
+        # Distribución del filtro actual (una sola consulta para todas las dimensiones)
+        distribution = self.db.facets({'status': status}, ['company', 'location'], top_n=5)
+
+        for dimension, title in (('company', '🏢 TOP EMPRESAS'), ('location', '📍 TOP UBICACIONES')):
+            if distribution['facets'][dimension]:
+                print(f"\n{title}")
+                for value, count in distribution['facets'][dimension]:
+                    print(f"   {value}: {count}")
+
         input("\nPresiona Enter para continuar...")
 
     # ===== MÉTODOS DE MENSAJES =====
@@ -808,6 +1007,49 @@ class LinkedInNetworkingSuite:
 
         input("\nPresiona Enter para continuar...")
 
+    def batch_generate_messages(self):
+        """Genera mensajes para todos los contactos de un estado"""
+        print("\n" + "="*70)
+        print("📬 GENERAR MENSAJES EN LOTE")
+        print("="*70)
+
+        print("\nTipo de mensaje:")
+        print("1. Conexión")
+        print("2. Follow-up")
+        print("3. Agradecimiento")
+
+        msg_type = input("\nTipo (1-3): ").strip()
+
+        type_map = {'1': 'connection', '2': 'follow_up', '3': 'thank_you'}
+        template_type = type_map.get(msg_type, 'connection')
+
+        status = input("\n🏷️  Estado de los contactos (Enter = pending, * = todos): ").strip() or 'pending'
+        if status == '*':
+            status = None
+
+        print("\nDestino:")
+        print("1. Archivo CSV")
+        print("2. Archivo JSONL")
+        print("3. Recordatorios (uno por contacto, con el mensaje sugerido)")
+
+        dest = input("\nDestino (1-3): ").strip()
+
+        output_map = {'1': 'csv', '2': 'jsonl', '3': 'reminders'}
+        output = output_map.get(dest, 'csv')
+
+        print("\n⏳ Generando mensajes...")
+        stats = self.mail_merge.run(template_type, status=status, output=output,
+                                    workers=os.cpu_count() or 1)
+
+        if stats['success']:
+            print(f"\n✅ {stats['written']} mensajes generados en {stats['elapsed']:.1f} s")
+            if stats['path']:
+                print(f"📁 Archivo: {stats['path']}")
+        else:
+            print(f"\n❌ Error: {stats.get('error', 'Desconocido')}")
+
+        input("\nPresiona Enter para continuar...")
+
     def view_templates(self):
         """Muestra templates disponibles"""
         print("\n" + "="*70)
@@ -828,6 +1070,53 @@ class LinkedInNetworkingSuite:
 
         input("\nPresiona Enter para continuar...")
 
+    def create_custom_template(self):
+        """Crea (o reemplaza) un template personalizado"""
+        print("\n" + "="*70)
+        print("✏️  CREAR TEMPLATE PERSONALIZADO")
+        print("="*70)
+
+        print("\nTipo de template:")
+        print("1. Conexión")
+        print("2. Follow-up")
+        print("3. Agradecimiento")
+
+        msg_type = input("\nTipo (1-3): ").strip()
+
+        type_map = {'1': 'connection', '2': 'follow_up', '3': 'thank_you'}
+        template_type = type_map.get(msg_type, 'connection')
+
+        name = input("\n📝 Nombre del template: ").strip()
+
+        if not name:
+            print("❌ El nombre es obligatorio")
+            input("Presiona Enter para continuar...")
+            return
+
+        print("\nContenido (variables entre llaves, p. ej. {name}, {company}).")
+        print("Termina con una línea vacía:")
+
+        lines = []
+        while True:
+            line = input()
+            if not line:
+                break
+            lines.append(line)
+
+        content = "\n".join(lines)
+        tone = input("\n🎭 Tono (professional/friendly/casual, Enter = professional): ").strip() or 'professional'
+
+        problems = self.msg_generator.validate_template(template_type, content)
+
+        if not content or problems:
+            print(f"\n❌ Template no válido: {'; '.join(problems) or 'está vacío'}")
+        elif self.msg_generator.create_custom_template(template_type, name, content, tone):
+            print(f"\n✅ Template '{name}' guardado")
+        else:
+            print("\n❌ No se pudo guardar el template")
+
+        input("\nPresiona Enter para continuar...")
+
     # ===== MÉTODOS DE RECORDATORIOS =====
 
     def view_pending_reminders(self):
@@ -1011,6 +1300,24 @@ class LinkedInNetworkingSuite:
             for company, count in top_companies:
                 print(f"   {company}: {count}")
 
+        lock_metrics = self.db.get_lock_metrics()
+        if lock_metrics['contended'] or lock_metrics['retries'] or lock_metrics['failures']:
+            print(f"\n🔒 CONTENCIÓN DE ESCRITURA (esta sesión)")
+            print(f"   Transacciones: {lock_metrics['transactions']} "
+                  f"({lock_metrics['contended']} con espera)")
+            print(f"   Reintentos: {lock_metrics['retries']} - Fallidas: {lock_metrics['failures']}")
+            print(f"   Espera promedio: {lock_metrics['avg_wait_ms']} ms "
+                  f"(máx: {lock_metrics['max_wait_ms']} ms)")
+
+        # Últimas importaciones (las que están corriendo muestran su avance)
+        import_runs = self.db.get_import_runs(limit=3)
+        if import_runs:
+            print(f"\n📥 ÚLTIMAS IMPORTACIONES")
+            for run in import_runs:
+                progress = f" {run['progress']:.0%}" if run['progress'] is not None else ""
+                print(f"   #{run['id']} {os.path.basename(run['source'])}: {run['status']}{progress} - "
+                      f"{run['rows_processed']} filas, {run['imported']} importados")
+
         input("\nPresiona Enter para continuar...")
 
     # ===== MÉTODO PRINCIPAL =====
@@ -5,9 +5,122 @@ Generador de Mensajes Personalizados para LinkedIn
 Crea templates y ayuda a personalizar mensajes para networking
 """
 
+import time
 import random
-from typing import Dict, List, Optional
+import string
+import functools
+from typing import Dict, FrozenSet, List, Optional
 import re
+import logging
+
+from database import ContactDatabase
+
+logger = logging.getLogger(__name__)
+
+# Variables que completa cada tipo de template cuando no se pasan custom_vars
+TEMPLATE_VARIABLES = {
+    'connection': frozenset({'name', 'company', 'industry', 'job_title',
+                             'role_focus', 'skills_highlight', 'referrer'}),
+    'follow_up': frozenset({'name', 'company', 'industry', 'role_focus',
+                            'company_news', 'my_update', 'topic', 'article_link'}),
+    'thank_you': frozenset({'name', 'company', 'industry', 'role_focus',
+                            'position', 'topic_discussed', 'referrer'}),
+}
+
+# Templates compilados que se guardan (por texto)
+TEMPLATE_CACHE_SIZE = 256
+
+# Segundos entre dos consultas de la versión de los templates guardados en la base
+TEMPLATE_RELOAD_INTERVAL = 2.0
+
+
+class CompiledTemplate:
+    """
+    Template analizado una sola vez
+
+    El texto se separa en tramos fijos y huecos para las variables (con
+    string.Formatter, así {{ y }} son llaves literales); armar un mensaje es
+    llenar los huecos y unir la lista en una pasada, en lugar de un
+    str.replace sobre el mensaje completo por variable.
+    """
+
+    __slots__ = ('text', 'segments', 'slots', 'variables')
+
+    def __init__(self, text: str):
+        """
+        Args:
+            text: Template con variables {var}
+
+        Raises:
+            ValueError: Si hay llaves sin cerrar o un placeholder que no es
+                        un nombre simple ({0}, {a.b}, {x!r}, {x:>10})
+        """
+        segments = []
+        slots = []
+
+        try:
+            parsed = list(string.Formatter().parse(text))
+        except ValueError as e:
+            raise ValueError(f"Llaves mal cerradas ({e})")
+
+        for literal, field, spec, conversion in parsed:
+            if literal:
+                segments.append(literal)
+
+            if field is None:
+                continue
+
+            if not field.isidentifier() or spec or conversion:
+                raise ValueError(f"Placeholder no válido: {{{field}}}")
+
+            slots.append((len(segments), field))
+            segments.append(None)
+
+        self.text = text
+        # Tramos fijos; None en la posición de cada variable
+        self.segments = tuple(segments)
+        # (posición en segments, variable)
+        self.slots = tuple(slots)
+        self.variables: FrozenSet[str] = frozenset(field for _, field in slots)
+
+    def render(self, variables: Dict) -> str:
+        """
+        Arma el mensaje
+
+        Args:
+            variables: Valores por nombre de variable
+
+        Returns:
+            Mensaje con las variables reemplazadas (las que faltan quedan
+            como {variable})
+        """
+        parts = list(self.segments)
+
+        try:
+            for position, field in self.slots:
+                parts[position] = str(variables[field])
+        except KeyError:
+            for position, field in self.slots:
+                parts[position] = str(variables[field]) if field in variables else '{' + field + '}'
+
+        return ''.join(parts)
+
+
+@functools.lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def compile_template(text: str) -> CompiledTemplate:
+    """
+    Devuelve el template compilado (cacheado por texto)
+
+    Args:
+        text: Template con variables {var}
+
+    Returns:
+        CompiledTemplate
+
+    Raises:
+        ValueError: Si el template está mal formado
+    """
+    return CompiledTemplate(text)
 
 
 class MessageGenerator:
@@ -127,9 +240,96 @@ Saludos y gracias nuevamente!"""
         }
     ]
 
-    def __init__(self):
-        """Inicializa el generador de mensajes"""
-        pass
+    def __init__(self, db: Optional[ContactDatabase] = None):
+        """
+        Inicializa el generador de mensajes y compila los templates
+
+        Args:
+            db: Base donde se guardan los templates personalizados (None = los
+                personalizados viven solo en esta instancia)
+        """
+        self.db = db
+
+        # Templates personalizados: los de la base o, sin base, los de esta instancia
+        self.custom_templates: List[Dict] = []
+        # Versión de la base de los templates cargados y momento de la última consulta
+        self.templates_version = None
+        self.last_version_check = 0.0
+
+        for template_type, templates in self._build_templates().items():
+            for template in templates:
+                problems = self.validate_template(template_type, template['template'])
+                if problems:
+                    logger.warning(f"Template '{template['name']}': {'; '.join(problems)}")
+
+        self.templates = self._build_templates()
+        self.reload_templates(force=True)
+
+    def _build_templates(self) -> Dict[str, List[Dict]]:
+        """Templates de la instancia: los predeterminados y después los personalizados"""
+        templates = {
+            'connection': list(self.CONNECTION_TEMPLATES),
+            'follow_up': list(self.FOLLOW_UP_TEMPLATES),
+            'thank_you': list(self.THANK_YOU_TEMPLATES),
+        }
+
+        for template in self.custom_templates:
+            templates[template['template_type']].append(template)
+
+        return templates
+
+    def reload_templates(self, force: bool = False) -> bool:
+        """
+        Recarga los templates personalizados de la base si cambiaron
+
+        La versión se consulta a lo sumo cada TEMPLATE_RELOAD_INTERVAL
+        segundos; los templates solo se leen y compilan de nuevo cuando
+        cambió, así armar un mensaje no vuelve a leer ni analizar nada.
+
+        Args:
+            force: Consultar la versión aunque no haya pasado el intervalo
+
+        Returns:
+            True si se recargaron
+        """
+        if not self.db:
+            return False
+
+        now = time.monotonic()
+        if not force and now - self.last_version_check < TEMPLATE_RELOAD_INTERVAL:
+            return False
+
+        self.last_version_check = now
+        version = self.db.get_templates_version()
+
+        if version is None or version == self.templates_version:
+            return False
+
+        custom_templates = []
+
+        for row in self.db.get_templates():
+            problems = self.validate_template(row['template_type'], row['content'])
+            if problems:
+                logger.warning(f"Template guardado '{row['name']}' omitido: {'; '.join(problems)}")
+                continue
+
+            template = {
+                'name': row['name'],
+                'template': row['content'],
+                'tone': row['tone'] or 'professional',
+                'template_type': row['template_type'],
+                'is_custom': True
+            }
+            if row['template_type'] == 'follow_up':
+                template['days_after'] = row['days_after'] or 7
+
+            custom_templates.append(template)
+
+        self.custom_templates = custom_templates
+        self.templates = self._build_templates()
+        self.templates_version = version
+        logger.info(f"Templates personalizados cargados: {len(custom_templates)}")
+        return True
 
     def generate_connection_message(self, contact: Dict,
                                    template_index: Optional[int] = None,
@@ -145,37 +345,10 @@ Saludos y gracias nuevamente!"""
         Returns:
             Mensaje personalizado
         """
-        # Seleccionar template
-        if template_index is not None:
-            template = self.CONNECTION_TEMPLATES[template_index]
-        else:
-            template = random.choice(self.CONNECTION_TEMPLATES)
+        template = random.choice(self.select_templates('connection', template_index))
+        variables = self.build_variables('connection', contact, custom_vars)
 
-        message = template['template']
-
-        # Variables básicas del contacto
-        variables = {
-            'name': contact.get('name', '').split()[0] if contact.get('name') else 'there',
-            'company': contact.get('company', 'tu empresa'),
-            'industry': contact.get('industry', 'el sector'),
-            'job_title': contact.get('job_title', 'tu rol'),
-        }
-
-        # Variables personalizadas
-        if custom_vars:
-            variables.update(custom_vars)
-        else:
-            # Valores por defecto si no se proporcionan
-            variables.update({
-                'role_focus': contact.get('skills', 'mi área'),
-                'skills_highlight': self._extract_top_skills(contact.get('skills', '')),
-                'referrer': 'un colega',
-            })
-
-        # Reemplazar variables
-        message = self._replace_variables(message, variables)
-
-        return message.strip()
+        return compile_template(template['template']).render(variables).strip()
 
     def generate_follow_up_message(self, contact: Dict,
                                   template_index: Optional[int] = None,
@@ -191,32 +364,10 @@ Saludos y gracias nuevamente!"""
         Returns:
             Mensaje de follow-up
         """
-        if template_index is not None:
-            template = self.FOLLOW_UP_TEMPLATES[template_index]
-        else:
-            template = random.choice(self.FOLLOW_UP_TEMPLATES)
+        template = random.choice(self.select_templates('follow_up', template_index))
+        variables = self.build_variables('follow_up', contact, custom_vars)
 
-        message = template['template']
-
-        variables = {
-            'name': contact.get('name', '').split()[0] if contact.get('name') else 'there',
-            'company': contact.get('company', 'tu empresa'),
-            'role_focus': contact.get('skills', 'mi área'),
-        }
-
-        if custom_vars:
-            variables.update(custom_vars)
-        else:
-            variables.update({
-                'company_news': 'lanzando nuevos proyectos',
-                'my_update': 'completé una certificación relevante',
-                'topic': 'nuestras tendencias de la industria',
-                'article_link': '[enlace al artículo]',
-            })
-
-        message = self._replace_variables(message, variables)
-
-        return message.strip()
+        return compile_template(template['template']).render(variables).strip()
 
     def generate_thank_you_message(self, contact: Dict,
                                   context: str = 'connection',
@@ -232,28 +383,84 @@ Saludos y gracias nuevamente!"""
         Returns:
             Mensaje de agradecimiento
         """
-        # Filtrar templates por contexto
-        if context == 'interview':
-            templates = [t for t in self.THANK_YOU_TEMPLATES if 'Entrevista' in t['name']]
-        elif context == 'referral':
-            templates = [t for t in self.THANK_YOU_TEMPLATES if 'Referencia' in t['name']]
-        else:
-            templates = [t for t in self.THANK_YOU_TEMPLATES if 'Aceptación' in t['name']]
+        template = random.choice(self.select_templates('thank_you', context=context))
+        variables = self.build_variables('thank_you', contact, custom_vars)
+
+        return compile_template(template['template']).render(variables).strip()
+
+    def select_templates(self, template_type: str, template_index: Optional[int] = None,
+                         context: str = 'connection') -> List[Dict]:
+        """
+        Templates entre los que se elige el mensaje
 
-        if not templates:
-            templates = self.THANK_YOU_TEMPLATES
+        Args:
+            template_type: Tipo de template (connection, follow_up, thank_you)
+            template_index: Índice del template a usar (None = todos los del tipo)
+            context: Contexto del agradecimiento (solo thank_you: connection,
+                     interview, referral)
+
+        Returns:
+            Lista de templates (uno solo si se pidió un índice)
+        """
+        templates = self.get_all_templates()[template_type]
 
-        template = random.choice(templates)
-        message = template['template']
+        if template_type == 'thank_you':
+            # Filtrar templates por contexto
+            if context == 'interview':
+                filtered = [t for t in templates if 'Entrevista' in t['name']]
+            elif context == 'referral':
+                filtered = [t for t in templates if 'Referencia' in t['name']]
+            else:
+                filtered = [t for t in templates if 'Aceptación' in t['name']]
 
+            return filtered or templates
+
+        if template_index is not None:
+            return [templates[template_index]]
+        return templates
+
+    def build_variables(self, template_type: str, contact: Dict,
+                        custom_vars: Optional[Dict] = None) -> Dict:
+        """
+        Arma las variables de un mensaje para un contacto
+
+        Args:
+            template_type: Tipo de template (connection, follow_up, thank_you)
+            contact: Diccionario con datos del contacto
+            custom_vars: Variables personalizadas (reemplazan a los valores por defecto)
+
+        Returns:
+            Diccionario variable -> valor
+        """
+        # Variables básicas del contacto (un campo vacío usa el texto genérico)
         variables = {
-            'name': contact.get('name', '').split()[0] if contact.get('name') else 'there',
-            'company': contact.get('company', 'tu empresa'),
-            'role_focus': contact.get('skills', 'mi área'),
+            'name': contact['name'].split()[0] if contact.get('name') else 'there',
+            'company': contact.get('company') or 'tu empresa',
+            'industry': contact.get('industry') or 'el sector',
         }
 
+        if template_type == 'connection':
+            variables['job_title'] = contact.get('job_title') or 'tu rol'
+        else:
+            variables['role_focus'] = contact.get('skills') or 'mi área'
+
+        # Variables personalizadas
         if custom_vars:
             variables.update(custom_vars)
+        elif template_type == 'connection':
+            # Valores por defecto si no se proporcionan
+            variables.update({
+                'role_focus': contact.get('skills') or 'mi área',
+                'skills_highlight': self._extract_top_skills(contact.get('skills') or ''),
+                'referrer': 'un colega',
+            })
+        elif template_type == 'follow_up':
+            variables.update({
+                'company_news': 'lanzando nuevos proyectos',
+                'my_update': 'completé una certificación relevante',
+                'topic': 'nuestras tendencias de la industria',
+                'article_link': '[enlace al artículo]',
+            })
         else:
             variables.update({
                 'position': 'la posición',
@@ -261,17 +468,33 @@ Saludos y gracias nuevamente!"""
                 'referrer': 'nuestro contacto en común',
             })
 
-        message = self._replace_variables(message, variables)
+        return variables
+
+    def validate_template(self, template_type: str, content: str) -> List[str]:
+        """
+        Revisa un template antes de usarlo
+
+        Args:
+            template_type: Tipo de template (connection, follow_up, thank_you)
+            content: Contenido del template con variables {var}
+
+        Returns:
+            Problemas encontrados (vacía si el template se puede usar)
+        """
+        if template_type not in TEMPLATE_VARIABLES:
+            return [f"Tipo de template no válido: {template_type}"]
 
-        return message.strip()
+        try:
+            compiled = compile_template(content)
+        except ValueError as e:
+            return [str(e)]
 
-    def _replace_variables(self, message: str, variables: Dict[str, str]) -> str:
-        """Reemplaza variables en el template"""
-        for var, value in variables.items():
-            placeholder = f"{{{var}}}"
-            message = message.replace(placeholder, str(value))
+        missing = compiled.variables - TEMPLATE_VARIABLES[template_type]
+        if missing:
+            return [f"Variables sin valor para {template_type}: "
+                    + ', '.join(f"{{{var}}}" for var in sorted(missing))]
 
-        return message
+        return []
 
     def _extract_top_skills(self, skills_string: str, max_skills: int = 2) -> str:
         """
@@ -311,7 +534,7 @@ Saludos y gracias nuevamente!"""
         """
         suggestions = []
 
-        for idx, template in enumerate(self.CONNECTION_TEMPLATES):
+        for idx, template in enumerate(self.get_all_templates()['connection']):
             score = 0
             reasons = []
 
@@ -340,7 +563,7 @@ Saludos y gracias nuevamente!"""
                 'index': idx,
                 'name': template['name'],
                 'tone': template['tone'],
-                'length': template['length'],
+                'length': template.get('length', 'N/A'),
                 'score': score,
                 'reasons': reasons
             })
@@ -381,17 +604,18 @@ Saludos y gracias nuevamente!"""
         Returns:
             Diccionario con todos los templates organizados por tipo
         """
-        return {
-            'connection': self.CONNECTION_TEMPLATES,
-            'follow_up': self.FOLLOW_UP_TEMPLATES,
-            'thank_you': self.THANK_YOU_TEMPLATES
-        }
+        self.reload_templates()
+        return self.templates
 
     def create_custom_template(self, template_type: str, name: str,
                               content: str, tone: str = 'professional') -> bool:
         """
         Agrega un template personalizado
 
+        Con base, se guarda en la tabla templates (y lo ven las demás
+        instancias en su próxima recarga); sin base, vale solo para esta
+        instancia.
+
         Args:
             template_type: Tipo de template (connection, follow_up, thank_you)
             name: Nombre del template
@@ -399,23 +623,60 @@ Saludos y gracias nuevamente!"""
             tone: Tono del template (professional, friendly, casual)
 
         Returns:
-            True si se agregó correctamente
+            True si se agregó correctamente (False si el tipo no existe o el
+            template tiene placeholders mal formados o variables sin valor)
         """
+        problems = self.validate_template(template_type, content)
+        if problems:
+            logger.warning(f"Template '{name}' rechazado: {'; '.join(problems)}")
+            return False
+
+        days_after = 7 if template_type == 'follow_up' else None
+
+        if self.db:
+            if self.db.save_template(template_type, name, content, tone, days_after) is None:
+                return False
+
+            self.reload_templates(force=True)
+            return True
+
         new_template = {
             'name': name,
             'template': content,
             'tone': tone,
+            'template_type': template_type,
             'is_custom': True
         }
+        if days_after:
+            new_template['days_after'] = days_after
 
-        if template_type == 'connection':
-            self.CONNECTION_TEMPLATES.append(new_template)
-        elif template_type == 'follow_up':
-            new_template['days_after'] = 7
-            self.FOLLOW_UP_TEMPLATES.append(new_template)
-        elif template_type == 'thank_you':
-            self.THANK_YOU_TEMPLATES.append(new_template)
-        else:
+        self.custom_templates.append(new_template)
+        self.templates = self._build_templates()
+        return True
+
+    def delete_custom_template(self, template_type: str, name: str) -> bool:
+        """
+        Elimina un template personalizado
+
+        Args:
+            template_type: Tipo de template (connection, follow_up, thank_you)
+            name: Nombre del template
+
+        Returns:
+            True si existía y se eliminó
+        """
+        if self.db:
+            if not self.db.delete_template(template_type, name):
+                return False
+
+            self.reload_templates(force=True)
+            return True
+
+        remaining = [t for t in self.custom_templates
+                     if (t['template_type'], t['name']) != (template_type, name)]
+        if len(remaining) == len(self.custom_templates):
             return False
 
+        self.custom_templates = remaining
+        self.templates = self._build_templates()
         return True
@@ -30,7 +30,7 @@ class ReminderSystem:
             db: Instancia de ContactDatabase
         """
         self.db = db
-        self.msg_generator = MessageGenerator()
+        self.msg_generator = MessageGenerator(db)
 
         # Configuración desde .env
         self.default_interval_days = int(os.getenv('REMINDER_INTERVAL_DAYS', '7'))
@@ -210,7 +210,7 @@ class ReminderSystem:
 
         try:
             cursor.execute("""
-                SELECT contact_id, reminder_type
+                SELECT contact_id, reminder_type_id
                 FROM reminders
                 WHERE id = ?
             """, (reminder_id,))
@@ -222,7 +222,7 @@ class ReminderSystem:
                 new_reminder_id = self.create_follow_up_reminder(
                     contact_id=result['contact_id'],
                     days_from_now=days,
-                    reminder_type=result['reminder_type']
+                    reminder_type=self.db.enum_name('reminder_type', result['reminder_type_id'])
                 )
 
                 if new_reminder_id:
@@ -247,7 +247,7 @@ class ReminderSystem:
             Cantidad de recordatorios creados
         """
         # Obtener contactos pendientes
-        pending_contacts = self.db.get_all_contacts(status='pending')
+        pending_contacts = self.db.get_all_contacts(status='pending', columns=['id'])
 
         created_count = 0
 
@@ -410,12 +410,15 @@ class ReminderSystem:
 
             # Recordatorios por tipo
             cursor.execute("""
-                SELECT reminder_type, COUNT(*) as count
+                SELECT reminder_type_id, COUNT(*) as count
                 FROM reminders
                 WHERE is_completed = 0
-                GROUP BY reminder_type
+                GROUP BY reminder_type_id
             """)
-            stats['by_type'] = {row['reminder_type']: row['count'] for row in cursor.fetchall()}
+            stats['by_type'] = {
+                self.db.enum_name('reminder_type', row['reminder_type_id']): row['count']
+                for row in cursor.fetchall()
+            }
 
             # Recordatorios para hoy
             today = datetime.now().strftime('%Y-%m-%d')
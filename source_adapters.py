@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fuentes de contactos para el importador
+Adaptadores que leen otros formatos (vCard, CSV de un CRM) y entregan
+contactos normalizados, en streaming, al importador de LinkedIn
+"""
+
+import os
+import re
+import abc
+import csv
+import quopri
+import itertools
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+import logging
+
+from csv_importer import ByteOffsetLines, HEADER_SCAN_LINES, SOURCE_QUARANTINE_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# Campos que se pueden asignar a columnas en un CSV de CRM
+MAPPABLE_FIELDS = SOURCE_QUARANTINE_FIELDS + ('first_name', 'last_name')
+
+# Estado de los contactos que no vienen de las conexiones de LinkedIn
+DEFAULT_SOURCE_STATUS = 'pending'
+
+# Extensiones de archivos vCard
+VCARD_EXTENSIONS = ('.vcf', '.vcard')
+
+# Separador de componentes sin escapar de un valor estructurado (N, ORG, ADR)
+_COMPONENT_SPLIT = re.compile(r'(?<!\\);')
+_VCARD_ESCAPES = re.compile(r'\\(.)')
+
+
+def normalize_contact(linkedin_url: Optional[str], name: Optional[str] = None,
+                      company: Optional[str] = None, job_title: Optional[str] = None,
+                      location: Optional[str] = None, email: Optional[str] = None,
+                      notes: Optional[str] = None,
+                      status: str = DEFAULT_SOURCE_STATUS) -> Dict:
+    """
+    Arma un contacto con el mismo formato que HeaderResolver.map_row
+
+    Sin nombre se usa la parte del URL de LinkedIn. Sin URL de LinkedIn el contacto se devuelve igual con linkedin_url None
+    (el importador lo cuenta como omitido y lo manda a la cuarentena).
+    """
+    linkedin_url = (linkedin_url or '').strip() or None
+    name = (name or '').strip()
+
+    if not name and linkedin_url:
+        match = re.search(r'/in/([^/?#]+)', linkedin_url)
+        if match:
+            name = match.group(1).replace('-', ' ').title()
+
+    contact = {
+        'linkedin_url': linkedin_url,
+        'name': name or 'Contacto sin nombre',
+        'company': (company or '').strip() or None,
+        'job_title': (job_title or '').strip() or None,
+        'location': (location or '').strip() or None,
+        'email': (email or '').strip() or None,
+        'status': status
+    }
+
+    if notes and notes.strip():
+        contact['notes'] = notes.strip()
+
+    return contact
+
+
+def find_linkedin_url(values: Sequence[str]) -> Optional[str]:
+    """Primer valor que sea un perfil de LinkedIn (linkedin.com/in/...)"""
+    for value in values:
+        value = value.strip()
+        if 'linkedin.com/in/' in value.lower():
+            return value
+
+    return None
+
+
+class ContactSource(abc.ABC):
+    """
+    Base de los adaptadores de fuentes de contactos
+
+    Un adaptador recorre su archivo en streaming y, al iterarlo, entrega
+    un contacto normalizado (ver normalize_contact) por registro.
+    LinkedInCSVImporter.import_from_source los agrupa en lotes y los escribe
+    con el mismo deduplicado por URL que la importación de LinkedIn.
+    """
+
+    # Nombre del formato (se muestra y entra en la huella para reanudar)
+    kind = 'fuente'
+
+    def __init__(self, path: str, status: str = DEFAULT_SOURCE_STATUS):
+        """
+        Args:
+            path: Archivo a leer
+            status: Estado con que se crean los contactos
+        """
+        self.path = path
+        self.status = status
+        self.size = os.path.getsize(path)
+        # Bytes del archivo ya leídos (para el progreso)
+        self.offset = 0
+
+    def describe(self) -> str:
+        """Configuración del adaptador que distingue dos importaciones del mismo archivo"""
+        return f"{self.kind}|{self.status}"
+
+    @abc.abstractmethod
+    def __iter__(self) -> Iterator[Dict]:
+        """Recorre el archivo entregando un contacto normalizado por registro"""
+
+
+class VCardSource(ContactSource):
+    """
+    Contactos de un archivo vCard (.vcf), versiones 2.1, 3.0 y 4.0
+
+    Se leen las propiedades FN/N, ORG, TITLE, ADR, EMAIL, NOTE y el perfil
+    de LinkedIn de URL o X-SOCIALPROFILE. Las demás (fotos incluidas) se
+    descartan sin decodificarlas.
+    """
+
+    kind = 'vcard'
+
+    # Propiedades que se usan; el resto se saltea
+    PROPERTIES = frozenset(('FN', 'N', 'ORG', 'TITLE', 'ADR', 'EMAIL', 'NOTE',
+                            'URL', 'X-SOCIALPROFILE'))
+
+    def __iter__(self) -> Iterator[Dict]:
+        with open(self.path, 'rb') as raw:
+            lines = ByteOffsetLines(raw)
+            card = None
+
+            for name, params, value in self._properties(lines):
+                if name == 'BEGIN' and value.upper() == 'VCARD':
+                    card = {}
+                elif name == 'END' and value.upper() == 'VCARD':
+                    if card is not None:
+                        self.offset = lines.offset
+                        yield self._card_contact(card)
+                    card = None
+                elif card is not None and name in self.PROPERTIES:
+                    card.setdefault(name, []).append((params, value))
+
+            self.offset = lines.offset
+
+    def _properties(self, lines: ByteOffsetLines) -> Iterator[Tuple[str, Dict[str, str], str]]:
+        """Líneas de contenido ya desplegadas: (nombre, parámetros, valor)"""
+        current = None
+
+        for line in lines:
+            line = line.rstrip('\r\n')
+
+            if current is None:
+                current = line.lstrip('\ufeff')
+            elif line[:1] in (' ', '\t'):
+                # Línea plegada (vCard 3.0/4.0)
+                current += line[1:]
+                continue
+            elif current.endswith('=') and 'QUOTED-PRINTABLE' in current.upper().split(':', 1)[0]:
+                # Salto suave de quoted-printable (vCard 2.1)
+                current = current[:-1] + line
+                continue
+            else:
+                parsed = self._parse_line(current)
+                if parsed:
+                    yield parsed
+                current = line
+
+        if current:
+            parsed = self._parse_line(current)
+            if parsed:
+                yield parsed
+
+    def _parse_line(self, line: str) -> Optional[Tuple[str, Dict[str, str], str]]:
+        """Separa nombre, parámetros y valor de una línea de contenido"""
+        i = line.find(':')
+        if i < 0:
+            return None
+
+        if '"' in line[:i]:
+            # El primer ':' fuera de comillas separa el valor
+            quoted = False
+            for i, char in enumerate(line):
+                if char == '"':
+                    quoted = not quoted
+                elif char == ':' and not quoted:
+                    break
+            else:
+                return None
+
+        head, value = line[:i], line[i + 1:]
+        name, *raw_params = head.split(';')
+        # Grupos de Apple: item1.URL
+        name = name.rsplit('.', 1)[-1].upper()
+
+        if name not in self.PROPERTIES and name not in ('BEGIN', 'END'):
+            return name, {}, value
+
+        params = {}
+        for param in raw_params:
+            key, _, param_value = param.partition('=')
+            if not param_value:
+                # vCard 2.1: parámetros sin nombre (TYPE o ENCODING)
+                key, param_value = ('ENCODING' if key.upper() in ('QUOTED-PRINTABLE', 'BASE64')
+                                    else 'TYPE'), key
+            params[key.upper()] = param_value.strip('"').lower()
+
+        if params.get('ENCODING') == 'quoted-printable':
+            charset = params.get('CHARSET', 'utf-8')
+            value = quopri.decodestring(value.encode('latin-1', 'replace')).decode(charset, 'replace')
+
+        return name, params, value
+
+    def _components(self, value: str) -> List[str]:
+        """Componentes de un valor estructurado, sin escapes"""
+        return [self._unescape(part) for part in _COMPONENT_SPLIT.split(value)]
+
+    def _unescape(self, value: str) -> str:
+        """Quita los escapes de vCard (\\n, \\, \\; \\\\)"""
+        return _VCARD_ESCAPES.sub(lambda m: '\n' if m.group(1) in 'nN' else m.group(1), value).strip()
+
+    def _first(self, card: Dict, name: str) -> str:
+        """Primer valor de una propiedad, o '' si no está"""
+        values = card.get(name)
+        return self._unescape(values[0][1]) if values else ''
+
+    def _linkedin_url(self, card: Dict) -> Optional[str]:
+        """Perfil de LinkedIn de URL o X-SOCIALPROFILE"""
+        url = find_linkedin_url([value for _, value in card.get('URL', []) +
+                                 card.get('X-SOCIALPROFILE', [])])
+        if url:
+            return self._unescape(url)
+
+        # X-SOCIALPROFILE;TYPE=linkedin:usuario (sin URL completo)
+        for params, value in card.get('X-SOCIALPROFILE', []):
+            username = value.strip().rsplit(':', 1)[-1]
+            if 'linkedin' in params.get('TYPE', '').split(',') and username and '/' not in username:
+                return f"https://www.linkedin.com/in/{username}"
+
+        return None
+
+    def _card_contact(self, card: Dict) -> Dict:
+        """Contacto normalizado de una tarjeta"""
+        name = self._first(card, 'FN')
+        if not name and card.get('N'):
+            # N: apellido;nombre;adicionales;prefijo;sufijo
+            parts = self._components(card['N'][0][1]) + ['', '']
+            name = ' '.join(part for part in (parts[1], parts[0]) if part)
+
+        company = ''
+        if card.get('ORG'):
+            company = self._components(card['ORG'][0][1])[0]
+
+        location = ''
+        if card.get('ADR'):
+            # ADR: apartado;extendida;calle;ciudad;región;código postal;país
+            parts = self._components(card['ADR'][0][1]) + [''] * 7
+            location = ', '.join(part for part in (parts[3], parts[4], parts[6]) if part)
+
+        return normalize_contact(
+            self._linkedin_url(card),
+            name=name,
+            company=company,
+            job_title=self._first(card, 'TITLE'),
+            location=location,
+            email=self._first(card, 'EMAIL'),
+            notes=self._first(card, 'NOTE'),
+            status=self.status
+        )
+
+
+class MappedCSVSource(ContactSource):
+    """
+    Contactos de un CSV genérico (p. ej. la exportación de un CRM)
+
+    Cada campo se toma de la columna indicada en el mapeo; un campo puede
+    unir varias columnas (se juntan con un espacio, las notas con ' | ').
+    Si la columna de LinkedIn no trae un perfil (linkedin.com/in/...) se
+    busca uno en cualquier columna de la fila.
+    """
+
+    kind = 'csv'
+
+    def __init__(self, path: str, mapping: Dict[str, Union[str, Sequence[str]]],
+                 delimiter: Optional[str] = None, status: str = DEFAULT_SOURCE_STATUS):
+        """
+        Args:
+            path: CSV a leer
+            mapping: Campo (ver MAPPABLE_FIELDS) -> nombre de columna o lista de columnas
+            delimiter: Separador de campos (por defecto se detecta: , ; o tabulación)
+            status: Estado con que se crean los contactos
+        """
+        unknown = set(mapping) - set(MAPPABLE_FIELDS)
+        if unknown:
+            raise ValueError(f"Campos desconocidos en el mapeo: {', '.join(sorted(unknown))}")
+
+        super().__init__(path, status)
+        self.mapping = {field: (columns,) if isinstance(columns, str) else tuple(columns)
+                        for field, columns in mapping.items()}
+        self.delimiter = delimiter
+
+    def describe(self) -> str:
+        mapping = ';'.join(f"{field}={','.join(columns)}"
+                           for field, columns in sorted(self.mapping.items()))
+        return f"{super().describe()}|{mapping}"
+
+    def read_fieldnames(self) -> List[str]:
+        """Encabezado del CSV (para elegir el mapeo)"""
+        with open(self.path, 'rb') as raw:
+            return self._open_reader(ByteOffsetLines(raw))[0]
+
+    def _open_reader(self, lines: ByteOffsetLines) -> Tuple[List[str], Iterator[List[str]]]:
+        """Detecta el separador y lee el encabezado (primera fila no vacía)"""
+        if self.delimiter:
+            delimiter = self.delimiter
+        else:
+            sample = list(itertools.islice(lines, HEADER_SCAN_LINES))
+            lines.seek(0)
+            try:
+                delimiter = csv.Sniffer().sniff(''.join(sample), delimiters=',;\t').delimiter
+            except csv.Error:
+                delimiter = ','
+
+        reader = csv.reader(lines, delimiter=delimiter)
+        for header in reader:
+            if any(value.strip() for value in header):
+                header[0] = header[0].lstrip('\ufeff')
+                return [name.strip() for name in header], reader
+
+        return [], reader
+
+    def _positions(self, fieldnames: List[str]) -> Dict[str, Tuple[int, ...]]:
+        """Posición de las columnas de cada campo (sin distinguir mayúsculas)"""
+        lowered = {name.lower(): i for i, name in reversed(list(enumerate(fieldnames)))}
+        positions = {}
+
+        for field, columns in self.mapping.items():
+            missing = [column for column in columns if column.strip().lower() not in lowered]
+            if missing:
+                raise ValueError(f"Columnas no encontradas en {self.path}: {', '.join(missing)}")
+            positions[field] = tuple(lowered[column.strip().lower()] for column in columns)
+
+        return positions
+
+    def __iter__(self) -> Iterator[Dict]:
+        with open(self.path, 'rb') as raw:
+            lines = ByteOffsetLines(raw)
+            fieldnames, reader = self._open_reader(lines)
+            positions = self._positions(fieldnames)
+
+            def field(row: List[str], name: str, separator: str = ' ') -> str:
+                values = (row[i].strip() for i in positions.get(name, ()) if i < len(row))
+                return separator.join(value for value in values if value)
+
+            for row in reader:
+                if not any(value.strip() for value in row):
+                    continue
+
+                self.offset = lines.offset
+                name = field(row, 'name') or ' '.join(
+                    part for part in (field(row, 'first_name'), field(row, 'last_name')) if part
+                )
+
+                linkedin_url = field(row, 'linkedin_url')
+                if 'linkedin.com/in/' not in linkedin_url.lower():
+                    linkedin_url = find_linkedin_url(row)
+
+                yield normalize_contact(
+                    linkedin_url,
+                    name=name,
+                    company=field(row, 'company'),
+                    job_title=field(row, 'job_title'),
+                    location=field(row, 'location', ', '),
+                    email=field(row, 'email'),
+                    notes=field(row, 'notes', ' | '),
+                    status=self.status
+                )
+
+            self.offset = lines.offset
+
+
+def open_source(path: str, mapping: Optional[Dict[str, Union[str, Sequence[str]]]] = None,
+                **kwargs) -> ContactSource:
+    """
+    Elige el adaptador según el archivo
+
+    Args:
+        path: Archivo vCard (.vcf) o CSV
+        mapping: Mapeo de columnas (obligatorio para un CSV)
+        **kwargs: Opciones del adaptador (status, delimiter)
+
+    Returns:
+        Adaptador listo para importar con LinkedInCSVImporter.import_from_source
+    """
+    if path.lower().endswith(VCARD_EXTENSIONS):
+        return VCardSource(path, **kwargs)
+
+    if mapping is None:
+        raise ValueError("Un CSV genérico necesita el mapeo de columnas")
+
+    return MappedCSVSource(path, mapping, **kwargs)
+